@@ -0,0 +1,64 @@
+import argparse
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_fingerprint import make_df
+from date_a_scientist import DateAScientist
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def load(url: str, work_dir: str, download_cache_dir: str | None) -> float:
+    start = time.perf_counter()
+    ds = DateAScientist(
+        df=url,
+        llm_openai_api_token="benchmark",
+        cache_path=os.path.join(work_dir, ".date_a_scientist_cache"),
+        download_cache_dir=download_cache_dir,
+    )
+    ds._df
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cold and warm construction of URL datasets.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # SimpleHTTPRequestHandler answers `If-Modified-Since` with `304 Not Modified`
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=work_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        download_cache_dir = os.path.join(work_dir, "downloads")
+
+        print(f"{'rows':>12} {'no cache [s]':>14} {'cold [s]':>10} {'warm [s]':>10}")
+        for rows in args.rows:
+            make_df(rows, args.columns).to_csv(os.path.join(work_dir, f"data_{rows}.csv"), index=False)
+            url = f"http://127.0.0.1:{server.server_port}/data_{rows}.csv"
+
+            no_cache, cold, warm = [], [], []
+            for _ in range(args.repeat):
+                no_cache.append(load(url, work_dir, None))
+                shutil.rmtree(download_cache_dir, ignore_errors=True)
+                cold.append(load(url, work_dir, download_cache_dir))
+                warm.append(load(url, work_dir, download_cache_dir))
+
+            print(f"{rows:>12} {min(no_cache):>14.3f} {min(cold):>10.3f} {min(warm):>10.3f}")
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
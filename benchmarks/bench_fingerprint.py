@@ -0,0 +1,58 @@
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from date_a_scientist.fingerprint import generate_data_hash
+
+
+def legacy_data_hash(df: pd.DataFrame) -> str:
+    # the CSV based hash used before `date_a_scientist.fingerprint` existed
+    df_to_hash = df.sample(n=10_000, random_state=42) if len(df) > 10_000 else df
+    return hashlib.md5(df_to_hash.to_csv(index=False).encode()).hexdigest()
+
+
+def make_df(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    data = {}
+    for i in range(columns):
+        if i % 3 == 0:
+            data[f"num_{i}"] = rng.random(rows)
+        elif i % 3 == 1:
+            data[f"int_{i}"] = rng.integers(0, 1_000_000, rows)
+        else:
+            data[f"str_{i}"] = pd.Series(rng.integers(0, 1_000, rows)).map("value_{}".format)
+
+    return pd.DataFrame(data)
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare dataframe fingerprint strategies.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'legacy csv [s]':>16} {'sample [s]':>12} {'full [s]':>12}")
+    for rows in args.rows:
+        df = make_df(rows, args.columns)
+        legacy = measure(lambda: legacy_data_hash(df), args.repeat)
+        sample = measure(lambda: generate_data_hash(df, mode="sample"), args.repeat)
+        full = measure(lambda: generate_data_hash(df, mode="full"), args.repeat)
+        print(f"{rows:>12} {legacy:>16.3f} {sample:>12.3f} {full:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
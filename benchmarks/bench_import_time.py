@@ -0,0 +1,62 @@
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+_IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    # `-X importtime` prints "self [us] | cumulative [us] | module" for every import to stderr
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    ).stderr
+
+    times = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME_PATTERN.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure how long `import date_a_scientist` takes.")
+    parser.add_argument("--module", default="date_a_scientist")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None, help="exit with 1 if the median is slower")
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=["pandasai", "openai", "pygments", "requests", "validators"],
+        help="modules that must not be imported by the package itself",
+    )
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    cumulative_ms = [run[args.module][1] / 1000 for run in runs]
+    median_ms = statistics.median(cumulative_ms)
+    print(f"import {args.module}: median {median_ms:.1f} ms, min {min(cumulative_ms):.1f} ms ({args.repeat} runs)")
+
+    print(f"\n{'self [ms]':>10}  module")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[: args.top]
+    for name, (self_us, _) in slowest:
+        print(f"{self_us / 1000:>10.1f}  {name}")
+
+    forbidden = sorted({name.split(".")[0] for name in runs[-1]} & set(args.forbid))
+    failed = False
+    if forbidden:
+        print(f"\nimported at module load, but should be deferred: {', '.join(forbidden)}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"\nregression: {median_ms:.1f} ms > {args.max_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from date_a_scientist import DateAScientist
+from date_a_scientist.llm import clear_openai_clients
+
+
+def ask(base_url: str, work_dir: str, seed: int) -> float:
+    # one instance per dataset slice, each asking its first question
+    start = time.perf_counter()
+    ds = DateAScientist(
+        df=pd.DataFrame({"name": [f"person {seed}-{i}" for i in range(100)], "age": range(100)}),
+        llm_openai_api_token="benchmark",
+        llm_openai_base_url=base_url,
+        cache_path=os.path.join(work_dir, ".date_a_scientist_cache"),
+        enable_cache=False,
+    )
+    ds.chat("What is the name of the first person?")
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-question overhead of new DateAScientist instances with shared and per-instance LLM clients."
+    )
+    parser.add_argument("--instances", type=int, default=20)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    server = FakeOpenAIServer().start()
+
+    print(f"{'clients':>14} {'1st instance [ms]':>18} {'later instances, median [ms]':>29}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for shared in [False, True]:
+            clear_openai_clients()
+            elapsed = []
+            for seed in range(args.instances):
+                if not shared:
+                    # what every instance paid before: a client, and a connection, of its own
+                    clear_openai_clients()
+                elapsed.append(ask(server.base_url, work_dir, seed))
+
+            label = "shared" if shared else "per instance"
+            print(f"{label:>14} {elapsed[0] * 1000:>18.1f} {statistics.median(elapsed[1:]) * 1000:>29.1f}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.bench_fingerprint import make_df
+
+CHUNK_ROWS = 1_000_000
+PANDAS_CODE = (
+    "df = dfs[0]\n"
+    "totals = df.groupby('str_2')['num_0'].sum().sort_values(ascending=False)\n"
+    "result = {'type': 'string', 'value': totals.index[0]}"
+)
+SQL_CODE = (
+    "df = execute_sql_query("
+    "'SELECT str_2, sum(num_0) AS total FROM events GROUP BY str_2 ORDER BY total DESC LIMIT 1')\n"
+    "result = {'type': 'string', 'value': df['str_2'].iloc[0]}"
+)
+
+
+def write_parquet(path: str, rows: int, columns: int) -> None:
+    # written chunk by chunk, so the benchmark itself never holds the whole dataset
+    writer = None
+    for start in range(0, rows, CHUNK_ROWS):
+        table = pa.Table.from_pandas(make_df(min(CHUNK_ROWS, rows - start), columns), preserve_index=False)
+        writer = writer or pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+
+def run(path: str, out_of_core: bool) -> None:
+    # runs in a fresh process, so its peak RSS only belongs to this dataset and mode
+    from date_a_scientist import DateAScientist
+
+    start = time.perf_counter()
+    ds = DateAScientist(
+        df=path,
+        llm_openai_api_token="benchmark",
+        cache_path=os.path.join(os.path.dirname(path), ".date_a_scientist_cache"),
+        out_of_core=out_of_core,
+    )
+    ds._profile
+    ds._agent.run_code(SQL_CODE if out_of_core else PANDAS_CODE)
+    elapsed = time.perf_counter() - start
+
+    print(elapsed, peak_rss_mb())
+
+
+def peak_rss_mb() -> float:
+    # `ru_maxrss` survives `exec`, so a child would report the peak of the benchmark process
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path: str, out_of_core: bool) -> tuple[float, float]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_out_of_core", "--run", path]
+        + (["--out-of-core"] if out_of_core else []),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    elapsed, peak_rss_mb = output.split()[-2:]
+
+    return float(elapsed), float(peak_rss_mb)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare peak RSS of in-memory and out-of-core questions.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 4_000_000, 16_000_000])
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--out-of-core", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.out_of_core)
+        return
+
+    print(f"{'rows':>12} {'file [MB]':>10} {'in memory [s]':>14} {'[MB]':>8} {'out of core [s]':>16} {'[MB]':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, "events.parquet")
+            write_parquet(path, rows, args.columns)
+            in_memory = measure(path, out_of_core=False)
+            out_of_core = measure(path, out_of_core=True)
+
+            print(
+                f"{rows:>12} {os.path.getsize(path) / 1024**2:>10.1f} {in_memory[0]:>14.2f} {in_memory[1]:>8.0f}"
+                f" {out_of_core[0]:>16.2f} {out_of_core[1]:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
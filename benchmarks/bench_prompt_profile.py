@@ -0,0 +1,50 @@
+import argparse
+import time
+import warnings
+
+from pandasai.connectors import PandasConnector  # type: ignore[import-untyped]
+
+from benchmarks.bench_fingerprint import make_df
+from date_a_scientist.connector import ProfiledPandasConnector
+from date_a_scientist.profile import CHARS_PER_TOKEN, DEFAULT_TOKEN_BUDGET, build_profile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the dataframe part of the prompt with and without profiles.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, nargs="+", default=[12, 100, 500])
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    # pandasai samples the head with frame inserts, which warns on wide frames
+    warnings.simplefilter("ignore")
+
+    print(
+        f"{'columns':>8} {'head tokens':>12} {'profile tokens':>15} {'head [ms]':>10} "
+        f"{'build profile [ms]':>19} {'render [ms]':>12}"
+    )
+    for columns in args.columns:
+        df = make_df(args.rows, columns)
+
+        start = time.perf_counter()
+        head = PandasConnector({"original_df": df}).to_string()
+        head_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        profile = build_profile(df)
+        build_elapsed = time.perf_counter() - start
+
+        connector = ProfiledPandasConnector({"original_df": df}, profile=profile, token_budget=args.token_budget)
+        connector.question = f"What is the average of num_{columns // 2 // 3 * 3}?"
+        start = time.perf_counter()
+        rendered = connector.to_string()
+        render_elapsed = time.perf_counter() - start
+
+        print(
+            f"{columns:>8} {len(head) // CHARS_PER_TOKEN:>12} {len(rendered) // CHARS_PER_TOKEN:>15} "
+            f"{head_elapsed * 1000:>10.1f} {build_elapsed * 1000:>19.1f} {render_elapsed * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import pandas as pd
+
+from benchmarks.bench_fingerprint import make_df
+from benchmarks.fake_openai import RESPONSE, FakeOpenAIServer
+from date_a_scientist import DateAScientist
+from date_a_scientist.cache import AnswerCache
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+QUESTION = "What is the name of the first person?"
+CACHE_SIZES = [10, 1_000, 100_000]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+class Suite:
+    # Every scenario runs against a fake OpenAI server and local files only, so timings only depend on
+    # this package (and the machine), not on the network or the model.
+    def __init__(self, work_dir: str, llm_base_url: str, rows: int, batch_size: int, repeat: int) -> None:
+        self.work_dir = work_dir
+        self.llm_base_url = llm_base_url
+        self.df = make_df(rows, 6)
+        self.df.insert(0, "name", [f"person {i}" for i in range(rows)])
+        self.batch_size = batch_size
+        self.repeat = repeat
+        self._runs = 0
+
+        csv_dir = os.path.join(work_dir, "http")
+        os.makedirs(csv_dir)
+        self.df.to_csv(os.path.join(csv_dir, "people.csv"), index=False)
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=csv_dir))
+        threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+        self.csv_url = f"http://127.0.0.1:{self._http_server.server_port}/people.csv"
+
+    def close(self) -> None:
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+    def scenarios(self) -> dict[str, Callable[[], float]]:
+        scenarios = {
+            "construct.dataframe": self.construct_dataframe,
+            "construct.url_load": self.construct_url_load,
+            "chat.miss": self.chat_miss,
+            "chat.hit": self.chat_hit,
+            "agent.clean_code": self.clean_code,
+            "code.highlight": self.code_highlight,
+            "chat_batch.per_question": self.chat_batch,
+            "update_df.append": partial(self.update_df_append, False),
+            "update_df.append_with_agent": partial(self.update_df_append, True),
+            "construct.appended": self.construct_appended,
+        }
+        for size in CACHE_SIZES:
+            scenarios[f"cache.set.{size}"] = partial(self.cache_set, size)
+            scenarios[f"cache.get.{size}"] = partial(self.cache_get, size)
+            scenarios[f"cache.reopen.{size}"] = partial(self.cache_reopen, size)
+
+        return scenarios
+
+    def _new_ds(self, df: pd.DataFrame | str | None = None, **kwargs) -> DateAScientist:
+        # a cache directory per instance, so no scenario hits answers of another one
+        self._runs += 1
+        run_dir = os.path.join(self.work_dir, f"run_{self._runs}")
+        os.makedirs(run_dir)
+
+        return DateAScientist(
+            df=self.df if df is None else df,
+            llm_openai_api_token="benchmark",
+            llm_openai_base_url=self.llm_base_url,
+            cache_path=os.path.join(run_dir, ".date_a_scientist_cache"),
+            **kwargs,
+        )
+
+    def construct_dataframe(self) -> float:
+        # dominated by the data hash
+        return measure(self._new_ds, self.repeat)
+
+    def construct_url_load(self) -> float:
+        return measure(lambda: self._new_ds(self.csv_url, download_cache_dir=None)._df, self.repeat)
+
+    def chat_miss(self) -> float:
+        ds = self._new_ds()
+        ds.chat("Warm up the agent")
+        questions = iter(range(self.repeat))
+
+        return measure(lambda: ds.chat(f"{QUESTION} #{next(questions)}"), self.repeat)
+
+    def chat_hit(self) -> float:
+        ds = self._new_ds()
+        ds.chat(QUESTION)
+
+        return measure(lambda: ds.chat(QUESTION), self.repeat)
+
+    def clean_code(self) -> float:
+        agent = self._new_ds()._agent
+        code = RESPONSE.split("```python")[1].split("```")[0]
+
+        return measure(lambda: [agent.clean_code(code) for _ in range(1000)], self.repeat) / 1000
+
+    def code_highlight(self) -> float:
+        ds = self._new_ds()
+        ds.chat(QUESTION)
+
+        return measure(lambda: ds.code(QUESTION), self.repeat)
+
+    def chat_batch(self) -> float:
+        ds = self._new_ds()
+        ds.chat("Warm up the agent")
+        batches = iter(range(self.repeat))
+
+        def run_batch() -> None:
+            batch = next(batches)
+            ds.chat_batch([f"{QUESTION} #{batch}-{i}" for i in range(self.batch_size)], max_workers=8)
+
+        return measure(run_batch, self.repeat) / self.batch_size
+
+    def _appended_frames(self, rows: int) -> list[pd.DataFrame]:
+        extra = self.df.iloc[:rows]
+        frames = [self.df]
+        for _ in range(self.repeat):
+            frames.append(pd.concat([frames[-1], extra], ignore_index=True))
+
+        return frames[1:]
+
+    def update_df_append(self, with_agent: bool) -> float:
+        # what an append of 100 rows costs an instance that keeps its answers, and its agent once one was built
+        ds = self._new_ds(fingerprint_mode="chunked")
+        if with_agent:
+            ds.chat(QUESTION)
+            assert "_agent" in ds.__dict__
+        frames = iter(self._appended_frames(100))
+
+        return measure(lambda: ds.update_df(next(frames)), self.repeat)
+
+    def construct_appended(self) -> float:
+        # the same append handled with a new instance, as before `update_df`
+        frames = iter(self._appended_frames(100))
+
+        return measure(lambda: self._new_ds(next(frames))._agent, self.repeat)
+
+    def _filled_cache(self, size: int) -> str:
+        path = os.path.join(self.work_dir, f"cache_{size}")
+        if not os.path.exists(path):
+            cache = AnswerCache(path)
+            for i in range(size):
+                cache.set(f"{QUESTION} #{i}", {"result": f"person {i}", "code": RESPONSE})
+            cache.close()
+
+        return path
+
+    def cache_set(self, size: int) -> float:
+        cache = AnswerCache(self._filled_cache(size))
+
+        return measure(lambda: cache.set(QUESTION, {"result": "person 0", "code": RESPONSE}), self.repeat)
+
+    def cache_get(self, size: int) -> float:
+        cache = AnswerCache(self._filled_cache(size))
+        cache.get(QUESTION)
+
+        return measure(lambda: cache.get(f"{QUESTION} #{size // 2}"), self.repeat)
+
+    def cache_reopen(self, size: int) -> float:
+        # what a new notebook kernel pays for its first cached answer
+        path = self._filled_cache(size)
+
+        def reopen() -> None:
+            cache = AnswerCache(path)
+            cache.get(f"{QUESTION} #{size // 2}")
+            cache.close()
+
+        return measure(reopen, self.repeat)
+
+
+def compare(results: dict[str, float], baselines: dict[str, float], tolerance: float, slack_ms: float) -> list[str]:
+    regressions = []
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        # the absolute slack keeps sub-millisecond scenarios from failing on timer noise
+        if baseline is not None and seconds > baseline * (1 + tolerance) + slack_ms / 1000:
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks of DateAScientist against a fake LLM.")
+    parser.add_argument("--only", nargs="*", default=None, help="scenarios to run (prefixes, e.g. cache.get)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake LLM takes to answer")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store the timings as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed slowdown relative to the baseline")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="allowed slowdown in milliseconds on top")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    server = FakeOpenAIServer(latency=args.latency).start()
+    results = {}
+    print(f"{'scenario':<26} {'[ms]':>10} {'baseline [ms]':>14}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        suite = Suite(work_dir, server.base_url, args.rows, args.batch_size, args.repeat)
+        try:
+            for name, scenario in suite.scenarios().items():
+                if args.only is not None and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                results[name] = scenario()
+                baseline = f"{baselines[name] * 1000:.3f}" if name in baselines else "-"
+                print(f"{name:<26} {results[name] * 1000:>10.3f} {baseline:>14}")
+        finally:
+            suite.close()
+            server.stop()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({**baselines, **results}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        return
+
+    regressions = compare(results, baselines, args.tolerance, args.slack_ms)
+    if regressions:
+        print(f"\nregressions (more than {args.tolerance:.0%} + {args.slack_ms} ms slower): {', '.join(regressions)}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
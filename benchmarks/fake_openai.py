@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPONSE = """Here you go:
+```python
+import pandas as pd
+
+df = dfs[0]
+first_name = df["name"].iloc[0]
+
+# Declare result var:
+result = {"type": "string", "value": first_name}
+```
+"""
+# a streamed response pauses here until the client has shown the first code
+FIRST_PART = RESPONSE[: RESPONSE.index("# Declare")]
+USAGE = {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140}
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append(request)  # type: ignore[attr-defined]
+        server.client_ports.append(self.client_address[1])  # type: ignore[attr-defined]
+        time.sleep(server.latency)  # type: ignore[attr-defined]
+
+        rate_limit_headers, retry_after = server.take_request()  # type: ignore[attr-defined]
+        if retry_after is not None:
+            self._reject(rate_limit_headers, retry_after)
+        elif request.get("stream"):
+            self._stream()
+        else:
+            self._respond(rate_limit_headers)
+
+    def _reject(self, headers: dict[str, str], retry_after: float) -> None:
+        error = {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+        body = json.dumps({"error": error})
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("retry-after-ms", str(int(retry_after * 1000) + 1))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def _respond(self, rate_limit_headers: dict[str, str]) -> None:
+        body = json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.server.response},  # type: ignore[attr-defined]
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": USAGE,
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in rate_limit_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        # the end of the stream is the end of the connection
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        server = self.server
+        self._send_text(FIRST_PART)
+        server.streamed_before_end = server.first_code_shown.wait(5)  # type: ignore[attr-defined]
+        self._send_text(RESPONSE[len(FIRST_PART) :])
+        self._send_event({"choices": [], "usage": USAGE})
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send_text(self, text: str) -> None:
+        for start in range(0, len(text), 5):
+            self._send_event({"choices": [{"index": 0, "delta": {"content": text[start : start + 5]}}]})
+
+    def _send_event(self, data: dict) -> None:
+        chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o", **data}
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+# A local stand-in for OpenAI's chat completions endpoint that answers every question with `response`
+# after `latency` seconds. With `requests_limit`, it allows that many requests per `limit_window` seconds,
+# sends OpenAI's rate limit headers and rejects requests over the limit with 429s.
+class FakeOpenAIServer(ThreadingHTTPServer):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        requests_limit: int | None = None,
+        limit_window: float = 60.0,
+        response: str = RESPONSE,
+    ) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeOpenAIHandler)
+        self.response = response
+        self.latency = latency
+        self.requests_limit = requests_limit
+        self.limit_window = limit_window
+        self.rate_limited = 0
+        self._available = float(requests_limit or 0)
+        self._updated = time.monotonic()
+        self._limit_lock = threading.Lock()
+        self.requests: list[dict] = []
+        self.client_ports: list[int] = []
+        self.first_code_shown = threading.Event()
+        self.streamed_before_end = False
+
+    def take_request(self) -> tuple[dict[str, str], float | None]:
+        if self.requests_limit is None:
+            return {}, None
+
+        rate = self.requests_limit / self.limit_window
+        with self._limit_lock:
+            now = time.monotonic()
+            self._available = min(self.requests_limit, self._available + (now - self._updated) * rate)
+            self._updated = now
+            retry_after = None
+            if self._available < 1:
+                self.rate_limited += 1
+                retry_after = (1 - self._available) / rate
+            else:
+                self._available -= 1
+            headers = {
+                "x-ratelimit-limit-requests": str(self.requests_limit),
+                "x-ratelimit-remaining-requests": str(int(self._available)),
+                "x-ratelimit-reset-requests": f"{(self.requests_limit - self._available) / rate:.3f}s",
+            }
+
+        return headers, retry_after
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
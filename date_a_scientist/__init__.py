@@ -1,68 +1,62 @@
-import hashlib
+import asyncio
+import glob
+import importlib.util
+import json
 import os
-import pickle
+import queue
 import re
+import shutil
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from getpass import getpass
-from typing import Any
-from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+from typing import TYPE_CHECKING, Any, Iterator
 
 import pandas as pd
-import requests
-import validators
-from openai import NotFoundError as OpenAINotFoundError  # type: ignore[import]
-from pandasai.connectors import PandasConnector  # type: ignore[import-untyped]
-from pandasai.llm import OpenAI  # type: ignore[import-untyped]
-from pygments import highlight
-from pygments.formatters import HtmlFormatter
-from pygments.lexers import PythonLexer
-from pygments.styles import get_style_by_name
-
-from date_a_scientist.agent import Agent  # type: ignore[import-untyped]
-from date_a_scientist.exceptions import ModelNotFoundError
-
-
-class _CustomOpenAI(OpenAI):
-    def completion(self, *args, **kwargs) -> str:
-        try:
-            text = super().completion(*args, **kwargs)
-        except OpenAINotFoundError as e:
-            if "does not exist or you do not have access to it" in str(e):
-                raise ModelNotFoundError(
-                    "Sorry, I cannot answer this question. Please check if you've enabled paid tier in OpenAI."
-                )
-            else:
-                raise e
-
-        text = self._add_plt_close(text)
-
-        return text
-
-    def chat_completion(self, *args, **kwargs) -> str:
-        try:
-            content = super().chat_completion(*args, **kwargs)
-        except OpenAINotFoundError as e:
-            if "does not exist or you do not have access to it" in str(e):
-                raise ModelNotFoundError(
-                    "Sorry, I cannot answer this question. Please check if you've enabled paid tier in OpenAI."
-                )
-            else:
-                raise e
-
-        content = self._add_plt_close(content)
 
-        return content
-
-    def _add_plt_close(self, text: str) -> str:
-        if "plt.savefig" in text:
-            lines = text.split("\n")
-            for i, line in enumerate(lines):
-                if line.startswith("plt.savefig"):
-                    lines.insert(i + 1, "plt.close() # HACK")
-
-            return "\n".join(lines)
-
-        return text
+from date_a_scientist.batch import BatchAnswer
+from date_a_scientist.cache import AnswerCache, ArrowResult, CacheRegistry, is_legacy_pickle
+from date_a_scientist.charts import ChartStore, find_chart_path
+from date_a_scientist.exceptions import PrecomputeError
+from date_a_scientist.failures import FAILURE_TTL, FAILURE_TTL_MAX, failure_ttl
+from date_a_scientist.fingerprint import (
+    ChunkedFingerprint,
+    chunked_fingerprint,
+    generate_data_hash,
+    generate_schema_hash,
+    legacy_data_hash,
+)
+from date_a_scientist.loader import DatasetLoader, is_local_dataset
+from date_a_scientist.metrics import InMemoryCollector, Metrics, MetricsHook, stage_name
+from date_a_scientist.pool import AgentPool
+from date_a_scientist.profile import DEFAULT_MEMORY_TOKEN_BUDGET, DEFAULT_TOKEN_BUDGET, add_descriptions, build_profile
+from date_a_scientist.query_index import normalize_question
+from date_a_scientist.streaming import CodeStream, StreamChunk
+
+# pandasai, openai, pygments, requests and validators take seconds to import, so they are
+# only imported by the code paths that need them: a cached answer never touches them
+if TYPE_CHECKING:
+    from date_a_scientist.agent import Agent
+    from date_a_scientist.download_cache import DownloadCache
+    from date_a_scientist.duckdb_dataset import DuckDBDataset
+    from date_a_scientist.warmup import Warmup
+    from date_a_scientist.workers import WorkerPool
+
+# answers for data replaced by `update_df` are carried over from this many earlier versions of it
+MAX_PREVIOUS_CACHES = 3
+# the cache file name of versions hashing the data with MD5
+_LEGACY_CACHE_SUFFIX = re.compile(r"_[0-9a-f]{32}")
+
+
+def __getattr__(name: str) -> Any:
+    if name == "Agent":
+        from date_a_scientist.agent import Agent
+
+        return Agent
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class DateAScientist:
@@ -81,63 +75,170 @@ class DateAScientist:
         enable_cache: bool = True,
         verbose: bool = False,
         cache_path: str = ".date_a_scientist_cache",
+        fingerprint_mode: str = "sample",
+        cache_similarity_threshold: float | None = None,
+        max_concurrency: int = 4,
+        enable_code_cache: bool = False,
+        download_cache_dir: str | None = ".date_a_scientist_downloads",
+        prompt_token_budget: int | None = DEFAULT_TOKEN_BUDGET,
+        metrics_hooks: list[MetricsHook] | None = None,
+        cache_max_entries: int | None = None,
+        cache_ttl: float | None = None,
+        cache_max_bytes: int | None = None,
+        llm_openai_base_url: str | None = None,
+        out_of_core: bool = False,
+        execution_workers: int | None = None,
+        execution_cpu_time_limit: float | None = None,
+        execution_memory_limit: int | None = None,
+        execution_timeout: float | None = None,
+        llm_requests_per_minute: int | None = None,
+        llm_tokens_per_minute: int | None = None,
+        failure_cache_ttl: float | None = FAILURE_TTL,
+        memory_token_budget: int | None = DEFAULT_MEMORY_TOKEN_BUDGET,
+        stateless: bool = False,
+        warmup: bool = False,
+        warmup_questions: list[str] | None = None,
     ) -> None:
-        self._df = self._fetch_df(df)
+        self._metrics_collector = InMemoryCollector()
+        self._metrics = Metrics([self._metrics_collector, *(metrics_hooks or [])])
+        self._download_cache = self._create_download_cache(download_cache_dir)
+        # URL and file datasets are only downloaded and parsed once the LLM needs them
+        self._loader = self._create_loader(df)
+        self._df_source = df
         self._column_descriptions = self._fetch_column_descriptions(column_descriptions)
+        self._validate_out_of_core(out_of_core, prompt_token_budget)
+        self._out_of_core = out_of_core
+        if out_of_core and execution_workers:
+            raise ValueError("execution_workers can't be combined with out_of_core, DuckDB runs the queries.")
 
         self._llm_openai_api_token = llm_openai_api_token
         self._validate_model(llm_openai_model)
         self._llm_openai_model = llm_openai_model
+        self._llm_openai_base_url = llm_openai_base_url
+        self._llm_requests_per_minute = llm_requests_per_minute
+        self._llm_tokens_per_minute = llm_tokens_per_minute
         self._enable_cache = enable_cache
         self._verbose = verbose
+        self._fingerprint_mode = fingerprint_mode
+
+        # the block hashes of the data, so `update_df` only hashes what was appended
+        self._fingerprint: ChunkedFingerprint | None = None
+        with self._metrics.timer("data_hash"):
+            self._data_hash = self._generate_data_hash()
+        self._cache_root = cache_path
+        self._cache_similarity_threshold = cache_similarity_threshold
+        self._cache_max_entries = cache_max_entries
+        self._cache_ttl = cache_ttl
+        self._failure_cache_ttl = failure_cache_ttl
+        self._adopt_legacy_cache()
+        self._open_answer_caches()
+        # caches of the data before `update_df`, their code is replayed on the new data
+        self._previous_caches: deque[AnswerCache] = deque(maxlen=MAX_PREVIOUS_CACHES)
+        # one budget for the answer and code caches of every dataframe sharing `cache_path`
+        self._cache_registry = (
+            CacheRegistry(f"{cache_path}_registry", cache_max_bytes, on_event=self._record_cache_event)
+            if cache_max_bytes is not None
+            else None
+        )
+        # SQL code and DuckDB types don't fit dataframes loaded into memory, and vice versa
+        self._code_cache_prefix = f"{cache_path}_sql_schema" if out_of_core else f"{cache_path}_schema"
+        self._enable_code_cache = enable_code_cache
+        self._cache_stats: Counter = Counter()
+        self._cache_stats_lock = threading.Lock()
+
+        self._execution_workers = execution_workers
+        self._execution_cpu_time_limit = execution_cpu_time_limit
+        self._execution_memory_limit = execution_memory_limit
+        self._execution_timeout = execution_timeout
+
+        self._prompt_token_budget = prompt_token_budget
+        if memory_token_budget is not None and memory_token_budget <= 0:
+            raise ValueError("memory_token_budget must be positive, or None to send the whole conversation.")
+        self._memory_token_budget = memory_token_budget
+        self._stateless = stateless
+        self._max_concurrency = max_concurrency
+        self._agent_pool = AgentPool(self._create_agent)
+        self._inflight: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+        if warmup_questions and not warmup:
+            raise ValueError("warmup_questions are only precomputed with warmup=True.")
+        self._warmup = self._start_warmup(warmup_questions) if warmup else None
+
+    def _adopt_legacy_cache(self) -> None:
+        # Versions pickling the whole cache named it after another hash of the data. The pickle of this data is
+        # renamed once and converted by `AnswerCache`; the old hash is only computed while such pickles are left.
+        cache_path = f"{self._cache_root}_{self._data_hash}"
+        if not self._enable_cache or self._loader is not None or os.path.exists(cache_path):
+            return
+
+        legacy_paths = [
+            path
+            for path in glob.glob(f"{glob.escape(self._cache_root)}_*")
+            if _LEGACY_CACHE_SUFFIX.fullmatch(path[len(self._cache_root) :]) and is_legacy_pickle(path)
+        ]
+        if not legacy_paths:
+            return
+
+        legacy_path = f"{self._cache_root}_{legacy_data_hash(self._df)}"
+        if legacy_path in legacy_paths:
+            try:
+                os.replace(legacy_path, cache_path)
+            except FileNotFoundError:
+                # another instance on the same data renamed it first
+                pass
+
+    def _open_answer_caches(self) -> None:
+        self._cache_path = f"{self._cache_root}_{self._data_hash}"
+        self._cache = AnswerCache(
+            self._cache_path,
+            similarity_threshold=self._cache_similarity_threshold,
+            on_event=self._record_cache_event,
+            max_entries=self._cache_max_entries,
+            ttl=self._cache_ttl,
+        )
+        # charts of the answers are stored next to them, so they go with the cache when it's evicted
+        self._chart_store = ChartStore(f"{self._cache_path}_charts")
+        # questions failing on this data, they are answered with the failure until it expires. Failures are
+        # kept for the longest backoff, so one failing again soon after can still double it, then dropped on writes
+        self._failure_cache = (
+            AnswerCache(f"{self._cache_path}_failures", ttl=FAILURE_TTL_MAX)
+            if self._failure_cache_ttl is not None
+            else None
+        )
 
-        self._data_hash = self._generate_data_hash()
-        self._cache_path = f"{cache_path}_{self._data_hash}"
+    def _create_download_cache(self, download_cache_dir: str | None) -> "DownloadCache | None":
+        if not download_cache_dir:
+            return None
 
-        if os.path.exists(self._cache_path):
-            try:
-                with open(self._cache_path, "rb") as cache_file:
-                    self._cache = pickle.load(cache_file)
-            except (pickle.UnpicklingError, EOFError):
-                self._cache = {}
-        else:
-            self._cache = {}
+        from date_a_scientist.download_cache import DownloadCache
 
-    def _fetch_df(self, df: pd.DataFrame | str) -> pd.DataFrame:
-        if isinstance(df, str) and self._is_valid_url(df):
-            url, encoding, sep = self._retrieve_params_from_url(df)
+        return DownloadCache(download_cache_dir)
 
-            return pd.read_csv(url, encoding=encoding, sep=sep)
+    def _create_loader(self, df: pd.DataFrame | str) -> DatasetLoader | None:
+        if isinstance(df, str) and (self._is_valid_url(df) or is_local_dataset(df)):
+            return DatasetLoader(df, download_cache=self._download_cache)
 
         elif isinstance(df, str):
             raise ValueError("Please provide a valid URL to fetch the data.")
 
-        return df
+        return None
 
-    def _retrieve_params_from_url(self, url: str) -> tuple[str, str, str]:
-        parsed_url = urlparse(url)
-        query_params = parse_qs(parsed_url.query)
-
-        params_to_remove = ["sep", "encoding"]
-        encoding = query_params.get("encoding", [None])[0] or "utf-8"
-        sep = query_params.get("sep", [None])[0] or ","
-        for param in params_to_remove:
-            query_params.pop(param, None)
-
-        new_query_string = urlencode(query_params, doseq=True)
-
-        new_url = urlunparse(
-            (
-                parsed_url.scheme,
-                parsed_url.netloc,
-                parsed_url.path,
-                parsed_url.params,
-                new_query_string,
-                parsed_url.fragment,
-            )
-        )
+    @cached_property
+    def _df(self) -> pd.DataFrame:
+        with self._metrics.timer("data_load"):
+            return self._fetch_df(self._df_source)
+
+    @cached_property
+    def _dataset(self) -> "DuckDBDataset":
+        from date_a_scientist.duckdb_dataset import DuckDBDataset
+
+        return DuckDBDataset(self._loader)
 
-        return new_url, encoding, sep
+    def _fetch_df(self, df: pd.DataFrame | str) -> pd.DataFrame:
+        if self._loader is not None:
+            return self._loader.load()
+
+        return df
 
     def _fetch_column_descriptions(
         self, column_descriptions: dict[str, str] | str | None = None
@@ -145,7 +246,13 @@ class DateAScientist:
         if isinstance(column_descriptions, str) and self._is_valid_url(
             column_descriptions
         ):
-            return requests.get(column_descriptions).json()
+            from date_a_scientist.download_cache import DEFAULT_TIMEOUT, get_session, is_http_url
+
+            if self._download_cache is not None and is_http_url(column_descriptions):
+                with open(self._download_cache.fetch(column_descriptions)) as column_descriptions_file:
+                    return json.load(column_descriptions_file)
+
+            return get_session().get(column_descriptions, timeout=DEFAULT_TIMEOUT).json()
 
         elif isinstance(column_descriptions, str):
             raise ValueError(
@@ -155,6 +262,8 @@ class DateAScientist:
         return column_descriptions
 
     def _is_valid_url(self, url):
+        import validators
+
         return validators.url(url)
 
     def _validate_model(self, llm_openai_model: str) -> None:
@@ -163,38 +272,180 @@ class DateAScientist:
                 f"Invalid model: {llm_openai_model}. Allowed models: {self.ALLOWED_ML_MODELS}"
             )
 
-    def chat(self, q: str) -> Any:
-        answer = self._get_answer_from_cache_or_llm(q)
+    def _validate_out_of_core(self, out_of_core: bool, prompt_token_budget: int | None) -> None:
+        if not out_of_core:
+            return
 
-        result = answer["result"]
+        if self._loader is None:
+            raise ValueError("out_of_core needs a file or URL, a DataFrame is already in memory.")
 
-        pattern = r"/[^\s]+"
-        if isinstance(result, str) and "exports/charts" in result:
-            for row in result.split("\n"):
-                row = row.strip()
-                match = re.search(pattern, row)
-                if match:
-                    path = match.group()
+        if prompt_token_budget is None:
+            raise ValueError("out_of_core needs a prompt_token_budget, the LLM only gets the profile of the data.")
 
-                    try:
-                        from IPython.display import Image  # type: ignore[import]
+        from date_a_scientist.download_cache import is_http_url
 
-                        return Image(path)
+        # DuckDB reads a local copy, and without one the fingerprint could only come from loading the data
+        if not self._loader.is_local and (self._download_cache is None or not is_http_url(self._loader.url)):
+            raise ValueError("out_of_core needs a local file or an HTTP(S) URL with the download cache enabled.")
 
-                    except ImportError:
-                        return path
+        # checked here rather than on the first question, which would fail inside pandasai
+        if importlib.util.find_spec("duckdb") is None:
+            raise ImportError("out_of_core needs duckdb, install it with `pip install date-a-scientist[duckdb]`.")
 
-        else:
-            return result
+    def chat(self, q: str) -> Any:
+        with self._metrics.timer("chat"):
+            answer = self._get_answer_from_cache_or_llm(q)
+
+            return self._present_result(answer)
 
     def code(
         self, q: str, return_as_string: bool = False, dark_mode: bool = True
     ) -> Any:
-        answer = self._get_answer_from_cache_or_llm(q, allow_image_cache=True)
+        with self._metrics.timer("code"):
+            answer = self._get_answer_from_cache_or_llm(q, allow_image_cache=True)
+
+            return self._present_code(answer, return_as_string=return_as_string, dark_mode=dark_mode)
+
+    def chat_stream(self, q: str) -> Iterator[StreamChunk]:
+        # yields the generated code while the LLM writes it, the last chunk has the result
+        answer = self._get_answer_from_cache(q)
+        if answer is None:
+            answer = yield from self._stream_answer_from_llm(q)
+
+        yield StreamChunk(code=answer["code"], result=self._present_result(answer), final=True)
+
+    def code_stream(self, q: str) -> Iterator[str]:
+        answer = self._get_answer_from_cache(q, allow_image_cache=True)
+        if answer is None:
+            streamed = False
+            chunks = self._stream_answer_from_llm(q)
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as stop:
+                    answer = stop.value
+                    break
+                streamed = True
+                yield chunk.code
+            if streamed:
+                return
+
+        # cached answers and code replayed from the code cache never reach the LLM, so nothing was streamed
+        yield answer["code"]
+
+    async def achat(self, q: str, timeout: float | None = None) -> Any:
+        with self._metrics.timer("achat"):
+            answer = await self._aget_answer_from_cache_or_llm(q, timeout=timeout)
+
+            return self._present_result(answer)
+
+    async def acode(
+        self,
+        q: str,
+        return_as_string: bool = False,
+        dark_mode: bool = True,
+        timeout: float | None = None,
+    ) -> Any:
+        answer = await self._aget_answer_from_cache_or_llm(q, allow_image_cache=True, timeout=timeout)
+
+        return self._present_code(answer, return_as_string=return_as_string, dark_mode=dark_mode)
+
+    async def achat_many(
+        self,
+        questions: list[str],
+        timeout: float | None = None,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        return await asyncio.gather(
+            *(self.achat(q, timeout=timeout) for q in questions),
+            return_exceptions=return_exceptions,
+        )
+
+    def chat_batch(self, questions: list[str], max_workers: int | None = None) -> list[BatchAnswer]:
+        batch_answers: list[BatchAnswer | None] = [None] * len(questions)
+
+        start = time.perf_counter()
+        cached_answers = self._get_answers_from_cache(questions)
+        lookup_elapsed = (time.perf_counter() - start) / max(len(questions), 1)
+
+        pending: dict[str, list[int]] = {}
+        for i, q in enumerate(questions):
+            answer = cached_answers.get(q)
+            if answer is not None:
+                batch_answers[i] = BatchAnswer(
+                    q, self._present_result(answer), answer["code"], cached=True, elapsed=lookup_elapsed
+                )
+            else:
+                pending.setdefault(normalize_question(q), []).append(i)
+
+        if pending:
+            self._assure_llm_openai_api_token()
+
+            with ThreadPoolExecutor(
+                max_workers=max_workers or self._max_concurrency, thread_name_prefix="date_a_scientist_batch"
+            ) as executor:
+                futures = {
+                    executor.submit(self._answer_batch_question, questions[indices[0]]): indices
+                    for indices in pending.values()
+                }
+                for future, indices in futures.items():
+                    batch_answer = future.result()
+                    for i in indices:
+                        batch_answers[i] = BatchAnswer(
+                            questions[i],
+                            batch_answer.result,
+                            batch_answer.code,
+                            cached=False,
+                            elapsed=batch_answer.elapsed,
+                            error=batch_answer.error,
+                        )
+
+        return batch_answers
+
+    def _answer_batch_question(self, q: str) -> BatchAnswer:
+        start = time.perf_counter()
+        try:
+            answer = self._get_answer_from_pooled_llm(q)
+        except Exception as e:
+            return BatchAnswer(q, error=e, elapsed=time.perf_counter() - start)
+
+        return BatchAnswer(q, self._present_result(answer), answer["code"], elapsed=time.perf_counter() - start)
+
+    def _present_result(self, answer: dict[str, Any]) -> Any:
+        result = answer["result"]
+        if isinstance(result, ArrowResult):
+            # a big DataFrame read from the cache, only converted when it's returned
+            return result.to_pandas()
+
+        path = self._get_stored_chart_path(answer) or find_chart_path(result)
+        if path is None:
+            return result
+
+        with self._metrics.timer("chart_post_processing"):
+            try:
+                from IPython.display import Image  # type: ignore[import]
+
+                return Image(path)
+
+            except ImportError:
+                return path
+
+    def _get_stored_chart_path(self, answer: dict[str, Any]) -> str | None:
+        key = answer.get("chart")
+
+        return self._chart_store.get(key) if key else None
+
+    def _present_code(self, answer: dict[str, Any], return_as_string: bool, dark_mode: bool) -> Any:
         code = answer["code"]
+        if return_as_string:
+            return code
 
         try:
             from IPython.display import HTML  # type: ignore[import]
+            from pygments import highlight
+            from pygments.formatters import HtmlFormatter
+            from pygments.lexers import PythonLexer
+            from pygments.styles import get_style_by_name
 
             style = get_style_by_name("monokai") if dark_mode else None
             if style:
@@ -204,9 +455,6 @@ class DateAScientist:
 
             highlighted_code = highlight(code, PythonLexer(), formatter)
 
-            if return_as_string:
-                return code
-
             return HTML(
                 f'<style>{formatter.get_style_defs(".highlight")}</style>{highlighted_code}'
             )
@@ -216,32 +464,142 @@ class DateAScientist:
 
     @cached_property
     def _agent(self):
-        self._assure_llm_openai_api_token()
+        return self._create_agent()
+
+    @cached_property
+    def _executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self._max_concurrency, thread_name_prefix="date_a_scientist")
 
-        llm = _CustomOpenAI(
-            model=self._llm_openai_model, api_token=self._llm_openai_api_token
+    @cached_property
+    def _worker_pool(self) -> "WorkerPool | None":
+        if not self._execution_workers:
+            return None
+
+        from date_a_scientist.workers import WorkerPool
+
+        # shared by all agents, the workers map the data once from a file of the pool in `<cache_path>_workers`
+        return WorkerPool(
+            self._df,
+            f"{self._cache_root}_workers",
+            size=self._execution_workers,
+            cpu_time_limit=self._execution_cpu_time_limit,
+            memory_limit=self._execution_memory_limit,
+            timeout=self._execution_timeout,
         )
 
-        if self._column_descriptions:
-            connector = PandasConnector(
-                {"original_df": self._df}, field_descriptions=self._column_descriptions
-            )
-        else:
-            connector = PandasConnector({"original_df": self._df})
+    @cached_property
+    def _code_cache(self) -> AnswerCache | None:
+        if not self._enable_code_cache:
+            return None
+
+        # generated code only depends on the schema, so it can be replayed on other data with the same columns
+        schema = self._dataset.schema if self._out_of_core else self._df
+        return AnswerCache(
+            f"{self._code_cache_prefix}_{generate_schema_hash(schema)}",
+            max_entries=self._cache_max_entries,
+            ttl=self._cache_ttl,
+        )
+
+    @cached_property
+    def _profile(self) -> dict[str, Any]:
+        if not self._enable_cache:
+            return self._build_profile()
+
+        # built once per data hash, so new instances on the same data skip profiling
+        profile_cache = AnswerCache(self._profile_cache_path)
+        profile = profile_cache.get("profile")
+        if profile is None:
+            profile = self._build_profile()
+            profile_cache.set("profile", profile)
+        profile_cache.close()
+
+        return profile
+
+    @property
+    def _profile_cache_path(self) -> str:
+        return f"{self._cache_path}_{'sql_' if self._out_of_core else ''}profile"
+
+    def _build_profile(self) -> dict[str, Any]:
+        with self._metrics.timer("profile_build"):
+            # out of core, DuckDB aggregates the file instead of loading it
+            return self._dataset.build_profile() if self._out_of_core else build_profile(self._df)
+
+    def _create_agent(self) -> "Agent":
+        self._assure_llm_openai_api_token()
 
-        return Agent(
-            connector,
+        with self._metrics.timer("agent_build"):
+            return self._build_agent()
+
+    def _build_agent(self) -> "Agent":
+        from date_a_scientist.agent import Agent
+        from date_a_scientist.llm import CustomOpenAI
+
+        llm = CustomOpenAI(
+            model=self._llm_openai_model,
+            api_token=self._llm_openai_api_token,
+            # `None` keeps pandasai's default (`OPENAI_API_BASE` or api.openai.com)
+            api_base=self._llm_openai_base_url,
+            metrics=self._metrics,
+            requests_per_minute=self._llm_requests_per_minute,
+            tokens_per_minute=self._llm_tokens_per_minute,
+        )
+
+        agent = Agent(
+            self._create_connector(),
             config={
                 "llm": llm,
                 "enable_logging": False,
                 "open_charts": False,
                 "save_charts": False,
                 "enable_cache": False,  # cache is handled by DateAScientist
+                "direct_sql": self._out_of_core,
                 "save_logs": True,
                 "verbose": self._verbose,
             },
             memory_size=10,
         )
+        if self._memory_token_budget is not None:
+            from date_a_scientist.memory import TokenBudgetMemory
+
+            agent.context.memory = TokenBudgetMemory(
+                self._memory_token_budget,
+                agent_info=agent.context.memory.agent_info,
+                memory_size=agent.context.memory.size,
+                metrics=self._metrics,
+            )
+        if self._worker_pool is not None:
+            agent.use_worker_pool(self._worker_pool)
+
+        return agent
+
+    def _described_profile(self) -> dict[str, Any]:
+        return add_descriptions(self._profile, self._column_descriptions)
+
+    def _create_connector(self) -> Any:
+        from pandasai.connectors import PandasConnector  # type: ignore[import-untyped]
+
+        from date_a_scientist.connector import DuckDBConnector, ProfiledPandasConnector
+
+        # the profile is only built when a prompt needs it, `update_df` doesn't pay for it
+        if self._out_of_core:
+            # the LLM writes SQL that DuckDB runs on the file, only its result is loaded
+            return DuckDBConnector(
+                self._dataset,
+                profile=self._described_profile,
+                token_budget=self._prompt_token_budget,
+                field_descriptions=self._column_descriptions,
+            )
+        if self._prompt_token_budget is not None:
+            return ProfiledPandasConnector(
+                {"original_df": self._df},
+                profile=self._described_profile,
+                token_budget=self._prompt_token_budget,
+                field_descriptions=self._column_descriptions,
+            )
+        if self._column_descriptions:
+            return PandasConnector({"original_df": self._df}, field_descriptions=self._column_descriptions)
+
+        return PandasConnector({"original_df": self._df})
 
     def _query(self, q: str) -> str:
         q = self._fix_fake_malicious_query(q)
@@ -256,43 +614,407 @@ class DateAScientist:
         if not self._llm_openai_api_token:
             self._llm_openai_api_token = getpass("Please enter your OpenAI API token: ")
 
+    def _stream_answer_from_llm(self, q: str) -> Iterator[StreamChunk]:
+        self._assure_llm_openai_api_token()
+
+        done = object()
+        deltas: queue.Queue = queue.Queue()
+
+        def answer_with_streaming() -> dict[str, Any]:
+            from date_a_scientist.llm import stream_to
+
+            try:
+                with stream_to(deltas.put):
+                    return self._get_answer_from_llm(q, self._agent)
+            finally:
+                deltas.put(done)
+
+        future = self._executor.submit(answer_with_streaming)
+
+        code_stream = CodeStream()
+        while (delta := deltas.get()) is not done:
+            if delta is None:
+                # a response is complete; if its code fails, pandasai asks the LLM for a fixed version
+                if code := code_stream.close():
+                    yield StreamChunk(code=code)
+                code_stream = CodeStream()
+            elif code := code_stream.feed(delta):
+                yield StreamChunk(code=code)
+
+        return future.result()
+
     def _get_answer_from_cache_or_llm(self, q, allow_image_cache: bool = False):
-        answer = self._cache.get(q) or {}
+        answer = self._get_answer_from_cache(q, allow_image_cache=allow_image_cache)
+        if answer is None and self._warmup is not None:
+            answer = self._warmup.take_answer(q)
+        if answer is None:
+            answer = self._get_answer_from_llm(q, self._agent)
+
+        return answer
+
+    async def _aget_answer_from_cache_or_llm(
+        self, q: str, allow_image_cache: bool = False, timeout: float | None = None
+    ) -> dict[str, Any]:
+        answer = self._get_answer_from_cache(q, allow_image_cache=allow_image_cache)
+        if answer is not None:
+            return answer
+
+        # ask for the token here rather than in one of the worker threads
+        self._assure_llm_openai_api_token()
+
+        # identical questions asked concurrently share a single LLM call
+        loop = asyncio.get_running_loop()
+        key = (loop, normalize_question(q))
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.run_in_executor(self._executor, self._get_answer_from_pooled_llm, q)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shielded, so a caller timing out doesn't cancel the call other callers wait for
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _start_warmup(self, questions: list[str] | None) -> "Warmup":
+        from date_a_scientist.warmup import Warmup
+
+        # asking for the token on a background thread would block it unnoticed
+        if not self._llm_openai_api_token:
+            raise ValueError("warmup needs llm_openai_api_token.")
+
+        return Warmup(
+            lambda: self._agent,
+            self._precompute_answer,
+            questions,
+            max_workers=self._max_concurrency,
+            metrics=self._metrics,
+        ).start()
+
+    def _precompute_answer(self, q: str) -> dict[str, Any]:
+        answer = self._get_answer_from_cache(q)
+        if answer is None:
+            answer = self._get_answer_from_pooled_llm(q)
+
+        failure = answer.get("failure")
+        if failure is not None and not failure.is_cacheable:
+            # an outage while warming up is not the answer, the question is asked again when it comes
+            raise PrecomputeError(f"{failure.error_type}: {failure.message}")
+
+        return answer
+
+    def _get_answer_from_cache(self, q: str, allow_image_cache: bool = False) -> dict[str, Any] | None:
+        with self._metrics.timer("cache_lookup"):
+            cached_answer, cache_tier = self._cache.lookup(q) if self._enable_cache else (None, None)
+
+        answer = self._accept_cached_answer(cached_answer, cache_tier, allow_image_cache=allow_image_cache)
+        if answer is None:
+            answer = self._get_failure_from_cache(q)
+
+        return answer
+
+    def _get_answers_from_cache(self, questions: list[str]) -> dict[str, dict[str, Any]]:
+        with self._metrics.timer("cache_lookup"):
+            cached_answers = self._cache.lookup_many(questions) if self._enable_cache else {}
+
+        answers = {}
+        for q in questions:
+            cached_answer, cache_tier = cached_answers.get(q, (None, None))
+            answer = self._accept_cached_answer(cached_answer, cache_tier)
+            if answer is None:
+                answer = self._get_failure_from_cache(q)
+            if answer is not None:
+                answers[q] = answer
+
+        return answers
+
+    def _get_failure_from_cache(self, q: str) -> dict[str, Any] | None:
+        if self._failure_cache is None or not self._enable_cache:
+            return None
+
+        failure, _ = self._failure_cache.lookup(q)
+        if failure is None or time.time() >= failure["retry_at"]:
+            return None
+
+        self._record_cache_event("failure_hits")
+
+        return failure
+
+    def _accept_cached_answer(
+        self, cached_answer: dict[str, Any] | None, cache_tier: str | None, allow_image_cache: bool = False
+    ) -> dict[str, Any] | None:
+        answer = cached_answer or {}
         is_image_entry = isinstance(
             answer.get("result"), str
         ) and "exports/charts" in answer.get("result", "")
-        contains_error = isinstance(answer.get("result"), str) and (
-            "error code:" in answer.get("result", "").lower()
-            or "unfortunately" in answer.get("result", "").lower()
-        )
+        contains_error = answer.get("failure") is not None
+
+        # charts are only reused when a copy was stored, the original file is overwritten by the next chart
+        has_stored_chart = self._get_stored_chart_path(answer) is not None
 
         if (
-            (q not in self._cache)
+            (cached_answer is None)
             or (not self._enable_cache)
-            or (is_image_entry and not allow_image_cache)
+            or (is_image_entry and not has_stored_chart and not allow_image_cache)
             or contains_error
         ):
-            result = self._agent.chat(self._query(q))
-            answer = {"result": result, "code": self._agent.get_code_from_agent()}
+            self._record_cache_event("misses")
+            return None
 
-            if self._enable_cache and not (
-                isinstance(result, str)
-                and (
-                    "error code:" in result.lower() or "unfortunately" in result.lower()
-                )
-            ):
-                self._cache[q] = answer
-                with open(self._cache_path, "wb") as cache_file:
-                    pickle.dump(self._cache, cache_file)
+        self._record_cache_event(f"hits_{cache_tier}")
+        if self._cache_registry is not None:
+            self._cache_registry.mark_used(self._cache_path)
 
         return answer
 
+    def _get_answer_from_pooled_llm(self, q: str) -> dict[str, Any]:
+        with self._agent_pool.acquire() as agent:
+            # pooled agents answer independent questions, so they keep no conversation
+            agent.clear_memory()
+
+            return self._get_answer_from_llm(q, agent)
+
+    def _get_answer_from_llm(self, q: str, agent: "Agent") -> dict[str, Any]:
+        answer = self._get_answer_from_code_cache(q, agent)
+        if answer is None:
+            answer = self._get_answer_from_previous_caches(q, agent)
+        if answer is None:
+            from date_a_scientist.connector import ProfiledPandasConnector
+
+            if self._stateless:
+                # every question on its own, no earlier turns or code in the prompt
+                agent.clear_memory()
+            for connector in agent.context.dfs:
+                if isinstance(connector, ProfiledPandasConnector):
+                    connector.question = q
+
+            result = agent.chat(self._query(q))
+            answer = self._answer_from_agent(result, agent)
+            if agent.last_failure is not None:
+                answer["failure"] = agent.last_failure
+            for step, seconds in agent.last_step_timings().items():
+                self._metrics.timing(f"pipeline.{stage_name(step)}", seconds)
+
+            if self._code_cache is not None and agent.last_code_generated and agent.last_failure is None:
+                self._code_cache.set(q, {"code": agent.last_code_generated})
+                self._enforce_cache_budget(self._code_cache)
+
+        if not self._enable_cache:
+            return answer
+
+        failure = answer.get("failure")
+        if failure is None:
+            chart_path = find_chart_path(answer["result"])
+            chart_bytes = 0
+            if chart_path is not None:
+                answer["chart"] = self._chart_store.put(chart_path)
+                chart_bytes = self._chart_store.size_of(answer["chart"])
+            # max_entries or the ttl may drop the last answers showing a chart
+            self._chart_store.remove(self._cache.set(q, answer, external_bytes=chart_bytes))
+            self._enforce_cache_budget(self._cache)
+            self._metrics.gauge("cache.bytes", self._cache.size_bytes)
+            if self._failure_cache is not None:
+                self._failure_cache.delete(q)
+        elif failure.is_cacheable and self._failure_cache is not None:
+            self._remember_failure(self._failure_cache, q, answer)
+            self._enforce_cache_budget(self._failure_cache)
+
+        return answer
+
+    def _remember_failure(self, failure_cache: AnswerCache, q: str, answer: dict[str, Any]) -> None:
+        # failing again right after the last failure expired doubles the time until the next try
+        previous = failure_cache.get(q)
+        failures = previous["failures"] + 1 if previous is not None else 1
+        failure_cache.set(
+            q,
+            {
+                **answer,
+                "failures": failures,
+                "retry_at": time.time() + failure_ttl(failures, self._failure_cache_ttl),
+            },
+        )
+
+    def _get_answer_from_code_cache(self, q: str, agent: "Agent") -> dict[str, Any] | None:
+        if self._code_cache is None:
+            return None
+
+        cached_code, _ = self._code_cache.lookup(q)
+        if cached_code is None:
+            return None
+
+        try:
+            with self._metrics.timer("code_replay"):
+                result = agent.run_code(cached_code["code"], query=q)
+        except Exception:
+            # the data doesn't fit the cached code anymore, let the LLM write new code
+            return None
+
+        self._record_cache_event("code_replays")
+
+        return self._answer_from_agent(result, agent)
+
+    def _get_answer_from_previous_caches(self, q: str, agent: "Agent") -> dict[str, Any] | None:
+        # the code answering `q` before `update_df` answers it on the new data, unless the data no longer fits it
+        for cache in self._previous_caches:
+            cached_answer, _ = cache.lookup(q)
+            code = cached_answer.get("generated_code") if cached_answer is not None else None
+            if not code or cached_answer.get("failure") is not None:
+                continue
+
+            try:
+                with self._metrics.timer("code_replay"):
+                    result = agent.run_code(code, query=q)
+            except Exception:
+                continue
+
+            self._record_cache_event("carried_over")
+
+            return self._answer_from_agent(result, agent)
+
+        return None
+
+    def _answer_from_agent(self, result: Any, agent: "Agent") -> dict[str, Any]:
+        answer = {"result": result, "code": agent.get_code_from_agent()}
+        # `code` is cleaned up for reading, this one runs again after `update_df`
+        if agent.last_code_generated:
+            answer["generated_code"] = agent.last_code_generated
+
+        return answer
+
+    def _enforce_cache_budget(self, cache: AnswerCache) -> None:
+        if self._cache_registry is None:
+            return
+
+        # older caches of other dataframes go first, this one is only trimmed if it doesn't fit alone
+        available_bytes = self._cache_registry.update(cache.path, self._stored_bytes(cache))
+        if self._stored_bytes(cache) > available_bytes:
+            released = cache.trim(available_bytes)
+            if cache is self._cache:
+                self._chart_store.remove(released)
+            self._cache_registry.update(cache.path, self._stored_bytes(cache))
+
+    def _stored_bytes(self, cache: AnswerCache) -> int:
+        # the charts of the answers count towards the same budget
+        return cache.size_bytes + (self._chart_store.size_bytes if cache is self._cache else 0)
+
+    def _record_cache_event(self, event: str, value: int = 1) -> None:
+        with self._cache_stats_lock:
+            self._cache_stats[event] += value
+        self._metrics.increment(f"cache.{event}", value)
+
+    def wait_for_warmup(self, timeout: float | None = None) -> bool:
+        return self._warmup.wait(timeout) if self._warmup is not None else True
+
+    def cancel_warmup(self) -> None:
+        if self._warmup is not None:
+            self._warmup.cancel()
+
+    def update_df(self, df: pd.DataFrame) -> None:
+        # Replaces the data while keeping the agents, their conversation and, for the same columns, the answers:
+        # those are carried over by replaying their code on the new data when they're asked again. Meant for
+        # data that grows, with fingerprint_mode="chunked" an append only costs hashing the appended rows.
+        if self._out_of_core:
+            raise ValueError("update_df needs data in memory, out_of_core datasets are queried in their file.")
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("update_df takes a DataFrame.")
+
+        with self._metrics.timer("update_df"):
+            old_df = self._df
+            # a frame fingerprinted in another mode is hashed in blocks once, on its first update
+            fingerprint = self._fingerprint or chunked_fingerprint(old_df)
+            # with as many rows there's nothing appended to save work on, and only the whole frame shows an edit
+            appended = len(df) > fingerprint.rows and fingerprint.is_appended_by(
+                df, verify_all=self._fingerprint_mode == "full"
+            )
+            new_fingerprint = fingerprint.extend(df) if appended else chunked_fingerprint(df)
+            changed = new_fingerprint.root != fingerprint.root
+
+            if changed:
+                same_schema = generate_schema_hash(df) == generate_schema_hash(old_df)
+                if self._fingerprint_mode == "chunked":
+                    data_hash = new_fingerprint.root
+                else:
+                    data_hash = generate_data_hash(df, mode=self._fingerprint_mode)
+                self._replace_answer_caches(data_hash, carry_over=same_schema)
+
+                # min, max and top values of the new rows are unknown, the profile is built again when it's needed
+                self.__dict__.pop("_profile", None)
+                if not same_schema:
+                    code_cache = self.__dict__.pop("_code_cache", None)
+                    if code_cache is not None:
+                        code_cache.close()
+
+            # the agents and workers get the new frame even when its fingerprint missed an edit, so the code
+            # runs on the data the caller passed
+            self._fingerprint = new_fingerprint
+            self._df_source = df
+            self._loader = None
+            self.__dict__["_df"] = df
+            worker_pool = self.__dict__.pop("_worker_pool", None)
+            if worker_pool is not None:
+                worker_pool.close()
+
+            self._agent_pool.for_each(self._use_current_df)
+            if "_agent" in self.__dict__:
+                self._use_current_df(self._agent)
+
+        if changed:
+            self._metrics.increment("update_df.rows", len(df) - fingerprint.rows if appended else len(df))
+
+    def _replace_answer_caches(self, data_hash: str, carry_over: bool) -> None:
+        if carry_over and self._enable_cache:
+            if len(self._previous_caches) == self._previous_caches.maxlen:
+                self._previous_caches[-1].close()
+            self._previous_caches.appendleft(self._cache)
+        else:
+            self._cache.close()
+            for cache in self._previous_caches:
+                cache.close()
+            self._previous_caches.clear()
+        # failures were failures on the old data
+        if self._failure_cache is not None:
+            self._failure_cache.close()
+
+        self._data_hash = data_hash
+        self._open_answer_caches()
+
+    def _use_current_df(self, agent: "Agent") -> None:
+        # the same list pandasai's pipelines hold
+        agent.context.dfs[:] = [self._create_connector()]
+        if self._worker_pool is not None:
+            agent.use_worker_pool(self._worker_pool)
+
     def clean_cache(self):
-        self._cache = {}
-        if os.path.exists(self._cache_path):
-            os.remove(self._cache_path)
+        self._cache.clear()
+        self._chart_store.clear()
+        # nothing is carried over into a clean cache either
+        for cache in self._previous_caches:
+            cache.close()
+        self._previous_caches.clear()
+        if self._failure_cache is not None:
+            self._failure_cache.clear()
+        code_cache = self._get_loaded_code_cache()
+        if code_cache is not None:
+            code_cache.clear()
+        AnswerCache(self._profile_cache_path).clear()
+        if self._cache_registry is not None:
+            self._cache_registry.update(self._cache.path, 0)
+            if self._failure_cache is not None:
+                self._cache_registry.update(self._failure_cache.path, 0)
 
     def clean_all_cache(self):
+        self._cache.close()
+        if self._failure_cache is not None:
+            self._failure_cache.close()
+        self._chart_store.clear()
+        if self._cache_registry is not None:
+            self._cache_registry.close()
+        if "_dataset" in self.__dict__:
+            self._dataset.close()
+        if self.__dict__.get("_worker_pool") is not None:
+            self._worker_pool.close()
+        code_cache = self._get_loaded_code_cache()
+        if code_cache is not None:
+            code_cache.close()
+
         cache_dir = os.path.dirname(self._cache_path) or "."
         cache_prefix = os.path.basename(self._cache_path).split('_')[0]
 
@@ -301,19 +1023,55 @@ class DateAScientist:
                 file_path = os.path.join(cache_dir, filename)
                 if os.path.isfile(file_path):
                     os.remove(file_path)
+                elif filename.endswith(("_results", "_charts")) and os.path.isdir(file_path):
+                    shutil.rmtree(file_path, ignore_errors=True)
 
-    def get_cache(self) -> dict[str, Any]:
-        return self._cache
+    def get_cache(self, with_stats: bool = False) -> dict[str, Any]:
+        if with_stats:
+            return {"entries": self._cache.to_dict(), "stats": self._get_cache_stats()}
 
-    def _generate_data_hash(self) -> str:
-        df_hash = ""
-        if self._df is not None:
-            df_to_hash = (
-                self._df.sample(n=10_000, random_state=42)
-                if len(self._df) > 10_000
-                else self._df
-            )
-            df_bytes = df_to_hash.to_csv(index=False).encode()
-            df_hash = hashlib.md5(df_bytes).hexdigest()
+        return self._cache.to_dict()
+
+    def stats(self) -> dict[str, Any]:
+        summary = self._metrics_collector.summary()
+        summary["gauges"]["cache.bytes"] = self._cache.size_bytes
+
+        return summary
+
+    def _get_cache_stats(self) -> dict[str, int]:
+        with self._cache_stats_lock:
+            stats = {
+                "hits_exact": self._cache_stats["hits_exact"],
+                "hits_normalized": self._cache_stats["hits_normalized"],
+                "hits_similar": self._cache_stats["hits_similar"],
+                "misses": self._cache_stats["misses"],
+                "code_replays": self._cache_stats["code_replays"],
+                "failure_hits": self._cache_stats["failure_hits"],
+                "evictions": self._cache_stats["evictions"],
+            }
+        stats["hits"] = stats["hits_exact"] + stats["hits_normalized"] + stats["hits_similar"]
 
-        return df_hash
+        return stats
+
+    def _get_loaded_code_cache(self) -> AnswerCache | None:
+        # the code cache is keyed by the schema, so cleaning it must not trigger a download
+        if self._loader is not None and not self._out_of_core and "_df" not in self.__dict__:
+            return None
+
+        return self._code_cache
+
+    def _generate_data_hash(self) -> str:
+        if self._loader is not None:
+            # identifies the dataset by where it lives, its version and how it's parsed, so no parse is needed
+            fingerprint = self._loader.fingerprint
+            if fingerprint is not None:
+                return fingerprint
+            if self._out_of_core:
+                # the data is never loaded into pandas, the downloaded file is hashed instead
+                return self._loader.content_fingerprint()
+
+        if self._fingerprint_mode == "chunked":
+            self._fingerprint = chunked_fingerprint(self._df)
+            return self._fingerprint.root
+
+        return generate_data_hash(self._df, mode=self._fingerprint_mode)
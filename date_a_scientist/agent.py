@@ -1,10 +1,82 @@
 import re
-from typing import Any
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any
 
 from pandasai import Agent as PandasAIAgent  # type: ignore
+from pandasai.pipelines.chat.code_cleaning import CodeCleaning  # type: ignore
+from pandasai.pipelines.chat.code_execution import CodeExecution  # type: ignore
+from pandasai.pipelines.chat.result_parsing import ResultParsing  # type: ignore
+from pandasai.pipelines.chat.result_validation import ResultValidation  # type: ignore
+from pandasai.pipelines.pipeline import Pipeline  # type: ignore
+
+from date_a_scientist.failures import QUESTION, Failure, classify_exception
+
+if TYPE_CHECKING:
+    from date_a_scientist.workers import WorkerPool
+
+
+class PooledCodeExecution(CodeExecution):
+    # runs the code in a worker process of `worker_pool` instead of the calling one
+    def __init__(self, worker_pool: "WorkerPool | None" = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.worker_pool = worker_pool
+
+    def execute_code(self, code: str, context: Any) -> Any:
+        if self.worker_pool is None:
+            return super().execute_code(code, context)
+
+        return self.worker_pool.run(code, additional_dependencies=self._additional_dependencies)
+
+
+# pandasai answers every failure with a message starting like this instead of raising
+PANDASAI_ERROR_PREFIX = "Unfortunately, I was not able to"
 
 
 class Agent(PandasAIAgent):
+    worker_pool: "WorkerPool | None" = None
+    last_failure: Failure | None = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._last_exception: BaseException | None = None
+        for pipeline in [self.pipeline.code_generation_pipeline, self.pipeline.code_execution_pipeline]:
+            for step in pipeline._steps:
+                self._record_exceptions(step)
+
+    def _record_exceptions(self, step: Any) -> None:
+        # pandasai turns exceptions into an error message, the step keeps the exception for `last_failure`
+        execute = step.execute
+
+        def execute_and_record(*args, **kwargs) -> Any:
+            try:
+                return execute(*args, **kwargs)
+            except Exception as e:
+                self._last_exception = e
+                raise
+
+        step.execute = execute_and_record
+
+    def use_worker_pool(self, worker_pool: "WorkerPool") -> None:
+        self.worker_pool = worker_pool
+
+        steps = self.pipeline.code_execution_pipeline._steps
+        for i, step in enumerate(steps):
+            if isinstance(step, PooledCodeExecution):
+                # a new pool for new data, see `DateAScientist.update_df`
+                step.worker_pool = worker_pool
+            elif type(step) is CodeExecution:
+                steps[i] = PooledCodeExecution(
+                    worker_pool,
+                    before_execution=step.before_execution,
+                    on_failure=step.on_failure,
+                    on_retry=step.on_retry,
+                )
+                self._record_exceptions(steps[i])
+
+    def clear_memory(self) -> None:
+        super().clear_memory()
+        # pandasai adds the last generated code to the prompt as long as there's a conversation
+        self.context.add("last_code_generated", "")
 
     def get_code_from_agent(self):
         code = self.last_code_generated
@@ -40,7 +112,63 @@ class Agent(PandasAIAgent):
         return code.rstrip()
 
     def chat(self, query: str) -> Any:
-        return super().chat(self._query(query))
+        self._last_exception = None
+        result = super().chat(self._query(query))
+
+        self.last_failure = None
+        if self._last_exception is not None:
+            self.last_failure = classify_exception(self._last_exception)
+        elif isinstance(result, str) and result.startswith(PANDASAI_ERROR_PREFIX):
+            # raised before the pipeline ran, e.g. a query refused as malicious
+            self.last_failure = Failure(QUESTION, "Error", result)
+
+        return result
+
+    def last_step_timings(self) -> dict[str, float]:
+        # pandasai tracks how long every pipeline step of the last `chat` took
+        try:
+            steps = self.pipeline.query_exec_tracker.get_summary()["steps"]
+        except (AttributeError, RuntimeError):
+            return {}
+
+        timings: dict[str, float] = defaultdict(float)
+        for step in steps:
+            # failed attempts are tracked without a time
+            if step.get("execution_time") is not None:
+                timings[step["type"]] += step["execution_time"]
+
+        return dict(timings)
+
+    def run_code(self, code: str, query: str | None = None) -> Any:
+        # runs previously generated code through the same cleaning and sandboxed
+        # execution steps as `chat`, but never calls the LLM: without `on_retry`
+        # a failing execution raises instead of asking for a correction
+        self.assign_prompt_id()
+        self.context.reset_intermediate_values()
+        self.context.add_many({"output_type": None, "last_prompt_id": self.last_prompt_id})
+        if query is not None:
+            self.context.memory.add(self._query(query), True)
+
+        pipeline = Pipeline(
+            context=self.context,
+            logger=self.logger,
+            steps=[
+                CodeCleaning(),
+                PooledCodeExecution(self.worker_pool, before_execution=self._callbacks.before_code_execution),
+                ResultValidation(),
+                ResultParsing(before_execution=self._callbacks.on_result),
+            ],
+        )
+        try:
+            result = pipeline.run(code)
+        except Exception:
+            if query is not None:
+                self.context.memory.all().pop()
+            raise
+
+        self.last_code_generated = code
+
+        return result
 
     def _query(self, q: str) -> str:
         q = self._fix_fake_malicious_query(q)
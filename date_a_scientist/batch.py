@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class BatchAnswer:
+    question: str
+    result: Any = None
+    code: str = ""
+    cached: bool = False
+    elapsed: float = 0.0
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -0,0 +1,736 @@
+import glob
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from date_a_scientist.query_index import TfidfIndex, normalize_question
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_SQLITE_HEADER = b"SQLite format 3\x00"
+# how long a writer waits for another process holding the database lock
+BUSY_TIMEOUT = 30
+# last access times are only written when they are older than this (in seconds),
+# so repeated hits on the same answer don't turn every read into a write
+ACCESS_RESOLUTION = 60
+# SQLite's limit of host parameters per statement is 999 in older versions
+_MAX_PARAMETERS = 500
+# DataFrames taking more memory than this are stored as Arrow files next to the database
+RESULT_FILE_MIN_BYTES = 1024**2
+
+
+def is_legacy_pickle(path: str) -> bool:
+    # an empty file is a database another process has just started to create
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return False
+
+    with open(path, "rb") as cache_file:
+        return cache_file.read(len(_SQLITE_HEADER)) != _SQLITE_HEADER
+
+
+class ArrowResult:
+    # Stands in for a DataFrame stored in the `<path>_results` directory. Answers read from the cache hold it
+    # rather than the DataFrame, so lookups and `to_dict` don't touch the file: it is only mapped by `to_pandas`.
+    def __init__(self, name: str, path: str | None = None) -> None:
+        self.name = name
+        self.path = path
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the row only refers to the file by name, the directory is the cache's
+        return {"name": self.name}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.name = state["name"]
+        self.path = None
+
+    def __repr__(self) -> str:
+        return f"ArrowResult({self.name!r})"
+
+    def read_table(self) -> Any:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        if self.path is None:
+            raise ValueError(f"{self.name} wasn't read from a cache.")
+
+        # the file is mapped rather than read, the table's buffers point into the mapping
+        with pa.memory_map(self.path) as source:
+            return ipc.open_file(source).read_all()
+
+    def to_pandas(self) -> Any:
+        return self.read_table().to_pandas()
+
+
+# Every answer is its own row, so a cache miss costs a single insert and a lookup
+# reads just the requested key. The write-ahead log keeps the file consistent
+# if the process dies in the middle of a write, and lets several processes share
+# one file: nothing is kept in memory except the similarity index, which picks up
+# rows written by other processes on every similarity lookup.
+#
+# `max_entries` and `ttl` (seconds since an answer was written) are enforced on every
+# write; the least recently used answers go first.
+#
+# Big DataFrames aren't pickled into their row: they are written as Arrow IPC files the row
+# refers to, so rows stay small. Answers read back hold an `ArrowResult` for them, the file is
+# only mapped when its result is converted.
+class AnswerCache:
+    EXACT = "exact"
+    NORMALIZED = "normalized"
+    SIMILAR = "similar"
+
+    def __init__(
+        self,
+        path: str,
+        similarity_threshold: float | None = None,
+        on_event: Callable[[str, int], None] | None = None,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        result_file_min_bytes: int | None = RESULT_FILE_MIN_BYTES,
+    ) -> None:
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries has to be a positive number.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl has to be a positive number of seconds.")
+
+        self._path = path
+        self._similarity_threshold = similarity_threshold
+        self._on_event = on_event
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._result_file_min_bytes = result_file_min_bytes
+        self._results_dir = f"{path}_results"
+        self._similarity_index: TfidfIndex | None = None
+        self._indexed_rowid = 0
+        self._lock = threading.RLock()
+        self._connection: sqlite3.Connection | None = None
+
+        self._migrate_legacy_pickle()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def size_bytes(self) -> int:
+        size = sum(os.path.getsize(path) for path in self._files() if os.path.exists(path))
+        if os.path.isdir(self._results_dir):
+            size += sum(entry.stat().st_size for entry in os.scandir(self._results_dir) if entry.is_file())
+
+        return size
+
+    def get(self, q: str) -> dict[str, Any] | None:
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return None
+
+            row = connection.execute(
+                f"SELECT question, answer, accessed_at FROM answers WHERE question = ?{self._fresh_clause()}",
+                (q, *self._fresh_params()),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._touch(connection, [row])
+
+        return self._loads(row[1])
+
+    def lookup(self, q: str) -> tuple[dict[str, Any] | None, str | None]:
+        # cheapest tier first: exact key, then normalized text, then TF-IDF similarity
+        answer = self.get(q)
+        if answer is not None:
+            return answer, self.EXACT
+
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return None, None
+
+            row = connection.execute(
+                "SELECT question, answer, accessed_at FROM answers"
+                f" WHERE normalized = ?{self._fresh_clause()} ORDER BY rowid DESC LIMIT 1",
+                (normalize_question(q), *self._fresh_params()),
+            ).fetchone()
+            if row and (answer := self._loads(row[1])) is not None:
+                self._touch(connection, [row])
+                return answer, self.NORMALIZED
+
+            if self._similarity_threshold is None:
+                return None, None
+
+            similar_q, score = self._get_similarity_index().most_similar(q)
+
+        if similar_q is not None and score >= self._similarity_threshold:
+            answer = self.get(similar_q)
+            if answer is not None:
+                return answer, self.SIMILAR
+
+        return None, None
+
+    def lookup_many(self, questions: list[str]) -> dict[str, tuple[dict[str, Any], str]]:
+        found: dict[str, tuple[dict[str, Any], str]] = {}
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return found
+
+            unique_questions = list(dict.fromkeys(questions))
+            used = []
+            for q, _, blob, accessed_at in self._select_in(connection, "question", unique_questions):
+                if (answer := self._loads(blob)) is not None:
+                    found[q] = (answer, self.EXACT)
+                    used.append((q, blob, accessed_at))
+
+            normalized = {q: normalize_question(q) for q in unique_questions if q not in found}
+            by_normalized = {}
+            for normalized_q, q, blob, accessed_at in self._select_in(
+                connection, "normalized", list(set(normalized.values()))
+            ):
+                if (answer := self._loads(blob)) is not None:
+                    by_normalized[normalized_q] = answer
+                    used.append((q, blob, accessed_at))
+            for q, normalized_q in normalized.items():
+                if normalized_q in by_normalized:
+                    found[q] = (by_normalized[normalized_q], self.NORMALIZED)
+
+            self._touch(connection, used)
+
+        if self._similarity_threshold is not None:
+            for q in unique_questions:
+                if q not in found:
+                    answer, tier = self.lookup(q)
+                    if answer is not None:
+                        found[q] = (answer, tier)
+
+        return found
+
+    def set(self, q: str, answer: dict[str, Any], external_bytes: int = 0) -> frozenset[str]:
+        # `external_bytes` are files the answer refers to that the caller stores, e.g. its chart, `trim` counts them.
+        # Returns the charts no answer refers to any more once this one replaced or evicted others.
+        answer, result_files = self._store_results(answer)
+        blob = pickle.dumps(answer, protocol=pickle.HIGHEST_PROTOCOL)
+        result_bytes = external_bytes + sum(
+            os.path.getsize(os.path.join(self._results_dir, name)) for name in result_files
+        )
+        now = time.time()
+        with self._lock:
+            connection = self._connect(create=True)
+            replaced = connection.execute("SELECT result_files, chart FROM answers WHERE question = ?", (q,)).fetchall()
+            connection.execute(
+                "INSERT OR REPLACE INTO answers"
+                " (question, normalized, answer, created_at, accessed_at, result_files, result_bytes, chart)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    q,
+                    normalize_question(q),
+                    sqlite3.Binary(blob),
+                    now,
+                    now,
+                    ",".join(result_files) or None,
+                    result_bytes,
+                    answer.get("chart"),
+                ),
+            )
+            self._remove_result_files([(files,) for files, _ in replaced if files is not None])
+            if self._similarity_index is not None:
+                self._similarity_index.add(q, q)
+
+            released = self._evict(connection, now)
+            released |= self._unreferenced_charts(
+                connection, frozenset(chart for _, chart in replaced if chart is not None)
+            )
+
+        return released
+
+    def trim(self, max_bytes: int) -> frozenset[str]:
+        # drops the least recently used answers until the stored answers fit into `max_bytes`,
+        # returns the charts no answer refers to any more
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return frozenset()
+
+            rows = connection.execute(
+                "SELECT rowid, question, length(question) + length(answer) + coalesce(result_bytes, 0)"
+                " FROM answers ORDER BY accessed_at, rowid"
+            ).fetchall()
+            excess = sum(size for _, _, size in rows) - max_bytes
+            evicted = []
+            for rowid, q, size in rows:
+                if excess <= 0:
+                    break
+                evicted.append((rowid, q))
+                excess -= size
+
+            if not evicted:
+                return frozenset()
+
+            released = self._delete_rows(connection, evicted)
+            # give the freed pages back to the file system (databases created before
+            # incremental vacuuming was enabled keep their size and just reuse them)
+            connection.execute("PRAGMA incremental_vacuum").fetchall()
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        return released
+
+    def delete(self, q: str) -> None:
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is not None:
+                self._remove_result_files(
+                    connection.execute(
+                        "SELECT result_files FROM answers WHERE question = ? AND result_files IS NOT NULL", (q,)
+                    ).fetchall()
+                )
+                deleted = connection.execute("DELETE FROM answers WHERE question = ?", (q,)).rowcount
+                if deleted:
+                    self._emit("evictions", deleted)
+            if self._similarity_index is not None:
+                self._similarity_index.remove(q)
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return {}
+
+            rows = connection.execute(
+                f"SELECT question, answer FROM answers WHERE 1{self._fresh_clause()} ORDER BY rowid",
+                self._fresh_params(),
+            ).fetchall()
+
+        entries = {}
+        for q, blob in rows:
+            answer = self._loads(blob)
+            if answer is not None:
+                entries[q] = answer
+
+        return entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self.close()
+            self._similarity_index = None
+            self._indexed_rowid = 0
+            for path in self._files():
+                if os.path.exists(path):
+                    os.remove(path)
+            shutil.rmtree(self._results_dir, ignore_errors=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __contains__(self, q: str) -> bool:
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return False
+
+            row = connection.execute(
+                f"SELECT 1 FROM answers WHERE question = ?{self._fresh_clause()}", (q, *self._fresh_params())
+            ).fetchone()
+
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            connection = self._connect(create=False)
+            if connection is None:
+                return 0
+
+            return connection.execute(
+                f"SELECT COUNT(*) FROM answers WHERE 1{self._fresh_clause()}", self._fresh_params()
+            ).fetchone()[0]
+
+    def _connect(self, create: bool) -> sqlite3.Connection | None:
+        if self._connection is not None:
+            if os.path.exists(self._path):
+                return self._connection
+
+            # another process cleared the cache, don't keep using the deleted file
+            self.close()
+            self._similarity_index = None
+            self._indexed_rowid = 0
+
+        if not create and not os.path.exists(self._path):
+            return None
+
+        self._connection = self._open(self._path)
+
+        return self._connection
+
+    def _select_in(
+        self, connection: sqlite3.Connection, column: str, values: list[str]
+    ) -> list[tuple[str, str, bytes, float]]:
+        rows = []
+        for start in range(0, len(values), _MAX_PARAMETERS):
+            batch = values[start : start + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(batch))
+            rows += connection.execute(
+                f"SELECT {column}, question, answer, accessed_at FROM answers"
+                f" WHERE {column} IN ({placeholders}){self._fresh_clause()} ORDER BY rowid",
+                (*batch, *self._fresh_params()),
+            ).fetchall()
+
+        return rows
+
+    def _fresh_clause(self) -> str:
+        return " AND created_at >= ?" if self._ttl is not None else ""
+
+    def _fresh_params(self) -> tuple[float, ...]:
+        return (time.time() - self._ttl,) if self._ttl is not None else ()
+
+    @staticmethod
+    def _touch(connection: sqlite3.Connection, rows: list[tuple[str, Any, float | None]]) -> None:
+        now = time.time()
+        stale = [
+            (now, q) for q, _, accessed_at in rows if accessed_at is None or now - accessed_at >= ACCESS_RESOLUTION
+        ]
+        if stale:
+            connection.executemany("UPDATE answers SET accessed_at = ? WHERE question = ?", stale)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> frozenset[str]:
+        evicted = []
+        if self._ttl is not None:
+            evicted += connection.execute(
+                "SELECT rowid, question FROM answers WHERE created_at < ?", (now - self._ttl,)
+            ).fetchall()
+        if self._max_entries is not None:
+            evicted += connection.execute(
+                "SELECT rowid, question FROM answers ORDER BY accessed_at DESC, rowid DESC LIMIT -1 OFFSET ?",
+                (self._max_entries,),
+            ).fetchall()
+
+        return self._delete_rows(connection, list(dict(evicted).items())) if evicted else frozenset()
+
+    def _delete_rows(self, connection: sqlite3.Connection, rows: list[tuple[int, str]]) -> frozenset[str]:
+        deleted = 0
+        charts = set()
+        for start in range(0, len(rows), _MAX_PARAMETERS):
+            batch = [rowid for rowid, _ in rows[start : start + _MAX_PARAMETERS]]
+            placeholders = ", ".join("?" * len(batch))
+            files = connection.execute(
+                f"SELECT result_files, chart FROM answers WHERE rowid IN ({placeholders})", batch
+            ).fetchall()
+            self._remove_result_files([(result_files,) for result_files, _ in files if result_files is not None])
+            charts.update(chart for _, chart in files if chart is not None)
+            deleted += connection.execute(f"DELETE FROM answers WHERE rowid IN ({placeholders})", batch).rowcount
+
+        if self._similarity_index is not None:
+            for _, q in rows:
+                self._similarity_index.remove(q)
+        if deleted:
+            self._emit("evictions", deleted)
+
+        return self._unreferenced_charts(connection, frozenset(charts))
+
+    @staticmethod
+    def _unreferenced_charts(connection: sqlite3.Connection, charts: frozenset[str]) -> frozenset[str]:
+        # identical charts are stored once, so another answer may still show one of the deleted answers' charts
+        candidates = sorted(charts)
+        referenced = set()
+        for start in range(0, len(candidates), _MAX_PARAMETERS):
+            batch = candidates[start : start + _MAX_PARAMETERS]
+            referenced.update(
+                chart
+                for (chart,) in connection.execute(
+                    f"SELECT DISTINCT chart FROM answers WHERE chart IN ({', '.join('?' * len(batch))})", batch
+                )
+            )
+
+        return charts - referenced
+
+    def _get_similarity_index(self) -> TfidfIndex:
+        if self._similarity_index is None:
+            self._similarity_index = TfidfIndex()
+            self._indexed_rowid = 0
+
+        # `INSERT OR REPLACE` gives a row a new rowid, so this also picks up answers replaced elsewhere
+        for rowid, q in self._connection.execute(
+            "SELECT rowid, question FROM answers WHERE rowid > ? ORDER BY rowid", (self._indexed_rowid,)
+        ):
+            self._similarity_index.add(q, q)
+            self._indexed_rowid = rowid
+
+        return self._similarity_index
+
+    @staticmethod
+    def _open(path: str, journal_mode: str = "WAL") -> sqlite3.Connection:
+        # autocommit mode: every statement is its own durable transaction
+        connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        # only takes effect on new databases, lets `trim` shrink the file
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.execute(f"PRAGMA journal_mode={journal_mode}")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "question TEXT PRIMARY KEY, normalized TEXT, answer BLOB NOT NULL, created_at REAL, accessed_at REAL,"
+            " result_files TEXT, result_bytes INTEGER, chart TEXT)"
+        )
+
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(answers)")}
+        if "normalized" not in columns:
+            connection.execute("ALTER TABLE answers ADD COLUMN normalized TEXT")
+            connection.executemany(
+                "UPDATE answers SET normalized = ? WHERE question = ?",
+                [(normalize_question(q), q) for (q,) in connection.execute("SELECT question FROM answers").fetchall()],
+            )
+        if "created_at" not in columns:
+            # answers written before eviction existed count as written now
+            connection.execute("ALTER TABLE answers ADD COLUMN created_at REAL")
+            connection.execute("ALTER TABLE answers ADD COLUMN accessed_at REAL")
+            connection.execute("UPDATE answers SET created_at = ?, accessed_at = ?", (time.time(), time.time()))
+        if "result_files" not in columns:
+            connection.execute("ALTER TABLE answers ADD COLUMN result_files TEXT")
+            connection.execute("ALTER TABLE answers ADD COLUMN result_bytes INTEGER")
+        if "chart" not in columns:
+            # copied out of the pickled answers so evictions can tell which charts they released without loading them
+            connection.execute("ALTER TABLE answers ADD COLUMN chart TEXT")
+            for q, blob in connection.execute("SELECT question, answer FROM answers").fetchall():
+                try:
+                    chart = pickle.loads(blob).get("chart")
+                except Exception:
+                    continue
+                if chart is not None:
+                    connection.execute("UPDATE answers SET chart = ? WHERE question = ?", (chart, q))
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_normalized ON answers (normalized)")
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_created_at ON answers (created_at)")
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_accessed_at ON answers (accessed_at)")
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_chart ON answers (chart) WHERE chart IS NOT NULL")
+
+        return connection
+
+    def _emit(self, event: str, value: int = 1) -> None:
+        if self._on_event is not None:
+            self._on_event(event, value)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # SQLite locks the database itself; this advisory lock only guards replacing the file
+        if fcntl is None:
+            yield
+            return
+
+        with open(f"{self._path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _files(self) -> list[str]:
+        return [self._path, f"{self._path}-wal", f"{self._path}-shm"]
+
+    def _loads(self, blob: bytes) -> dict[str, Any] | None:
+        try:
+            answer = pickle.loads(blob)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+        if not isinstance(answer, dict):
+            return answer
+
+        for value in answer.values():
+            if isinstance(value, ArrowResult):
+                value.path = os.path.join(self._results_dir, value.name)
+                if not os.path.exists(value.path):
+                    # the file was removed by another process in the meantime
+                    return None
+
+        return answer
+
+    def _store_results(self, answer: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        if self._result_file_min_bytes is None:
+            return answer, []
+
+        import pandas as pd
+
+        stored = dict(answer)
+        result_files = []
+        for key, value in answer.items():
+            if isinstance(value, pd.DataFrame) and value.memory_usage(deep=True).sum() >= self._result_file_min_bytes:
+                name = self._write_result(value)
+                if name is not None:
+                    stored[key] = ArrowResult(name)
+                    result_files.append(name)
+
+        return stored, result_files
+
+    def _write_result(self, df: Any) -> str | None:
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc as ipc
+
+            table = pa.Table.from_pandas(df)
+        except Exception:
+            # pyarrow isn't installed or can't store the columns, the DataFrame is pickled into the row
+            return None
+
+        os.makedirs(self._results_dir, exist_ok=True)
+        name = f"{uuid.uuid4().hex}.arrow"
+        with tempfile.NamedTemporaryFile("wb", dir=self._results_dir, suffix=".tmp", delete=False) as tmp_file:
+            with ipc.new_file(tmp_file, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_file.name, os.path.join(self._results_dir, name))
+
+        return name
+
+    def _remove_result_files(self, rows: list[tuple[str]]) -> None:
+        for (result_files,) in rows:
+            for name in result_files.split(","):
+                try:
+                    os.remove(os.path.join(self._results_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def _migrate_legacy_pickle(self) -> None:
+        # older versions stored the whole cache as a single pickled dict under the same path
+        if not is_legacy_pickle(self._path):
+            return
+
+        with self._file_lock():
+            # another process may have migrated the file while we waited for the lock
+            if not is_legacy_pickle(self._path):
+                return
+
+            with open(self._path, "rb") as cache_file:
+                try:
+                    legacy_cache = pickle.load(cache_file)
+                except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                    legacy_cache = {}
+
+            if not isinstance(legacy_cache, dict):
+                legacy_cache = {}
+
+            # build the new store next to the old file and swap it in atomically
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._path) or ".", suffix=".migrating")
+            os.close(tmp_fd)
+            connection = self._open(tmp_path, journal_mode="DELETE")
+            now = time.time()
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT OR REPLACE INTO answers (question, normalized, answer, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        q,
+                        normalize_question(q),
+                        sqlite3.Binary(pickle.dumps(answer, protocol=pickle.HIGHEST_PROTOCOL)),
+                        now,
+                        now,
+                    )
+                    for q, answer in legacy_cache.items()
+                ],
+            )
+            connection.execute("COMMIT")
+            connection.close()
+
+            os.replace(tmp_path, self._path)
+
+
+# Size and last use of every cache file sharing a `cache_path` prefix, so keeping all of
+# them under one byte budget needs neither a directory scan nor opening the other caches.
+# When the budget is exceeded whole caches are dropped, least recently used first.
+class CacheRegistry:
+    def __init__(self, path: str, max_bytes: int, on_event: Callable[[str, int], None] | None = None) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes has to be a positive number.")
+
+        self._path = path
+        self._max_bytes = max_bytes
+        self._on_event = on_event
+        self._used_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def update(self, cache_path: str, size_bytes: int) -> int:
+        # records the new size and returns how many bytes `cache_path` may take
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO caches (path, size_bytes, used_at) VALUES (?, ?, ?)",
+                    (cache_path, size_bytes, now),
+                )
+                others = connection.execute(
+                    "SELECT path, size_bytes FROM caches WHERE path != ? ORDER BY used_at", (cache_path,)
+                ).fetchall()
+                excess = size_bytes + sum(size for _, size in others) - self._max_bytes
+                evicted = []
+                for path, size in others:
+                    if excess <= 0:
+                        break
+                    evicted.append(path)
+                    excess -= size
+                connection.executemany("DELETE FROM caches WHERE path = ?", [(path,) for path in evicted])
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self._used_at[cache_path] = now
+
+        for path in evicted:
+            self._remove_files(path)
+        if evicted and self._on_event is not None:
+            self._on_event("evicted_caches", len(evicted))
+
+        return size_bytes - excess
+
+    def mark_used(self, cache_path: str) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._used_at.get(cache_path, 0) < ACCESS_RESOLUTION:
+                return
+
+            self._connect().execute("UPDATE caches SET used_at = ? WHERE path = ?", (now, cache_path))
+            self._used_at[cache_path] = now
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS caches (path TEXT PRIMARY KEY, size_bytes INTEGER NOT NULL, used_at REAL)"
+            )
+            self._connection = connection
+
+        return self._connection
+
+    @staticmethod
+    def _remove_files(cache_path: str) -> None:
+        # the database with its -wal/-shm files and everything stored next to it, e.g. the profile
+        for path in glob.glob(f"{glob.escape(cache_path)}*"):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,79 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from typing import Any
+
+_CHART_PATH_PATTERN = re.compile(r"/[^\s]+")
+
+
+def find_chart_path(result: Any) -> str | None:
+    if not isinstance(result, str) or "exports/charts" not in result:
+        return None
+
+    for row in result.split("\n"):
+        match = _CHART_PATH_PATTERN.search(row.strip())
+        if match:
+            return match.group()
+
+    return None
+
+
+# pandasai keeps overwriting the same `exports/charts/temp_chart.png`, so a cached chart
+# answer can't just point at it. Charts are copied here under the hash of their content,
+# which also keeps identical charts of different questions only once.
+class ChartStore:
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def put(self, path: str) -> str | None:
+        try:
+            with open(path, "rb") as chart_file:
+                content = chart_file.read()
+        except OSError:
+            return None
+
+        key = f"{hashlib.sha256(content).hexdigest()}{os.path.splitext(path)[1] or '.png'}"
+        target = os.path.join(self._directory, key)
+        if not os.path.exists(target):
+            os.makedirs(self._directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile("wb", dir=self._directory, suffix=".tmp", delete=False) as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_file.name, target)
+
+        return key
+
+    @property
+    def size_bytes(self) -> int:
+        if not os.path.isdir(self._directory):
+            return 0
+
+        return sum(entry.stat().st_size for entry in os.scandir(self._directory) if entry.is_file())
+
+    def size_of(self, key: str | None) -> int:
+        path = self.get(key) if key else None
+
+        return os.path.getsize(path) if path else 0
+
+    def remove(self, keys: frozenset[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(os.path.join(self._directory, os.path.basename(key)))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> str | None:
+        path = os.path.join(self._directory, os.path.basename(key))
+
+        return path if os.path.isfile(path) else None
+
+    def clear(self) -> None:
+        for path in glob.glob(os.path.join(self._directory, "*")):
+            os.remove(path)
+        if os.path.isdir(self._directory):
+            os.rmdir(self._directory)
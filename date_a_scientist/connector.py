@@ -0,0 +1,98 @@
+from typing import Any, Callable
+
+import pandas as pd
+from pandasai.connectors import PandasConnector  # type: ignore[import-untyped]
+
+from date_a_scientist.duckdb_dataset import DuckDBDataset
+from date_a_scientist.profile import DEFAULT_TOKEN_BUDGET, render_profile
+
+
+class ProfiledPandasConnector(PandasConnector):
+    # Describes the dataframe in the prompt with a precomputed profile instead of raw head rows.
+    # `question` is set before every chat, so the columns relevant to it come first. The profile
+    # may be given as a function, it's then only built once a prompt needs it.
+    def __init__(
+        self,
+        config: Any,
+        profile: dict[str, Any] | Callable[[], dict[str, Any]],
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        **kwargs,
+    ) -> None:
+        super().__init__(config, **kwargs)
+        self._profile = profile
+        self.token_budget = token_budget
+        self.question: str | None = None
+
+    @property
+    def profile(self) -> dict[str, Any]:
+        if callable(self._profile):
+            self._profile = self._profile()
+
+        return self._profile
+
+    def to_string(
+        self,
+        index: int = 0,
+        is_direct_sql: bool = False,
+        serializer: Any = None,
+        enforce_privacy: bool = False,
+    ) -> str:
+        return render_profile(
+            self.profile, index=index, name=self.name, question=self.question, token_budget=self.token_budget
+        )
+
+
+class DuckDBConnector(ProfiledPandasConnector):
+    # Lets the LLM query a `DuckDBDataset` with `execute_sql_query` (pandasai's `direct_sql` mode).
+    # `dfs[0]` is only an empty frame with the schema, the data itself is never loaded.
+    def __init__(
+        self,
+        dataset: DuckDBDataset,
+        profile: dict[str, Any] | Callable[[], dict[str, Any]],
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            {"original_df": dataset.schema},
+            profile=profile,
+            token_budget=token_budget,
+            name=dataset.table_name,
+            **kwargs,
+        )
+        self.dataset = dataset
+        self.sql_enabled = True
+
+    @property
+    def rows_count(self) -> int:
+        return self.profile["rows"]
+
+    @property
+    def type(self) -> str:
+        return "duckdb"
+
+    def equals(self, other: Any) -> bool:
+        return isinstance(other, DuckDBConnector) and other.dataset is self.dataset
+
+    def enable_sql_query(self, table_name: str | None = None) -> None:
+        # the table is a view of the dataset already
+        self.sql_enabled = True
+
+    def execute_direct_sql_query(self, sql_query: str) -> pd.DataFrame:
+        # unlike `PandasConnector` the query isn't transpiled from MySQL, where "quoted" names are strings
+        return self.dataset.query(sql_query)
+
+    def to_string(
+        self,
+        index: int = 0,
+        is_direct_sql: bool = False,
+        serializer: Any = None,
+        enforce_privacy: bool = False,
+    ) -> str:
+        return render_profile(
+            self.profile,
+            index=index,
+            name=self.name,
+            question=self.question,
+            token_budget=self.token_budget,
+            is_table=True,
+        )
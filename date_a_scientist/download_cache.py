@@ -0,0 +1,178 @@
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+# requests is only imported once something is downloaded
+if TYPE_CHECKING:
+    import requests
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 60)
+DEFAULT_RETRIES = 3
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_session: "requests.Session | None" = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=DEFAULT_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "HEAD"],
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=16)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+
+        return _session
+
+
+def is_http_url(url: str) -> bool:
+    return urlparse(url).scheme in ["http", "https"]
+
+
+def hash_file(path: str) -> str:
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as body_file:
+        for chunk in iter(lambda: body_file.read(DOWNLOAD_CHUNK_SIZE), b""):
+            content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+def fetch_validators(url: str, timeout: tuple[float, float] = DEFAULT_TIMEOUT) -> list[str] | None:
+    # ETag / Last-Modified of the URL, asked with a HEAD request, None when the server doesn't send them
+    import requests
+
+    try:
+        response = get_session().head(url, timeout=timeout, allow_redirects=True)
+    except requests.RequestException:
+        return None
+
+    validators = [response.headers.get("ETag"), response.headers.get("Last-Modified")]
+    if not response.ok or not any(validators):
+        return None
+
+    return validators
+
+
+class DownloadCache:
+    # Keeps one copy of every downloaded URL together with its ETag / Last-Modified,
+    # so later downloads are conditional GETs that usually end with `304 Not Modified`.
+    def __init__(self, directory: str, timeout: tuple[float, float] = DEFAULT_TIMEOUT) -> None:
+        self.directory = directory
+        self.timeout = timeout
+
+    def fetch(self, url: str) -> str:
+        import requests
+
+        body_path = self._body_path(url)
+        metadata = self._read_metadata(url) if os.path.exists(body_path) else {}
+
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+        try:
+            response = get_session().get(url, headers=headers, timeout=self.timeout, stream=True)
+        except requests.RequestException:
+            # an unreachable server shouldn't break datasets that were already downloaded
+            if metadata:
+                return body_path
+            raise
+
+        with response:
+            if response.status_code == 304 and metadata:
+                return body_path
+
+            response.raise_for_status()
+            self._store(url, response)
+
+        return body_path
+
+    def version(self, url: str) -> str:
+        # the content hash of the current body, revalidated with the server first
+        body_path = self.fetch(url)
+        content_hash = self._read_metadata(url).get("sha256")
+        if content_hash:
+            return content_hash
+
+        # downloaded before the hash was kept
+        return hash_file(body_path)
+
+    def converted_path(self, url: str, options: str) -> str | None:
+        if importlib.util.find_spec("pyarrow") is None:
+            return None
+
+        options_hash = hashlib.sha256(options.encode()).hexdigest()[:16]
+
+        return os.path.join(self.directory, f"{self._key(url)}.{options_hash}.parquet")
+
+    def clear(self) -> None:
+        for path in glob.glob(os.path.join(self.directory, "*")):
+            os.remove(path)
+
+    def _store(self, url: str, response: "requests.Response") -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        # written next to the target and renamed, so readers never see a half downloaded file
+        content_hash = hashlib.sha256()
+        with tempfile.NamedTemporaryFile("wb", dir=self.directory, delete=False) as tmp_file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                tmp_file.write(chunk)
+                content_hash.update(chunk)
+        os.replace(tmp_file.name, self._body_path(url))
+
+        # conversions of the previous body are stale now
+        for path in glob.glob(os.path.join(self.directory, f"{self._key(url)}.*.parquet")):
+            os.remove(path)
+
+        metadata = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "sha256": content_hash.hexdigest(),
+        }
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, delete=False) as tmp_file:
+            json.dump(metadata, tmp_file)
+        os.replace(tmp_file.name, self._metadata_path(url))
+
+    def _read_metadata(self, url: str) -> dict[str, str | None]:
+        try:
+            with open(self._metadata_path(url)) as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _body_path(self, url: str) -> str:
+        # the original file name is kept, so pandas still infers the compression from the extension
+        filename = os.path.basename(urlparse(url).path) or "body"
+
+        return os.path.join(self.directory, f"{self._key(url)}_{filename}")
+
+    def _metadata_path(self, url: str) -> str:
+        return os.path.join(self.directory, f"{self._key(url)}.json")
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()[:32]
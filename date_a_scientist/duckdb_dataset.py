@@ -0,0 +1,103 @@
+import os
+import re
+import threading
+from typing import Any
+
+import pandas as pd
+
+from date_a_scientist.loader import DatasetLoader
+from date_a_scientist.profile import TOP_K, build_sql_profile, quote_identifier
+
+DEFAULT_MEMORY_LIMIT = "1GB"
+DEFAULT_TABLE_NAME = "dataset"
+
+
+class DuckDBDataset:
+    # Keeps a file dataset on disk and answers SQL queries on it with DuckDB. DuckDB streams
+    # the file and spills to disk above `memory_limit`, so only query results end up in memory.
+    def __init__(self, loader: DatasetLoader, memory_limit: str | None = DEFAULT_MEMORY_LIMIT) -> None:
+        if loader.dtype or loader.downcast:
+            raise ValueError("dtype and downcast hints are not supported out of core, cast in the query instead.")
+
+        self.loader = loader
+        self.memory_limit = memory_limit
+        self.table_name = table_name_for(loader.path or loader.url or "")
+        self._connection: Any = None
+        self._source: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def schema(self) -> pd.DataFrame:
+        # an empty frame with the columns and dtypes of the table
+        return self.query(f"SELECT * FROM {quote_identifier(self.table_name)} LIMIT 0")
+
+    def query(self, sql: str) -> pd.DataFrame:
+        # a cursor per query, DuckDB connections must not be shared between threads
+        with self._cursor() as cursor:
+            return cursor.sql(sql).df()
+
+    def build_profile(self, top_k: int = TOP_K) -> dict[str, Any]:
+        with self._cursor() as cursor:
+            return build_sql_profile(cursor, self.table_name, top_k=top_k)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _cursor(self) -> Any:
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            cursor = self._connection.cursor()
+
+        if self._source is not None:
+            # Arrow datasets are registered per connection rather than in the catalog
+            cursor.register(f"{self.table_name}_source", self._source)
+
+        return cursor
+
+    def _connect(self) -> Any:
+        import duckdb
+
+        config = {"memory_limit": self.memory_limit} if self.memory_limit else {}
+        connection = duckdb.connect(config=config)
+
+        path = self.loader.fetch()
+        columns = ", ".join(quote_identifier(column) for column in self.loader.usecols or []) or "*"
+        source_sql = self._read_sql(path)
+        if self._source is not None:
+            connection.register(f"{self.table_name}_source", self._source)
+        connection.execute(f"CREATE VIEW {quote_identifier(self.table_name)} AS SELECT {columns} FROM {source_sql}")
+
+        return connection
+
+    def _read_sql(self, path: str) -> str:
+        if self.loader.format == "parquet":
+            return f"read_parquet({_quote_literal(path)})"
+
+        if self.loader.format == "feather":
+            import pyarrow.dataset  # type: ignore[import-untyped]
+
+            self._source = pyarrow.dataset.dataset(path, format="feather")
+            return quote_identifier(f"{self.table_name}_source")
+
+        options = [f"delim = {_quote_literal(self.loader.sep)}", "header = true"]
+        if self.loader.encoding.lower().replace("_", "-") not in ["utf-8", "utf8"]:
+            options.append(f"encoding = {_quote_literal(self.loader.encoding)}")
+
+        return f"read_csv({_quote_literal(path)}, {', '.join(options)})"
+
+
+def table_name_for(path: str) -> str:
+    # the name the LLM uses in its queries, e.g. `events` for `data/events.parquet`
+    name = re.sub(r"\W+", "_", os.path.splitext(os.path.basename(path.split("?")[0]))[0]).strip("_").lower()
+    if not name:
+        return DEFAULT_TABLE_NAME
+
+    return f"t_{name}" if name[0].isdigit() else name
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
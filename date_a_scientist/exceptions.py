@@ -5,3 +5,7 @@ class BaseException(Exception):
 
 class ModelNotFoundError(BaseException):
     pass
+
+
+class PrecomputeError(BaseException):
+    pass
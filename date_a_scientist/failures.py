@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+
+from date_a_scientist.exceptions import ModelNotFoundError
+
+# rate limits, timeouts and outages of the LLM, asking again may well work
+TRANSIENT = "transient"
+# a wrong API token or model, nothing to wait for but nothing the question can be blamed for either
+CONFIGURATION = "configuration"
+# the question can't be answered on this data (the code keeps failing), asking again fails again
+QUESTION = "question"
+
+FAILURE_TTL = 60.0
+FAILURE_TTL_MAX = 24 * 3600.0
+
+
+@dataclass(frozen=True)
+class Failure:
+    kind: str
+    error_type: str
+    message: str
+
+    @property
+    def is_cacheable(self) -> bool:
+        return self.kind == QUESTION
+
+
+def classify_exception(exception: BaseException) -> Failure:
+    import openai  # type: ignore[import]
+
+    if isinstance(exception, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        kind = TRANSIENT
+    elif isinstance(
+        exception,
+        (openai.AuthenticationError, openai.PermissionDeniedError, openai.NotFoundError, ModelNotFoundError),
+    ):
+        kind = CONFIGURATION
+    else:
+        kind = QUESTION
+
+    return Failure(kind, type(exception).__name__, str(exception))
+
+
+def failure_ttl(failures: int, ttl: float, max_ttl: float = FAILURE_TTL_MAX) -> float:
+    # every failure in a row doubles the time until the question is tried again
+    return min(max_ttl, ttl * 2 ** (failures - 1))
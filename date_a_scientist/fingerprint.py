@@ -0,0 +1,135 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+FINGERPRINT_MODES = ["full", "sample", "chunked"]
+DEFAULT_CHUNK_SIZE = 1_000_000
+SAMPLE_SIZE = 10_000
+BLOCK_SIZE = 8_192
+
+
+@dataclass(frozen=True)
+class ChunkedFingerprint:
+    # A hash per block of `block_size` rows and a root hash over all of them (a one-level Merkle tree). Appending
+    # rows only changes the last block and adds new ones, so extending the fingerprint hashes the new rows plus at
+    # most one block, whatever the length of the frame.
+    schema: str
+    rows: int
+    block_size: int
+    blocks: tuple[bytes, ...] = ()
+
+    @property
+    def root(self) -> str:
+        digest = hashlib.sha256(f"{self.schema}:{self.rows}:{self.block_size}".encode())
+        for block in self.blocks:
+            digest.update(block)
+
+        return digest.hexdigest()[:32]
+
+    def is_appended_by(self, df: pd.DataFrame, verify_all: bool = False) -> bool:
+        # `df` has the same columns and starts with the rows fingerprinted here. Only the last block, where the
+        # new rows begin, is compared unless `verify_all`: edits further up go unnoticed, like in "sample" mode.
+        if generate_schema_hash(df) != self.schema or len(df) < self.rows:
+            return False
+
+        positions = range(len(self.blocks)) if verify_all else range(len(self.blocks))[-1:]
+        for position in positions:
+            start = position * self.block_size
+            end = min(start + self.block_size, self.rows)
+            if _hash_block(df.iloc[start:end]) != self.blocks[position]:
+                return False
+
+        return True
+
+    def extend(self, df: pd.DataFrame) -> "ChunkedFingerprint":
+        # the fingerprint of `df`, which must start with the rows fingerprinted here (see `is_appended_by`)
+        full_blocks = self.rows // self.block_size
+        blocks = list(self.blocks[:full_blocks])
+        for start in range(full_blocks * self.block_size, len(df), self.block_size):
+            blocks.append(_hash_block(df.iloc[start : start + self.block_size]))
+
+        return ChunkedFingerprint(generate_schema_hash(df), len(df), self.block_size, tuple(blocks))
+
+
+def chunked_fingerprint(df: pd.DataFrame, block_size: int = BLOCK_SIZE) -> ChunkedFingerprint:
+    return ChunkedFingerprint(generate_schema_hash(df), 0, block_size).extend(df)
+
+
+def generate_data_hash(
+    df: pd.DataFrame | None,
+    mode: str = "sample",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    if df is None:
+        return ""
+
+    if mode not in FINGERPRINT_MODES:
+        raise ValueError(f"Invalid fingerprint mode: {mode}. Allowed modes: {FINGERPRINT_MODES}")
+
+    if mode == "chunked":
+        return chunked_fingerprint(df).root
+
+    if mode == "sample" and len(df) > SAMPLE_SIZE:
+        df = df.sample(n=SAMPLE_SIZE, random_state=42)
+
+    # one running digest per column keeps the result independent of `chunk_size`
+    column_digests = [hashlib.sha256() for _ in range(df.shape[1])]
+    for position, column_hashes in iter_column_hashes(df, chunk_size=chunk_size):
+        column_digests[position].update(column_hashes.tobytes())
+
+    digest = hashlib.sha256(_schema_bytes(df))
+    for column_digest in column_digests:
+        digest.update(column_digest.digest())
+
+    return digest.hexdigest()[:32]
+
+
+def legacy_data_hash(df: pd.DataFrame) -> str:
+    # the MD5 of the sampled frame's CSV, which versions pickling the whole cache named it after
+    if len(df) > SAMPLE_SIZE:
+        df = df.sample(n=SAMPLE_SIZE, random_state=42)
+
+    return hashlib.md5(df.to_csv(index=False).encode()).hexdigest()
+
+
+def generate_schema_hash(df: pd.DataFrame | None) -> str:
+    if df is None:
+        return ""
+
+    schema = [(str(name), str(dtype)) for name, dtype in df.dtypes.items()]
+
+    return hashlib.sha256(repr(schema).encode()).hexdigest()[:32]
+
+
+def iter_column_hashes(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[int, np.ndarray]]:
+    # only one chunk of one column is hashed at a time, so memory stays
+    # bounded by `chunk_size` no matter how long the frame is
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start : start + chunk_size]
+        for position in range(chunk.shape[1]):
+            yield position, _hash_column(chunk.iloc[:, position])
+
+
+def _hash_block(block: pd.DataFrame) -> bytes:
+    digest = hashlib.sha256()
+    for position in range(block.shape[1]):
+        digest.update(_hash_column(block.iloc[:, position]).tobytes())
+
+    return digest.digest()
+
+
+def _hash_column(column: pd.Series) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(column, index=False).to_numpy()
+    except TypeError:
+        # unhashable cells (lists, dicts, ...) fall back to their text form
+        return pd.util.hash_pandas_object(column.astype(str), index=False).to_numpy()
+
+
+def _schema_bytes(df: pd.DataFrame) -> bytes:
+    schema = [(str(name), str(dtype)) for name, dtype in df.dtypes.items()]
+
+    return repr((df.shape, schema)).encode()
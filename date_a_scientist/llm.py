@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+import httpx
+import openai  # type: ignore[import]
+from openai import NotFoundError as OpenAINotFoundError  # type: ignore[import]
+from pandasai.helpers.openai_info import OpenAICallbackHandler, openai_callback_var  # type: ignore[import-untyped]
+from pandasai.llm import OpenAI  # type: ignore[import-untyped]
+
+from date_a_scientist.exceptions import ModelNotFoundError
+from date_a_scientist.metrics import Metrics
+from date_a_scientist.ratelimit import estimate_tokens, find_rate_limiter, get_rate_limiter
+
+# receives the text of a streamed response as it arrives and `None` once the response is complete
+StreamHandler = Callable[[str | None], None]
+
+_stream_handler_var: ContextVar[StreamHandler | None] = ContextVar("date_a_scientist_stream_handler", default=None)
+
+
+# One OpenAI client per (token, base URL) for the whole process. All of them share one
+# HTTP client, so every `DateAScientist` reuses the same keep-alive connections instead
+# of opening (and TLS-handshaking) its own, and building an agent doesn't create an SSL
+# context. The model is a parameter of each request, so it's not part of the key.
+# Failed requests aren't retried by the clients, the rate limiter retries them instead.
+_clients: dict[tuple[str, str], openai.OpenAI] = {}
+_http_client: openai.DefaultHttpxClient | None = None
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(api_token: str, base_url: str) -> openai.OpenAI:
+    with _clients_lock:
+        client = _clients.get((api_token, base_url))
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_token, base_url=base_url, http_client=_get_http_client(), max_retries=0
+            )
+            _clients[(api_token, base_url)] = client
+
+        return client
+
+
+def get_http_client() -> openai.DefaultHttpxClient:
+    with _clients_lock:
+        return _get_http_client()
+
+
+def _get_http_client() -> openai.DefaultHttpxClient:
+    global _http_client
+
+    if _http_client is None:
+        _http_client = openai.DefaultHttpxClient(event_hooks={"response": [_update_rate_limiter]})
+
+    return _http_client
+
+
+def _update_rate_limiter(response: httpx.Response) -> None:
+    # every response, of any instance, tells how much of the account's limits is left
+    headers = response.headers
+    if "x-ratelimit-remaining-requests" not in headers and "x-ratelimit-remaining-tokens" not in headers:
+        return
+
+    request = response.request
+    try:
+        model = json.loads(request.content)["model"]
+    except (ValueError, KeyError, TypeError, httpx.RequestNotRead):
+        return
+
+    api_token = request.headers.get("authorization", "").removeprefix("Bearer ")
+    limiter = find_rate_limiter(api_token, request.url.netloc.decode(), model)
+    if limiter is not None:
+        limiter.update(headers)
+
+
+def clear_openai_clients() -> None:
+    global _http_client
+
+    with _clients_lock:
+        # connections of a forked parent can't be shared with it, so they are only dropped, not closed
+        _clients.clear()
+        _http_client = None
+
+
+os.register_at_fork(after_in_child=clear_openai_clients)
+
+
+@contextmanager
+def stream_to(handler: StreamHandler) -> Iterator[None]:
+    # chat completions requested in this context are streamed to `handler`
+    token = _stream_handler_var.set(handler)
+    try:
+        yield
+    finally:
+        _stream_handler_var.reset(token)
+
+
+class CustomOpenAI(OpenAI):
+    def __init__(
+        self,
+        *args,
+        metrics: Metrics | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        **kwargs,
+    ) -> None:
+        # pandasai still builds a client of its own, on the shared connections that's cheap
+        self.http_client = get_http_client()
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+        client = get_openai_client(self.api_token, self.api_base)
+        self.client = client.chat.completions if self._is_chat_model else client.completions
+        # shared by all instances using the same account and model, the limits are learned from the responses
+        self.rate_limiter = get_rate_limiter(self.api_token, client.base_url.netloc.decode(), self.model)
+        self.rate_limiter.configure(requests_per_minute, tokens_per_minute)
+
+    def completion(self, *args, **kwargs) -> str:
+        try:
+            text = self._call_scheduled(super().completion, *args, **kwargs)
+        except OpenAINotFoundError as e:
+            if "does not exist or you do not have access to it" in str(e):
+                raise ModelNotFoundError(
+                    "Sorry, I cannot answer this question. Please check if you've enabled paid tier in OpenAI."
+                )
+            else:
+                raise e
+
+        text = self._add_plt_close(text)
+
+        return text
+
+    def chat_completion(self, *args, **kwargs) -> str:
+        stream_handler = _stream_handler_var.get()
+        call = super().chat_completion if stream_handler is None else self._stream_chat_completion
+        try:
+            content = self._call_scheduled(call, *args, **kwargs)
+        except OpenAINotFoundError as e:
+            if "does not exist or you do not have access to it" in str(e):
+                raise ModelNotFoundError(
+                    "Sorry, I cannot answer this question. Please check if you've enabled paid tier in OpenAI."
+                )
+            else:
+                raise e
+
+        content = self._add_plt_close(content)
+
+        return content
+
+    def _stream_chat_completion(self, value: str, memory=None) -> str:
+        # same request as pandasai's `chat_completion`, but the text is handed on as it arrives
+        stream_handler = _stream_handler_var.get()
+        messages = memory.to_openai_messages() if memory else []
+        messages.append({"role": "user", "content": value})
+
+        params = {
+            **self._invocation_params,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if self.stop is not None:
+            params["stop"] = [self.stop]
+
+        content = []
+        try:
+            for chunk in self.client.create(**params):
+                # the last chunk carries no text, only the token usage
+                if chunk.usage is not None and (openai_handler := openai_callback_var.get()):
+                    openai_handler(chunk)
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        content.append(choice.delta.content)
+                        stream_handler(choice.delta.content)
+        finally:
+            stream_handler(None)
+
+        return "".join(content)
+
+    def _call_scheduled(self, call, value: str, memory=None) -> str:
+        # waits for room in the account's limits, and retries once there is after a 429
+        texts = [str(value)]
+        if memory:
+            texts += [message["content"] for message in memory.to_openai_messages()]
+
+        return self.rate_limiter.call(
+            lambda: self._call_with_usage(call, value, memory),
+            estimate_tokens(texts, self.max_tokens),
+            metrics=self.metrics,
+        )
+
+    def _call_with_usage(self, call, *args, **kwargs) -> str:
+        if self.metrics is None:
+            return call(*args, **kwargs)
+
+        # pandasai hands every response to the handler in `openai_callback_var`,
+        # an outer `get_openai_callback()` still gets it
+        outer_handler = openai_callback_var.get()
+        usage = OpenAICallbackHandler()
+
+        def handler(response) -> None:
+            usage(response)
+            if outer_handler is not None:
+                outer_handler(response)
+
+        token = openai_callback_var.set(handler)
+        try:
+            with self.metrics.timer("llm"):
+                return call(*args, **kwargs)
+        finally:
+            openai_callback_var.reset(token)
+            self.metrics.increment("llm.calls")
+            self.metrics.increment("llm.prompt_tokens", usage.prompt_tokens)
+            self.metrics.increment("llm.completion_tokens", usage.completion_tokens)
+
+    def _add_plt_close(self, text: str) -> str:
+        if "plt.savefig" in text:
+            lines = text.split("\n")
+            for i, line in enumerate(lines):
+                if line.startswith("plt.savefig"):
+                    lines.insert(i + 1, "plt.close() # HACK")
+
+            return "\n".join(lines)
+
+        return text
@@ -0,0 +1,255 @@
+import hashlib
+import os
+from urllib.parse import parse_qs, unquote, urlencode, urlparse, urlunparse
+
+import pandas as pd
+
+from date_a_scientist.download_cache import DownloadCache, fetch_validators, hash_file, is_http_url
+
+LOCAL_FORMATS = {
+    ".csv": "csv",
+    ".tsv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+# hints that are consumed by the loader and never sent to the server
+LOADER_PARAMS = ["sep", "encoding", "usecols", "dtype", "chunksize", "engine", "downcast"]
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+class DatasetLoader:
+    # Describes where a dataset lives and how to parse it without touching it,
+    # so construction and cached questions never pay for the download or parse.
+    def __init__(self, source: str, download_cache: DownloadCache | None = None) -> None:
+        self.download_cache = download_cache
+
+        parsed_url = urlparse(source)
+        query_params = parse_qs(parsed_url.query)
+
+        self.encoding = query_params.get("encoding", [None])[0] or "utf-8"
+        self.sep = query_params.get("sep", [None])[0] or ","
+        self.usecols = self._parse_list(query_params.get("usecols"))
+        self.dtype = self._parse_dtype(query_params.get("dtype"))
+        chunksize = query_params.get("chunksize", [None])[0]
+        self.chunksize = int(chunksize) if chunksize else None
+        self.engine = query_params.get("engine", [None])[0]
+        if self.chunksize and self.engine == "pyarrow":
+            # pandas raises on the first load otherwise, pyarrow parses the whole file at once
+            raise ValueError("The chunksize hint can't be combined with engine=pyarrow, please use one of them.")
+        self.downcast = (query_params.get("downcast", ["false"])[0] or "").lower() in ["1", "true", "yes"]
+
+        for param in LOADER_PARAMS:
+            query_params.pop(param, None)
+
+        if parsed_url.scheme == "file":
+            self.url = None
+            self.path = unquote(parsed_url.path)
+        elif parsed_url.scheme:
+            self.url = urlunparse(
+                (
+                    parsed_url.scheme,
+                    parsed_url.netloc,
+                    parsed_url.path,
+                    parsed_url.params,
+                    urlencode(query_params, doseq=True),
+                    parsed_url.fragment,
+                )
+            )
+            self.path = None
+        else:
+            self.url = None
+            self.path = source.split("?")[0]
+
+        self.format = LOCAL_FORMATS.get(os.path.splitext(self.path or parsed_url.path)[1].lower(), "csv")
+
+    @property
+    def is_local(self) -> bool:
+        return self.path is not None
+
+    @property
+    def fingerprint(self) -> str | None:
+        descriptor = [self.url or os.path.abspath(self.path), self.format, self._options]
+        if self.is_local:
+            # a rewritten local file gets a new fingerprint without reading it
+            stat = os.stat(self.path)
+            descriptor += [stat.st_size, stat.st_mtime_ns]
+        elif not is_http_url(self.url):
+            # nothing but the content tells whether it changed
+            return None
+        else:
+            # the same URL may serve another file tomorrow, a HEAD request tells without downloading it
+            validators = fetch_validators(self.url)
+            if validators is not None:
+                descriptor += validators
+            elif self.download_cache is not None:
+                # the server doesn't say, the content hash of the downloaded file does
+                descriptor.append(self.download_cache.version(self.url))
+            else:
+                return None
+
+        return hashlib.sha256(repr(descriptor).encode()).hexdigest()[:32]
+
+    def content_fingerprint(self) -> str:
+        # hashes the local copy of the file, for datasets that mustn't be loaded to be fingerprinted
+        descriptor = [self.url or os.path.abspath(self.path), self.format, self._options, hash_file(self.fetch())]
+
+        return hashlib.sha256(repr(descriptor).encode()).hexdigest()[:32]
+
+    def load(self) -> pd.DataFrame:
+        if self.is_local or self.download_cache is None or not is_http_url(self.url):
+            return self._load(self.path if self.is_local else self.url)
+
+        path = self.download_cache.fetch(self.url)
+        if self.format != "csv":
+            return self._load(path)
+
+        # parsing a big CSV costs more than the download, so the parsed frame is kept as Parquet
+        converted_path = self.download_cache.converted_path(self.url, self._options)
+        if converted_path and os.path.exists(converted_path):
+            return pd.read_parquet(converted_path)
+
+        df = self._load(path)
+        if converted_path:
+            self._convert(df, converted_path)
+
+        return df
+
+    def fetch(self) -> str:
+        # a local copy of the raw file, for readers that scan it themselves
+        if self.is_local:
+            return self.path
+
+        if self.download_cache is None or not is_http_url(self.url):
+            raise ValueError(f"{self.url} has to be downloaded first, please enable the download cache.")
+
+        return self.download_cache.fetch(self.url)
+
+    @property
+    def _options(self) -> str:
+        return repr(
+            [self.encoding, self.sep, self.usecols, sorted(self.dtype.items()) if self.dtype else None, self.downcast]
+        )
+
+    @staticmethod
+    def _convert(df: pd.DataFrame, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            # e.g. columns with mixed types Arrow can't store, the CSV is parsed next time again
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load(self, source: str) -> pd.DataFrame:
+        if self.format == "parquet":
+            df = pd.read_parquet(source, columns=self.usecols)
+        elif self.format == "feather":
+            df = pd.read_feather(source, columns=self.usecols)
+        else:
+            df = self._read_csv(source)
+
+        if self.format != "csv" and self.dtype:
+            df = df.astype(self.dtype)
+
+        if self.downcast:
+            df = downcast_df(df)
+
+        return df
+
+    def _read_csv(self, source: str) -> pd.DataFrame:
+        kwargs = {}
+        if self.usecols:
+            kwargs["usecols"] = self.usecols
+        if self.dtype:
+            kwargs["dtype"] = self.dtype
+        if self.engine:
+            kwargs["engine"] = self.engine
+
+        if not self.chunksize:
+            return pd.read_csv(source, encoding=self.encoding, sep=self.sep, **kwargs)
+
+        chunks: list[pd.DataFrame] = []
+        with pd.read_csv(source, encoding=self.encoding, sep=self.sep, chunksize=self.chunksize, **kwargs) as reader:
+            for chunk in reader:
+                if self.downcast:
+                    # the first chunk decides which columns become categorical
+                    categorical_columns = _categorical_columns(chunks[0]) if chunks else None
+                    chunk = downcast_df(chunk, categorical_columns=categorical_columns)
+                chunks.append(chunk)
+
+        return concat_chunks(chunks)
+
+    @staticmethod
+    def _parse_list(values: list[str] | None) -> list[str] | None:
+        if not values:
+            return None
+
+        return [item.strip() for value in values for item in value.split(",") if item.strip()]
+
+    @classmethod
+    def _parse_dtype(cls, values: list[str] | None) -> dict[str, str] | None:
+        items = cls._parse_list(values)
+        if not items:
+            return None
+
+        dtype = {}
+        for item in items:
+            column, _, type_name = item.rpartition(":")
+            if not column:
+                raise ValueError(f"Invalid dtype hint: {item}. Expected <column>:<dtype>.")
+            dtype[column] = type_name
+
+        return dtype
+
+
+def is_local_dataset(source: str) -> bool:
+    parsed_url = urlparse(source)
+    if parsed_url.scheme == "file":
+        return True
+
+    path = source.split("?")[0]
+
+    return not parsed_url.scheme and os.path.splitext(path)[1].lower() in LOCAL_FORMATS and os.path.isfile(path)
+
+
+def downcast_df(df: pd.DataFrame, categorical_columns: list[str] | None = None) -> pd.DataFrame:
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif categorical_columns is not None:
+            if column in categorical_columns:
+                df[column] = series.astype("category")
+        elif series.dtype == object and len(series) > 0:
+            # repeated strings (cities, statuses, ...) are stored once per category
+            if series.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+                df[column] = series.astype("category")
+
+    return df
+
+
+def _categorical_columns(df: pd.DataFrame) -> list[str]:
+    return [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+
+
+def concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    if not chunks:
+        return pd.DataFrame()
+
+    # chunks see different subsets of values, so categories have to be unioned
+    # (plain `pd.concat` would silently fall back to object columns)
+    categorical_columns = [
+        column
+        for column in chunks[0].columns
+        if all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks)
+    ]
+    df = pd.concat(chunks, ignore_index=True)
+    for column in categorical_columns:
+        df[column] = pd.api.types.union_categoricals([chunk[column] for chunk in chunks])
+
+    return df
@@ -0,0 +1,111 @@
+from typing import Any
+
+from pandasai.helpers.memory import Memory  # type: ignore[import-untyped]
+
+from date_a_scientist.metrics import Metrics
+from date_a_scientist.profile import CHARS_PER_TOKEN, DEFAULT_MEMORY_TOKEN_BUDGET
+
+# answers of compacted turns are cut to this, the question is what the LLM needs to follow up on
+SUMMARY_ANSWER_CHARS = 60
+# of the budget, what the latest turns may take word for word, the rest is for the summary of older ones
+RECENT_SHARE = 0.5
+SUMMARY_HEADER = "Earlier in this conversation (oldest first, answers shortened):"
+
+
+class TokenBudgetMemory(Memory):
+    # pandasai sends every message of the conversation with each request, so prompts grow with the session.
+    # This keeps the latest turns word for word in half of `token_budget` tokens and folds the older ones into
+    # a single message of questions and shortened answers in the other half. Turns that don't fit even that way
+    # are forgotten. The question being asked is always sent, whatever its size.
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_MEMORY_TOKEN_BUDGET,
+        agent_info: str | None = None,
+        memory_size: int = 10,
+        metrics: Metrics | None = None,
+    ) -> None:
+        if token_budget <= 0:
+            raise ValueError("token_budget must be positive.")
+
+        super().__init__(memory_size, agent_info)
+        self.token_budget = token_budget
+        self.metrics = metrics
+
+    def to_openai_messages(self) -> list[dict[str, str]]:
+        messages = []
+        if self.agent_info:
+            messages.append({"role": "system", "content": self.get_system_prompt()})
+
+        recent, summary = self._compact()
+        if summary:
+            messages.append({"role": "system", "content": "\n".join([SUMMARY_HEADER, *summary])})
+        for message in recent:
+            messages.append({"role": "user" if message["is_user"] else "assistant", "content": message["message"]})
+
+        if self.metrics is not None:
+            chars = sum(len(message["content"]) for message in messages)
+            # gauges, pandasai renders the messages more than once per request
+            self.metrics.gauge("llm.memory_tokens", chars // CHARS_PER_TOKEN)
+            self.metrics.gauge("llm.memory_compacted_turns", len(summary))
+
+        return messages
+
+    def _compact(self) -> tuple[list[dict[str, Any]], list[str]]:
+        budget = self.token_budget * CHARS_PER_TOKEN
+        messages = self.all()
+
+        # the newest turns, as many as fit in their share of the budget, the question being asked at least
+        verbatim_budget = budget * RECENT_SHARE
+        start = len(messages)
+        while start > 0:
+            size = len(str(messages[start - 1]["message"]))
+            if start < len(messages) and size > verbatim_budget:
+                break
+            verbatim_budget -= size
+            budget -= size
+            start -= 1
+        # an answer without its question goes into the summary
+        while start < len(messages) - 1 and not messages[start]["is_user"]:
+            budget += len(str(messages[start]["message"]))
+            start += 1
+
+        # what's left of the budget goes to the older turns, newest first
+        budget -= len(SUMMARY_HEADER)
+        summary: list[str] = []
+        end = start
+        for turn_start, line in reversed(_summarize(messages[:start])):
+            if len(line) + 1 > budget:
+                break
+            budget -= len(line) + 1
+            summary.insert(0, line)
+            end = turn_start
+
+        recent = messages[start:]
+        # nothing before `end` can be sent again
+        dropped = sum(1 for message in messages[:end] if message["is_user"])
+        if dropped and self.metrics is not None:
+            self.metrics.increment("llm.memory_dropped_turns", dropped)
+        del messages[:end]
+
+        return recent, summary
+
+
+def _summarize(messages: list[dict[str, Any]]) -> list[tuple[int, str]]:
+    # one line per turn: the question and the beginning of its answer
+    lines: list[tuple[int, str]] = []
+    answered = True
+    for index, message in enumerate(messages):
+        text = " ".join(str(message["message"]).split())
+        if message["is_user"]:
+            lines.append((index, f"- Q: {text}"))
+            answered = False
+            continue
+
+        answer = text if len(text) <= SUMMARY_ANSWER_CHARS else f"{text[:SUMMARY_ANSWER_CHARS]}..."
+        if answered:
+            lines.append((index, f"- A: {answer}"))
+        else:
+            lines[-1] = (lines[-1][0], f"{lines[-1][1]} A: {answer}")
+            answered = True
+
+    return lines
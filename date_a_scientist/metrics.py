@@ -0,0 +1,111 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIMING = "timing"
+COUNTER = "counter"
+GAUGE = "gauge"
+PERCENTILES = [50, 90, 95, 99]
+MAX_SAMPLES = 10_000
+
+
+@dataclass(frozen=True)
+class MetricEvent:
+    kind: str
+    name: str
+    value: float
+
+
+MetricsHook = Callable[[MetricEvent], None]
+
+
+class Metrics:
+    def __init__(self, hooks: list[MetricsHook] | None = None) -> None:
+        self._hooks = list(hooks or [])
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        self._hooks.append(hook)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, time.perf_counter() - start)
+
+    def timing(self, name: str, seconds: float) -> None:
+        self._emit(MetricEvent(TIMING, name, seconds))
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self._emit(MetricEvent(COUNTER, name, value))
+
+    def gauge(self, name: str, value: float) -> None:
+        self._emit(MetricEvent(GAUGE, name, value))
+
+    def _emit(self, event: MetricEvent) -> None:
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception:
+                # a broken exporter must not break answering questions
+                logger.exception("Metrics hook %r failed on %s", hook, event.name)
+
+
+class InMemoryCollector:
+    # Keeps the last `max_samples` timings per stage (enough for stable
+    # percentiles) plus running counters and the last value of every gauge.
+    def __init__(self, max_samples: int = MAX_SAMPLES) -> None:
+        self._max_samples = max_samples
+        self._timings: dict[str, deque] = {}
+        self._timing_counts: Counter = Counter()
+        self._counters: Counter = Counter()
+        self._gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: MetricEvent) -> None:
+        with self._lock:
+            if event.kind == TIMING:
+                self._timings.setdefault(event.name, deque(maxlen=self._max_samples)).append(event.value)
+                self._timing_counts[event.name] += 1
+            elif event.kind == COUNTER:
+                self._counters[event.name] += event.value
+            elif event.kind == GAUGE:
+                self._gauges[event.name] = event.value
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            timings = {name: np.array(samples) for name, samples in self._timings.items()}
+            timing_counts = dict(self._timing_counts)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        timing_stats = {}
+        for name, samples in sorted(timings.items()):
+            stats = {"count": timing_counts[name], "mean": float(samples.mean()), "max": float(samples.max())}
+            for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                stats[f"p{percentile}"] = float(value)
+            timing_stats[name] = stats
+
+        return {"timings": timing_stats, "counters": dict(sorted(counters.items())), "gauges": gauges}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings.clear()
+            self._timing_counts.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+def stage_name(step: str) -> str:
+    # pandasai pipeline steps are class names, e.g. `CodeExecution` -> `code_execution`
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", step).lower()
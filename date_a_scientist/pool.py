@@ -0,0 +1,39 @@
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+if TYPE_CHECKING:
+    from date_a_scientist.agent import Agent
+
+
+class AgentPool:
+    # pandasai agents keep per-question state (last code, memory), so every
+    # concurrently running question needs an agent of its own
+    def __init__(self, factory: Callable[[], "Agent"]) -> None:
+        self._factory = factory
+        self._idle: list["Agent"] = []
+        self._agents: list["Agent"] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self) -> Iterator["Agent"]:
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+
+        if agent is None:
+            agent = self._factory()
+            with self._lock:
+                self._agents.append(agent)
+
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                self._idle.append(agent)
+
+    def for_each(self, func: Callable[["Agent"], Any]) -> None:
+        # every agent created so far, including those answering a question right now
+        with self._lock:
+            agents = list(self._agents)
+        for agent in agents:
+            func(agent)
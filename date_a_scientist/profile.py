@@ -0,0 +1,205 @@
+from typing import Any
+
+import pandas as pd
+
+from date_a_scientist.query_index import normalize_question
+
+DEFAULT_TOKEN_BUDGET = 1_000
+# for the earlier turns of a conversation, see `TokenBudgetMemory`
+DEFAULT_MEMORY_TOKEN_BUDGET = 500
+TOP_K = 5
+MAX_VALUE_LENGTH = 25
+# rough size of a token in english text, good enough to keep the prompt within the budget
+CHARS_PER_TOKEN = 4
+
+
+def build_profile(df: pd.DataFrame, top_k: int = TOP_K) -> dict[str, Any]:
+    # null rates are computed for all columns at once, the rest works on whole columns
+    null_rates = df.isna().mean() if len(df) else pd.Series(0.0, index=df.columns)
+    has_range = [
+        pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype) for dtype in df.dtypes
+    ]
+
+    columns = []
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        column_profile: dict[str, Any] = {
+            "name": str(column),
+            "type": str(series.dtype),
+            "unique": _count_unique(series),
+            "null_rate": round(float(null_rates.iloc[position]), 3),
+        }
+        if has_range[position] and not pd.api.types.is_bool_dtype(series.dtype) and series.notna().any():
+            column_profile["min"] = _format_value(series.min())
+            column_profile["max"] = _format_value(series.max())
+        # the range already describes numbers well unless they are a handful of codes
+        if "min" not in column_profile or column_profile["unique"] <= top_k:
+            column_profile["top"] = _top_values(series, top_k)
+
+        columns.append(column_profile)
+
+    return {"rows": len(df), "columns": columns}
+
+
+def build_sql_profile(connection: Any, table: str, top_k: int = TOP_K) -> dict[str, Any]:
+    # the same profile as `build_profile` from a single aggregate query, so DuckDB streams the
+    # table once and nothing but the statistics is materialized (unique counts are approximate)
+    relation = connection.sql(f"SELECT * FROM {quote_identifier(table)} LIMIT 0")
+    dtypes = relation.df().dtypes
+    has_range = [
+        (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype))
+        and not pd.api.types.is_bool_dtype(dtype)
+        for dtype in dtypes
+    ]
+
+    aggregates = ["count(*)"]
+    for position, column in enumerate(relation.columns):
+        quoted = quote_identifier(column)
+        aggregates += [
+            f"approx_count_distinct({quoted})",
+            f"count({quoted})",
+            f"approx_top_k(CAST({quoted} AS VARCHAR), {top_k})",
+        ]
+        if has_range[position]:
+            aggregates += [f"min({quoted})", f"max({quoted})"]
+    values = iter(connection.sql(f"SELECT {', '.join(aggregates)} FROM {quote_identifier(table)}").fetchone())
+
+    rows = next(values)
+    columns = []
+    for position, (column, sql_type) in enumerate(zip(relation.columns, relation.types)):
+        unique, count, top = next(values), next(values), next(values)
+        column_profile: dict[str, Any] = {
+            "name": column,
+            "type": str(sql_type),
+            "unique": int(unique),
+            "null_rate": round(1 - count / rows, 3) if rows else 0.0,
+        }
+        if has_range[position]:
+            minimum, maximum = next(values), next(values)
+            if count:
+                column_profile["min"] = _format_value(minimum)
+                column_profile["max"] = _format_value(maximum)
+        if "min" not in column_profile or column_profile["unique"] <= top_k:
+            column_profile["top"] = [_format_value(value) for value in top or []]
+
+        columns.append(column_profile)
+
+    return {"rows": rows, "columns": columns}
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def add_descriptions(profile: dict[str, Any], column_descriptions: dict[str, str] | None) -> dict[str, Any]:
+    if not column_descriptions:
+        return profile
+
+    columns = [
+        {**column, "description": column_descriptions[column["name"]]}
+        if column["name"] in column_descriptions
+        else column
+        for column in profile["columns"]
+    ]
+
+    return {**profile, "columns": columns}
+
+
+def render_profile(
+    profile: dict[str, Any],
+    index: int = 0,
+    name: str | None = None,
+    question: str | None = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    is_table: bool = False,
+) -> str:
+    columns = rank_columns(profile["columns"], question)
+    budget = token_budget * CHARS_PER_TOKEN
+
+    # a SQL table is referred to by its name rather than by its position in `dfs`
+    tag = "table" if is_table else "dataframe"
+    header = f'<{tag} name="{name}">' if name else f"<{tag}>"
+    reference = name if is_table else f"dfs[{index}]"
+    lines = [header, f"{reference}:{profile['rows']}x{len(columns)}", "columns:"]
+    size = sum(len(line) + 1 for line in lines)
+
+    # names of all columns come first, so the LLM doesn't guess the ones without stats
+    names_size = min(sum(len(column["name"]) + 2 for column in columns), budget // 2)
+
+    rendered = 0
+    for column in columns:
+        line = _render_column(column)
+        if rendered and size + len(line) + names_size > budget:
+            break
+        lines.append(line)
+        size += len(line) + 1
+        rendered += 1
+
+    remaining = [column["name"] for column in columns[rendered:]]
+    if remaining:
+        size += len(f"other columns:  and {len(remaining)} more")
+        names = []
+        for column_name in remaining:
+            if size + len(column_name) + 2 > budget:
+                break
+            names.append(column_name)
+            size += len(column_name) + 2
+        omitted = len(remaining) - len(names)
+        lines.append(f"other columns: {', '.join(names)}" + (f" and {omitted} more" if omitted else ""))
+
+    lines.append(f"</{tag}>")
+
+    return "\n".join(lines) + "\n"
+
+
+def rank_columns(columns: list[dict[str, Any]], question: str | None) -> list[dict[str, Any]]:
+    if not question:
+        return columns
+
+    question_terms = set(normalize_question(question).split())
+
+    def relevance(column: dict[str, Any]) -> int:
+        name_terms = set(normalize_question(column["name"].replace("_", " ")).split())
+        description_terms = set(normalize_question(column.get("description", "")).split())
+        return 2 * len(question_terms & name_terms) + len(question_terms & description_terms)
+
+    # `sorted` is stable, so columns of the same relevance keep their order
+    return sorted(columns, key=relevance, reverse=True)
+
+
+def _render_column(column: dict[str, Any]) -> str:
+    parts = [column["type"], f"unique {column['unique']}"]
+    if column["null_rate"]:
+        parts.append(f"nulls {column['null_rate']:.1%}")
+    if "min" in column:
+        parts.append(f"range {column['min']}..{column['max']}")
+    if column.get("top"):
+        parts.append(f"top {'|'.join(column['top'])}")
+    line = f"- {column['name']}: {', '.join(parts)}"
+
+    return f"{line}; {column['description']}" if column.get("description") else line
+
+
+def _count_unique(series: pd.Series) -> int:
+    try:
+        return int(series.nunique())
+    except TypeError:
+        # unhashable cells, e.g. lists
+        return int(series.astype(str).nunique())
+
+
+def _top_values(series: pd.Series, top_k: int) -> list[str]:
+    try:
+        counts = series.value_counts(dropna=True)
+    except TypeError:
+        counts = series.astype(str).value_counts(dropna=True)
+
+    return [_format_value(value) for value in counts.index[:top_k]]
+
+
+def _format_value(value: Any) -> str:
+    value = str(value)
+    if len(value) > MAX_VALUE_LENGTH:
+        return f"{value[:MAX_VALUE_LENGTH - 3]}..."
+
+    return value
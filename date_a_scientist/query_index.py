@@ -0,0 +1,82 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+# only what ends or quotes a sentence is dropped, operators, signs and decimal points change the question
+_PUNCTUATION_PATTERN = re.compile(r"[?!,\"'`\u2018\u2019\u201c\u201d]|(?<!\d)\.|\.(?!\d)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_question(q: str) -> str:
+    q = _PUNCTUATION_PATTERN.sub(" ", q.casefold())
+
+    return _WHITESPACE_PATTERN.sub(" ", q).strip()
+
+
+def _terms(text: str) -> Counter:
+    words = normalize_question(text).split()
+    # word bigrams keep some of the word order ("a than b" vs "b than a")
+    return Counter(words + [f"{first} {second}" for first, second in zip(words, words[1:])])
+
+
+class TfidfIndex:
+    def __init__(self) -> None:
+        self._documents: dict[str, Counter] = {}
+        self._postings: dict[str, set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._documents
+
+    def add(self, key: str, text: str) -> None:
+        self.remove(key)
+
+        terms = _terms(text)
+        self._documents[key] = terms
+        for term in terms:
+            self._postings[term].add(key)
+
+    def remove(self, key: str) -> None:
+        terms = self._documents.pop(key, None)
+        if not terms:
+            return
+
+        for term in terms:
+            self._postings[term].discard(key)
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def clear(self) -> None:
+        self._documents.clear()
+        self._postings.clear()
+
+    def most_similar(self, text: str) -> tuple[str | None, float]:
+        query_terms = _terms(text)
+        # only documents sharing at least one term can have a non-zero score
+        candidates = set().union(*(self._postings.get(term, set()) for term in query_terms))
+        if not candidates:
+            return None, 0.0
+
+        query_vector = self._vector(query_terms)
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            score = self._cosine(query_vector, self._vector(self._documents[key]))
+            if score > best_score:
+                best_key, best_score = key, score
+
+        return best_key, best_score
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._documents)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, terms: Counter) -> dict[str, float]:
+        return {term: count * self._idf(term) for term, count in terms.items()}
+
+    @staticmethod
+    def _cosine(left: dict[str, float], right: dict[str, float]) -> float:
+        dot = sum(weight * right.get(term, 0.0) for term, weight in left.items())
+        norm = math.sqrt(sum(w * w for w in left.values())) * math.sqrt(sum(w * w for w in right.values()))
+
+        return dot / norm if norm else 0.0
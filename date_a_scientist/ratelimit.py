@@ -0,0 +1,218 @@
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Mapping, TypeVar
+
+from date_a_scientist.metrics import Metrics
+
+T = TypeVar("T")
+
+MAX_RETRIES = 6
+# as many as the OpenAI client retries connection errors and server errors by default
+MAX_ERROR_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+# rough size of a token, only used to estimate what a request will cost before it's sent
+CHARS_PER_TOKEN = 4
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str | None) -> float | None:
+    # OpenAI sends resets as "1s", "6m0s" or "20ms", `Retry-After` as plain seconds
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    # Holds up to `limit` units and refills at `limit` per minute, like OpenAI's limits do. Reserving
+    # more than is available leaves the bucket in debt, so later callers queue behind earlier ones.
+    def __init__(self, limit: float | None = None) -> None:
+        self.cap = limit
+        self.limit = limit
+        self.available = limit or 0.0
+        self._rate = limit / 60 if limit else 0.0
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        if self.limit is None:
+            return 0.0
+
+        self._refill(now)
+        self.available -= min(amount, self.limit)
+
+        return max(0.0, -self.available / self._rate)
+
+    def sync(self, limit: float | None, remaining: float | None, reset: float | None, now: float) -> None:
+        if limit is None or remaining is None:
+            return
+
+        limit = min(limit, self.cap) if self.cap else limit
+        self._refill(now)
+        if self.limit is None:
+            self.available = remaining
+        if limit != self.limit:
+            self._rate = limit / 60
+        self.limit = limit
+        # the server knows of requests we haven't counted (other processes, other machines)
+        self.available = min(self.available, remaining)
+        # the time until the server's bucket is full again gives its refill rate; `remaining` is rounded
+        # down, so one unit less never overestimates it and the largest of these bounds is the closest
+        if reset and remaining < limit - 1:
+            self._rate = max(self._rate, (limit - remaining - 1) / reset)
+
+    def _refill(self, now: float) -> None:
+        if self.limit is not None:
+            self.available = min(self.limit, self.available + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class RateLimiter:
+    # Schedules the requests of one account and model: every call waits until both buckets, requests and
+    # tokens, have room for it, and a 429 pauses all callers for the time the server asks for.
+    def __init__(self, requests_per_minute: int | None = None, tokens_per_minute: int | None = None) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.queue_depth = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, requests_per_minute: int | None, tokens_per_minute: int | None) -> None:
+        # every agent configures the shared limiter, what was learned from the headers is only reset on changes
+        with self._lock:
+            if requests_per_minute is not None and requests_per_minute != self.requests.cap:
+                self.requests = TokenBucket(requests_per_minute)
+            if tokens_per_minute is not None and tokens_per_minute != self.tokens.cap:
+                self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int, metrics: Metrics | None = None) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+                self._paused_until - now,
+                0.0,
+            )
+            if wait > 0:
+                self.queue_depth += 1
+            queue_depth = self.queue_depth
+
+        if metrics is not None:
+            metrics.gauge("llm.queue_depth", queue_depth)
+            metrics.timing("llm.rate_limit_wait", wait)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+
+        return wait
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for name, bucket in [("requests", self.requests), ("tokens", self.tokens)]:
+                bucket.sync(
+                    _parse_number(headers.get(f"x-ratelimit-limit-{name}")),
+                    _parse_number(headers.get(f"x-ratelimit-remaining-{name}")),
+                    parse_duration(headers.get(f"x-ratelimit-reset-{name}")),
+                    now,
+                )
+
+    def back_off(self, attempt: int, headers: Mapping[str, str] | None = None) -> None:
+        headers = headers or {}
+        retry_after_ms = _parse_number(headers.get("retry-after-ms"))
+        delay = retry_after_ms / 1000 if retry_after_ms is not None else parse_duration(headers.get("retry-after"))
+        if delay is None:
+            # full jitter keeps callers that were rejected together from coming back together
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def call(
+        self,
+        func: Callable[[], T],
+        tokens: int,
+        metrics: Metrics | None = None,
+        max_retries: int = MAX_RETRIES,
+        max_error_retries: int = MAX_ERROR_RETRIES,
+    ) -> T:
+        import openai  # type: ignore[import]
+
+        attempt = 0
+        errors = 0
+        while True:
+            self.acquire(tokens, metrics)
+            try:
+                return func()
+            except openai.RateLimitError as e:
+                if attempt >= max_retries:
+                    raise
+                if metrics is not None:
+                    metrics.increment("llm.rate_limited")
+                self.back_off(attempt, e.response.headers)
+            except (openai.APIConnectionError, openai.InternalServerError):
+                if errors >= max_error_retries:
+                    raise
+                if metrics is not None:
+                    metrics.increment("llm.retries")
+                errors += 1
+                self.back_off(attempt)
+            attempt += 1
+
+
+# One limiter per (API token, host, model) for the whole process, OpenAI's limits are per account and model
+_limiters: dict[tuple[str, str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_token: str, host: str, model: str) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get((api_token, host, model))
+        if limiter is None:
+            limiter = RateLimiter()
+            _limiters[(api_token, host, model)] = limiter
+
+        return limiter
+
+
+def find_rate_limiter(api_token: str, host: str, model: str) -> RateLimiter | None:
+    with _limiters_lock:
+        return _limiters.get((api_token, host, model))
+
+
+def clear_rate_limiters() -> None:
+    with _limiters_lock:
+        _limiters.clear()
+
+
+os.register_at_fork(after_in_child=clear_rate_limiters)
+
+
+def estimate_tokens(texts: list[str], max_tokens: int | None) -> int:
+    # OpenAI counts `max_tokens` against the limit up front, whatever the answer ends up using
+    return sum(len(text) for text in texts) // CHARS_PER_TOKEN + (max_tokens or 0)
+
+
+def _parse_number(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
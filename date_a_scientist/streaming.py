@@ -0,0 +1,110 @@
+import re
+from dataclasses import dataclass
+from typing import Any
+
+_FENCE = "```"
+_DFS_LITERAL_PATTERN = re.compile(r"dfs\s*=\s*\[pd.DataFrame")
+_DF_ASSIGNMENT_PATTERN = re.compile(r"^df\s*=\s*df")
+# `clean_code` drops a trailing `result = ...` together with the comment above it
+_HELD_BACK_LINES = 2
+
+
+@dataclass
+class StreamChunk:
+    code: str = ""
+    result: Any = None
+    final: bool = False
+
+
+class CodeStream:
+    # Cleans the code of an LLM response while it's streamed, line by line, the way
+    # `CustomOpenAI._add_plt_close` and `Agent.clean_code` clean the whole response.
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._state = "prose"  # prose -> code -> done
+        self._prose: list[str] = []
+        self._lines: list[str] = []
+        self._emitted = 0
+        self._skipping_dfs_literal = False
+        self._literal_prefix = ""
+
+    def feed(self, delta: str) -> str:
+        self._buffer += delta
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._add_line(line)
+
+        return self._flush(final=False)
+
+    def close(self) -> str:
+        if self._buffer:
+            self._add_line(self._buffer)
+            self._buffer = ""
+
+        # without a fenced block the whole response is the code
+        if self._state == "prose":
+            for line in self._prose:
+                self._add_code_line(line)
+        self._state = "done"
+
+        while self._lines and not self._lines[-1].strip():
+            self._lines.pop()
+        if self._lines and self._lines[-1].strip().startswith("result ="):
+            self._lines.pop()
+            if self._lines and self._lines[-1].strip().startswith("# Declare result var"):
+                self._lines.pop()
+
+        return self._flush(final=True)
+
+    def _add_line(self, line: str) -> None:
+        is_fence = line.strip().startswith(_FENCE)
+        if self._state == "prose":
+            if is_fence:
+                self._state = "code"
+                self._prose = []
+            else:
+                self._prose.append(line)
+        elif self._state == "code":
+            if is_fence:
+                self._state = "done"
+            else:
+                self._add_code_line(line)
+
+    def _add_code_line(self, line: str) -> None:
+        # a `dfs = [pd.DataFrame(...)]` literal is cut out, whatever surrounds it stays
+        if not self._skipping_dfs_literal and (match := _DFS_LITERAL_PATTERN.search(line)):
+            self._skipping_dfs_literal = True
+            self._literal_prefix = line[: match.start()]
+            line = line[match.end() :]
+        if self._skipping_dfs_literal:
+            if "})]" not in line:
+                return
+            self._skipping_dfs_literal = False
+            line = self._literal_prefix + line[line.index("})]") + len("})]") :]
+
+        line = line.replace("dfs[0]", "df")
+        if not self._lines:
+            line = _DF_ASSIGNMENT_PATTERN.sub("", line)
+            # leading blank lines are stripped
+            if not line.strip():
+                return
+        line = line.replace("Assuming dfs", "Assuming df")
+        line = line.replace("# Write code here", "# We assume that df is already loaded")
+
+        self._lines.append(line)
+        if line.startswith("plt.savefig"):
+            self._lines.append("plt.close() # HACK")
+
+    def _flush(self, final: bool) -> str:
+        ready = len(self._lines)
+        if not final:
+            # hold back the last non-blank lines (and blank lines after them) until it's clear they stay
+            non_blank = 0
+            while ready > self._emitted and non_blank < _HELD_BACK_LINES:
+                ready -= 1
+                non_blank += bool(self._lines[ready].strip())
+
+        code = "".join(f"{line}\n" for line in self._lines[self._emitted : ready])
+        self._emitted = max(self._emitted, ready)
+
+        return code
@@ -0,0 +1,92 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from date_a_scientist.metrics import Metrics
+from date_a_scientist.query_index import normalize_question
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    # Runs `prepare` (building the agent) and then `answer` for every expected question on a background thread,
+    # at most `max_workers` questions at a time. Nothing it does reaches the foreground: failures are logged and
+    # counted, and a question asked meanwhile only waits for a precomputed answer that is already being worked
+    # on, a queued one is cancelled and left to the caller.
+    def __init__(
+        self,
+        prepare: Callable[[], Any],
+        answer: Callable[[str], dict[str, Any]],
+        questions: list[str] | None = None,
+        max_workers: int = 4,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self._prepare = prepare
+        self._answer = answer
+        self._max_workers = max_workers
+        self._metrics = metrics or Metrics()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._futures: dict[str, tuple[str, Future]] = {}
+        for q in questions or []:
+            self._futures.setdefault(normalize_question(q), (q, Future()))
+        self._thread = threading.Thread(target=self._run, name="date_a_scientist_warmup", daemon=True)
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+
+        return self
+
+    def cancel(self) -> None:
+        # questions already sent to the LLM are finished, their answers are cached all the same
+        self._cancelled.set()
+        for _, future in self._futures.values():
+            future.cancel()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def take_answer(self, q: str) -> dict[str, Any] | None:
+        _, future = self._futures.get(normalize_question(q), (None, None))
+        if future is None or future.cancel():
+            return None
+
+        try:
+            return future.result()
+        except Exception:
+            # failed or cancelled, the caller asks again
+            return None
+
+    def _run(self) -> None:
+        try:
+            with self._metrics.timer("warmup"):
+                try:
+                    self._prepare()
+                except Exception as e:
+                    self._metrics.increment("warmup.errors")
+                    logger.warning("Warming up failed: %r", e)
+
+                with ThreadPoolExecutor(self._max_workers, thread_name_prefix="date_a_scientist_warmup") as executor:
+                    for q, future in self._futures.values():
+                        executor.submit(self._precompute, q, future)
+        finally:
+            self._done.set()
+
+    def _precompute(self, q: str, future: Future) -> None:
+        if self._cancelled.is_set() or not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            answer = self._answer(q)
+        except Exception as e:
+            future.set_exception(e)
+            self._metrics.increment("warmup.errors")
+            logger.warning("Precomputing %r failed: %r", q, e)
+        else:
+            future.set_result(answer)
+            self._metrics.increment("warmup.precomputed")
@@ -0,0 +1,267 @@
+import math
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import tempfile
+import threading
+import traceback
+import weakref
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from typing import Any, Iterator
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows, only the timeout applies
+    resource = None
+
+# forkserver forks workers from a clean process with pandas and pandasai already imported,
+# without the threads (HTTP clients, executors) of the notebook process
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+PRELOADED_MODULES = ["pandas", "pyarrow", "matplotlib.pyplot", "pandasai.helpers.optional"]
+
+
+class WorkerError(Exception):
+    pass
+
+
+class CPUTimeLimitExceeded(Exception):
+    pass
+
+
+class WorkerPool:
+    # Runs generated code in worker processes started ahead of time. The dataframe is written once
+    # to an Arrow IPC file in `data_dir` that every worker memory-maps, so numeric columns are shared
+    # rather than copied and nothing is pickled per call. The file belongs to the pool and is deleted
+    # with it, a pool never runs code on the data of another one. Every call is limited to `cpu_time_limit` seconds of
+    # CPU and `memory_limit` bytes; a worker that doesn't answer within `timeout` is killed and replaced.
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        data_dir: str | None,
+        size: int,
+        cpu_time_limit: float | None = None,
+        memory_limit: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"Invalid number of workers: {size}. Expected at least 1.")
+
+        self.size = size
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+        self._data_path = _write_arrow(df, data_dir)
+        # without Arrow (e.g. columns of mixed types) every worker gets a pickled copy once at start
+        self._df_bytes = None if self._data_path else pickle.dumps(df)
+        self._context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            self._context.set_forkserver_preload(PRELOADED_MODULES)
+
+        self._idle: queue.Queue = queue.Queue()
+        self._workers: set[_Worker] = set()
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._idle.put(self._start_worker())
+        self._finalizer = weakref.finalize(self, _stop_workers, self._workers, self._data_path)
+
+    def run(self, code: str, additional_dependencies: list[dict] | None = None) -> Any:
+        worker = self._idle.get()
+        try:
+            ok, value = self._call(worker, (code, additional_dependencies or []))
+        except (TimeoutError, WorkerError):
+            worker = self._replace_worker(worker)
+            raise
+        finally:
+            self._idle.put(worker)
+
+        if not ok:
+            raise WorkerError(value)
+
+        return value
+
+    def _call(self, worker: "_Worker", task: tuple[str, list[dict]]) -> tuple[bool, Any]:
+        try:
+            worker.connection.send(task)
+            answered = worker.connection.poll(self.timeout)
+        except OSError:
+            raise WorkerError("The worker executing the code died.")
+
+        if not answered:
+            raise TimeoutError(f"Code execution timed out after {self.timeout} seconds.")
+
+        try:
+            return worker.connection.recv()
+        except (EOFError, OSError):
+            # killed by the hard CPU limit or the OOM killer
+            raise WorkerError("The worker executing the code died.")
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def _start_worker(self) -> "_Worker":
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve,
+            args=(worker_connection, self._data_path, self._df_bytes, self.cpu_time_limit, self.memory_limit),
+            name="date_a_scientist_worker",
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+
+        worker = _Worker(process, connection)
+        with self._lock:
+            self._workers.add(worker)
+
+        return worker
+
+    def _replace_worker(self, worker: "_Worker") -> "_Worker":
+        worker.stop()
+        with self._lock:
+            self._workers.discard(worker)
+
+        return self._start_worker()
+
+
+class _Worker:
+    def __init__(self, process: Any, connection: Connection) -> None:
+        self.process = process
+        self.connection = connection
+
+    def stop(self) -> None:
+        self.connection.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+def _stop_workers(workers: set[_Worker], data_path: str | None) -> None:
+    for worker in list(workers):
+        worker.stop()
+    workers.clear()
+    if data_path is not None:
+        try:
+            os.remove(data_path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_arrow(df: pd.DataFrame, data_dir: str | None) -> str | None:
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        table = pa.Table.from_pandas(df)
+    except Exception:
+        # pyarrow isn't installed or can't store the columns
+        return None
+
+    if data_dir:
+        os.makedirs(data_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="workers_", suffix=".arrow", dir=data_dir)
+    os.close(fd)
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+    return path
+
+
+def _load_df(data_path: str | None, df_bytes: bytes | None) -> pd.DataFrame:
+    if data_path is None:
+        return pickle.loads(df_bytes)
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # columns without nulls are views of the mapped file, shared with the other workers through the page cache
+    return ipc.open_file(pa.memory_map(data_path)).read_all().to_pandas(split_blocks=True)
+
+
+def _serve(
+    connection: Connection,
+    data_path: str | None,
+    df_bytes: bytes | None,
+    cpu_time_limit: float | None,
+    memory_limit: int | None,
+) -> None:
+    from pandasai.helpers.optional import get_environment  # type: ignore[import-untyped]
+
+    # the mapped columns are read-only, with copy-on-write a snippet modifying them gets its own copy
+    pd.set_option("mode.copy_on_write", True)
+    df = _load_df(data_path, df_bytes)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _raise_cpu_time_limit_exceeded)
+
+    while True:
+        try:
+            code, additional_dependencies = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            # the same environment pandasai's `CodeExecution` runs the code in
+            environment = get_environment(additional_dependencies)
+            # a shallow copy, changes of one snippet don't leak into the next one
+            environment["dfs"] = [df.copy(deep=False)]
+            environment["df"] = environment["dfs"][0]
+            with _limits(cpu_time_limit, memory_limit):
+                exec(code, environment)
+            if "result" not in environment:
+                raise WorkerError("No result returned")
+            response = (True, environment["result"])
+        except BaseException:
+            response = (False, traceback.format_exc())
+
+        try:
+            connection.send(response)
+        except Exception:
+            connection.send((False, traceback.format_exc()))
+
+
+@contextmanager
+def _limits(cpu_time_limit: float | None, memory_limit: int | None) -> Iterator[None]:
+    # RLIMIT_CPU counts the CPU time of the whole process, so a call gets `cpu_time_limit` on top of
+    # what was used so far; RLIMIT_AS likewise gets `memory_limit` on top of the current address space
+    if resource is None:
+        yield
+        return
+
+    previous_limits = {}
+    if cpu_time_limit is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        previous_limits[resource.RLIMIT_CPU] = _set_soft_limit(
+            resource.RLIMIT_CPU, math.ceil(usage.ru_utime + usage.ru_stime + cpu_time_limit)
+        )
+    if memory_limit is not None and (address_space := _address_space()) is not None:
+        previous_limits[resource.RLIMIT_AS] = _set_soft_limit(resource.RLIMIT_AS, address_space + memory_limit)
+
+    try:
+        yield
+    finally:
+        for limit, previous in previous_limits.items():
+            resource.setrlimit(limit, previous)
+
+
+def _set_soft_limit(limit: int, soft: int) -> tuple[int, int]:
+    previous = resource.getrlimit(limit)
+    hard = previous[1]
+    resource.setrlimit(limit, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+    return previous
+
+
+def _address_space() -> int | None:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def _raise_cpu_time_limit_exceeded(signum: int, frame: Any) -> None:
+    raise CPUTimeLimitExceeded("The code used more CPU time than allowed.")
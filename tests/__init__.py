@@ -1,7 +1,15 @@
+import os
+import tempfile
 from unittest import TestCase
 
+import pandas as pd
 import pytest
 
+from benchmarks.fake_openai import RESPONSE, FakeOpenAIServer
+from date_a_scientist import DateAScientist
+
+__all__ = ["RESPONSE", "BaseTestCase", "FakeOpenAIServer", "FakeOpenAITestCase"]
+
 
 class BaseTestCase(TestCase):
     @pytest.fixture(scope="function", autouse=True)
@@ -14,3 +22,27 @@ class BaseTestCase(TestCase):
         self.openai_api_token = openai_api_token
         self.openai_free_api_token = openai_free_api_token
         self.mocker = mocker
+
+
+# Every test gets a fresh local fake OpenAI server and its own cache directory,
+# so answers of one test are never served to another.
+class FakeOpenAITestCase(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = self._start_server()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp_dir.cleanup()
+
+    def _start_server(self) -> FakeOpenAIServer:
+        return FakeOpenAIServer().start()
+
+    def _ds(self, df: pd.DataFrame | None = None, **kwargs) -> DateAScientist:
+        return DateAScientist(
+            df=pd.DataFrame([{"name": "Alice"}]) if df is None else df,
+            llm_openai_api_token="sk-fake",
+            llm_openai_base_url=self.server.base_url,
+            cache_path=os.path.join(self.tmp_dir.name, ".date_a_scientist_cache"),
+            **kwargs,
+        )
@@ -0,0 +1,417 @@
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from date_a_scientist.cache import AnswerCache, ArrowResult, CacheRegistry
+from tests import BaseTestCase
+
+
+def _write_and_read(cache_path: str, worker: int, n_questions: int) -> None:
+    cache = AnswerCache(cache_path, similarity_threshold=0.5)
+    for i in range(n_questions):
+        cache.set(f"Question {i} of worker {worker}?", {"result": worker * 1000 + i, "code": ""})
+        cache.set("Shared question?", {"result": worker, "code": ""})
+        cache.lookup(f"Question {i} of worker {worker + 1}")
+    cache.close()
+
+
+class TestAnswerCache(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, ".date_a_scientist_cache_abc")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get__missing_file_is_not_created(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+
+        # WHEN
+        # THEN
+        assert cache.get("Who lives in Chicago?") is None
+        assert "Who lives in Chicago?" not in cache
+        assert cache.to_dict() == {}
+        assert not os.path.exists(self.cache_path)
+
+    def test_set__persists_between_instances(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        df = pd.DataFrame([{"name": "Charlie", "city": "Chicago"}])
+
+        # WHEN
+        cache.set("Who lives in Chicago?", {"result": df, "code": "df[df.city == 'Chicago']"})
+        cache.set("What is the name of the first person?", {"result": "Alice", "code": "df.name[0]"})
+        cache.close()
+
+        # THEN
+        other_cache = AnswerCache(self.cache_path)
+        answer = other_cache.get("Who lives in Chicago?")
+        assert answer["code"] == "df[df.city == 'Chicago']"
+        assert answer["result"].equals(df)
+        assert list(other_cache.to_dict()) == ["Who lives in Chicago?", "What is the name of the first person?"]
+        assert len(other_cache) == 2
+
+    def test_set__is_keyed_and_does_not_rewrite_other_entries(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        cache.set("a", {"result": 1, "code": ""})
+
+        # WHEN
+        cache.set("b", {"result": 2, "code": ""})
+        cache.set("a", {"result": 3, "code": ""})
+
+        # THEN
+        assert cache.get("a") == {"result": 3, "code": ""}
+        assert cache.get("b") == {"result": 2, "code": ""}
+        assert len(cache) == 2
+
+    def test_init__migrates_legacy_pickle(self):
+        # GIVEN
+        with open(self.cache_path, "wb") as cache_file:
+            pickle.dump({"Who is first?": {"result": "Alice", "code": "df.name[0]"}}, cache_file)
+
+        # WHEN
+        cache = AnswerCache(self.cache_path)
+
+        # THEN
+        assert cache.get("Who is first?") == {"result": "Alice", "code": "df.name[0]"}
+        with sqlite3.connect(self.cache_path) as connection:
+            assert connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 1
+
+    def test_init__truncated_legacy_pickle_starts_empty(self):
+        # GIVEN
+        with open(self.cache_path, "wb") as cache_file:
+            cache_file.write(pickle.dumps({"a": {"result": 1, "code": ""}})[:10])
+
+        # WHEN
+        cache = AnswerCache(self.cache_path)
+
+        # THEN
+        assert cache.to_dict() == {}
+
+    def test_clear(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        cache.set("a", {"result": 1, "code": ""})
+
+        # WHEN
+        cache.clear()
+
+        # THEN
+        assert cache.to_dict() == {}
+        assert not any(filename.startswith(".date_a_scientist_cache") for filename in os.listdir(self.tmp_dir.name))
+
+    def test_lookup__exact_and_normalized(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        cache.set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+
+        # WHEN
+        # THEN
+        assert cache.lookup("Who lives in Chicago?") == ({"result": "Charlie", "code": ""}, AnswerCache.EXACT)
+        assert cache.lookup("who lives in   chicago") == ({"result": "Charlie", "code": ""}, AnswerCache.NORMALIZED)
+        assert cache.lookup("Who lives in Chicago, Illinois?") == (None, None)
+
+    def test_lookup__operators_and_signs_are_different_questions(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        cache.set("How many people have age > 30?", {"result": 1, "code": ""})
+        cache.set("Which balances are below -5?", {"result": [-7], "code": ""})
+
+        # WHEN
+        # THEN
+        assert cache.lookup("how many people have age < 30") == (None, None)
+        assert cache.lookup("Which balances are below 5?") == (None, None)
+        assert cache.lookup("which balances are below -5") == ({"result": [-7], "code": ""}, AnswerCache.NORMALIZED)
+
+    def test_lookup__similarity_tier(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, similarity_threshold=0.5)
+        cache.set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+        cache.set("What is the average age?", {"result": 30, "code": ""})
+
+        # WHEN
+        # THEN
+        answer, tier = cache.lookup("Who lives in Chicago, Illinois?")
+        assert answer == {"result": "Charlie", "code": ""}
+        assert tier == AnswerCache.SIMILAR
+        assert cache.lookup("Plot salaries") == (None, None)
+
+    def test_lookup__similarity_index_is_built_from_existing_entries(self):
+        # GIVEN
+        AnswerCache(self.cache_path).set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+
+        # WHEN
+        cache = AnswerCache(self.cache_path, similarity_threshold=0.5)
+
+        # THEN
+        assert cache.lookup("Who lives in Chicago, Illinois?")[1] == AnswerCache.SIMILAR
+
+    def test_lookup__similarity_below_threshold(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, similarity_threshold=0.99)
+        cache.set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+
+        # WHEN
+        # THEN
+        assert cache.lookup("Who lives in Chicago, Illinois?") == (None, None)
+
+    def test_delete__reports_evictions_and_size(self):
+        # GIVEN
+        events = []
+        cache = AnswerCache(self.cache_path, on_event=lambda event, value: events.append((event, value)))
+        assert cache.size_bytes == 0
+        cache.set("a", {"result": 1, "code": ""})
+
+        # WHEN
+        cache.delete("a")
+        cache.delete("missing")
+
+        # THEN
+        assert events == [("evictions", 1)]
+        assert cache.size_bytes > 0
+
+    def test_entries_of_other_instances_are_visible(self):
+        # GIVEN
+        writer = AnswerCache(self.cache_path)
+        reader = AnswerCache(self.cache_path, similarity_threshold=0.5)
+        assert reader.lookup("Who lives in Chicago, Illinois?") == (None, None)
+
+        # WHEN
+        writer.set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+
+        # THEN
+        assert reader.lookup("Who lives in Chicago?")[1] == AnswerCache.EXACT
+        assert reader.lookup("Who lives in Chicago, Illinois?")[1] == AnswerCache.SIMILAR
+
+    def test_clear_by_other_instance(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path)
+        other = AnswerCache(self.cache_path)
+        cache.set("a", {"result": 1, "code": ""})
+        assert other.get("a") == {"result": 1, "code": ""}
+
+        # WHEN
+        cache.clear()
+        other.set("b", {"result": 2, "code": ""})
+
+        # THEN
+        assert cache.to_dict() == {"b": {"result": 2, "code": ""}}
+
+    def test_many_processes_share_one_cache(self):
+        # GIVEN
+        n_workers, n_questions = 8, 25
+        context = multiprocessing.get_context("spawn")
+
+        # WHEN
+        with context.Pool(n_workers) as pool:
+            pool.starmap(_write_and_read, [(self.cache_path, worker, n_questions) for worker in range(n_workers)])
+
+        # THEN
+        entries = AnswerCache(self.cache_path).to_dict()
+        assert len(entries) == n_workers * n_questions + 1
+        for worker in range(n_workers):
+            for i in range(n_questions):
+                assert entries[f"Question {i} of worker {worker}?"]["result"] == worker * 1000 + i
+        assert entries["Shared question?"]["result"] in range(n_workers)
+
+    def test_set__evicts_least_recently_used_entries(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.cache.ACCESS_RESOLUTION", 0)
+        events = []
+        cache = AnswerCache(
+            self.cache_path, max_entries=2, on_event=lambda event, value: events.append((event, value))
+        )
+        cache.set("a", {"result": 1, "code": ""})
+        cache.set("b", {"result": 2, "code": ""})
+
+        # WHEN
+        assert cache.get("a") is not None
+        cache.set("c", {"result": 3, "code": ""})
+
+        # THEN
+        assert set(cache.to_dict()) == {"a", "c"}
+        assert events == [("evictions", 1)]
+
+    def test_set__returns_the_charts_no_answer_refers_to_any_more(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.cache.ACCESS_RESOLUTION", 0)
+        cache = AnswerCache(self.cache_path, max_entries=2)
+        assert cache.set("a", {"result": 1, "code": "", "chart": "shared.png"}) == set()
+        assert cache.set("b", {"result": 2, "code": "", "chart": "shared.png"}) == set()
+        to_dict = self.mocker.spy(cache, "to_dict")
+
+        # WHEN
+        first = cache.set("c", {"result": 3, "code": "", "chart": "c.png"})
+        second = cache.set("d", {"result": 4, "code": ""})
+        replaced = cache.set("d", {"result": 4, "code": "", "chart": "d.png"})
+
+        # THEN
+        assert first == set()
+        assert second == {"shared.png"}
+        assert replaced == set()
+        assert cache.set("d", {"result": 4, "code": ""}) == {"d.png"}
+        assert cache.trim(0) == {"c.png"}
+        assert to_dict.call_count == 0
+
+    def test_init__charts_of_older_caches_are_indexed(self):
+        # GIVEN
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.execute("CREATE TABLE answers (question TEXT PRIMARY KEY, answer BLOB NOT NULL)")
+            connection.execute(
+                "INSERT INTO answers VALUES (?, ?)",
+                ("a", pickle.dumps({"result": 1, "code": "", "chart": "a.png"})),
+            )
+        connection.close()
+
+        # WHEN
+        cache = AnswerCache(self.cache_path)
+
+        # THEN
+        assert cache.get("a")["chart"] == "a.png"
+        assert cache.trim(0) == {"a.png"}
+
+    def test_ttl__expired_entries_are_not_returned_and_evicted(self):
+        # GIVEN
+        now = self.mocker.patch("date_a_scientist.cache.time.time", return_value=1000.0)
+        cache = AnswerCache(self.cache_path, ttl=60)
+        cache.set("Who lives in Chicago?", {"result": "Charlie", "code": ""})
+
+        # WHEN
+        now.return_value = 1061.0
+
+        # THEN
+        assert cache.lookup("Who lives in Chicago?") == (None, None)
+        assert cache.lookup("who lives in chicago") == (None, None)
+        assert cache.to_dict() == {}
+        cache.set("What is the average age?", {"result": 30, "code": ""})
+        with sqlite3.connect(self.cache_path) as connection:
+            assert connection.execute("SELECT question FROM answers").fetchall() == [("What is the average age?",)]
+
+    def test_init__invalid_limits(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        with self.assertRaises(ValueError):
+            AnswerCache(self.cache_path, max_entries=0)
+        with self.assertRaises(ValueError):
+            AnswerCache(self.cache_path, ttl=-1)
+
+    def test_trim__drops_oldest_entries_and_shrinks_the_file(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.cache.ACCESS_RESOLUTION", 0)
+        cache = AnswerCache(self.cache_path)
+        for i in range(20):
+            cache.set(f"q{i}", {"result": "x" * 10_000, "code": ""})
+        cache.get("q0")
+        size_before = cache.size_bytes
+
+        # WHEN
+        cache.trim(50_000)
+
+        # THEN
+        assert "q0" in cache
+        assert len(cache) < 5
+        assert cache.size_bytes < size_before / 2
+
+    def test_set__large_dataframes_are_stored_as_arrow_files(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, result_file_min_bytes=1000)
+        large_df = pd.DataFrame({"name": [f"name {i}" for i in range(100)], "age": range(100)})
+        small_df = pd.DataFrame({"age": [1, 2]})
+
+        # WHEN
+        cache.set("large", {"result": large_df, "code": "x"})
+        cache.set("small", {"result": small_df, "code": "y"})
+
+        # THEN
+        results_dir = f"{self.cache_path}_results"
+        assert len(os.listdir(results_dir)) == 1
+        assert cache.size_bytes > os.path.getsize(os.path.join(results_dir, os.listdir(results_dir)[0]))
+        answer = AnswerCache(self.cache_path).get("large")
+        assert isinstance(answer["result"], ArrowResult)
+        pd.testing.assert_frame_equal(answer["result"].to_pandas(), large_df)
+        assert answer["code"] == "x"
+        pd.testing.assert_frame_equal(cache.get("small")["result"], small_df)
+
+    def test_get__arrow_files_are_only_read_when_converted(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, result_file_min_bytes=0)
+        df = pd.DataFrame({"age": range(100)})
+        cache.set("a", {"result": df, "code": ""})
+        read_table = self.mocker.spy(ArrowResult, "read_table")
+
+        # WHEN
+        entries = cache.to_dict()
+        answer, _ = cache.lookup("A?")
+
+        # THEN
+        assert read_table.call_count == 0
+        assert isinstance(entries["a"]["result"], ArrowResult)
+        pd.testing.assert_frame_equal(answer["result"].to_pandas(), df)
+        assert read_table.call_count == 1
+
+    def test_set__arrow_files_are_removed_with_their_answers(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, result_file_min_bytes=0)
+        df = pd.DataFrame({"age": [1, 2]})
+        results_dir = f"{self.cache_path}_results"
+        cache.set("a", {"result": df, "code": ""})
+        cache.set("b", {"result": df, "code": ""})
+
+        # WHEN
+        cache.set("a", {"result": df, "code": ""})
+        files_after_replace = len(os.listdir(results_dir))
+        cache.delete("b")
+        files_after_delete = len(os.listdir(results_dir))
+        cache.clear()
+
+        # THEN
+        assert files_after_replace == 2
+        assert files_after_delete == 1
+        assert not os.path.exists(results_dir)
+
+    def test_get__missing_arrow_file_is_a_miss(self):
+        # GIVEN
+        cache = AnswerCache(self.cache_path, result_file_min_bytes=0)
+        cache.set("a", {"result": pd.DataFrame({"age": [1, 2]}), "code": ""})
+        results_dir = f"{self.cache_path}_results"
+        for filename in os.listdir(results_dir):
+            os.remove(os.path.join(results_dir, filename))
+
+        # WHEN
+        answer = cache.get("a")
+
+        # THEN
+        assert answer is None
+
+    def test_registry__evicts_least_recently_used_caches(self):
+        # GIVEN
+        events = []
+        registry = CacheRegistry(
+            os.path.join(self.tmp_dir.name, "registry"), 1000, on_event=lambda event, value: events.append(value)
+        )
+        paths = [os.path.join(self.tmp_dir.name, f"cache_{i}") for i in range(3)]
+        for path in paths:
+            for suffix in ["", "-wal", "_profile"]:
+                with open(f"{path}{suffix}", "w"):
+                    pass
+        os.makedirs(f"{paths[0]}_results")
+
+        # WHEN
+        assert registry.update(paths[0], 400) == 1000
+        assert registry.update(paths[1], 400) == 600
+        assert registry.update(paths[2], 400) == 600
+
+        # THEN
+        assert sorted(os.listdir(self.tmp_dir.name)) == sorted(
+            ["registry", "registry-wal", "registry-shm", "cache_1", "cache_1-wal", "cache_1_profile"]
+            + ["cache_2", "cache_2-wal", "cache_2_profile"]
+        )
+        assert events == [1]
+        assert registry.update(paths[2], 1500) == 1000
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from date_a_scientist.charts import ChartStore, find_chart_path
+from tests import BaseTestCase
+
+
+class TestChartStore(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.chart_path = os.path.join(self.tmp_dir.name, "exports", "charts", "temp_chart.png")
+        os.makedirs(os.path.dirname(self.chart_path))
+        self.store = ChartStore(os.path.join(self.tmp_dir.name, ".date_a_scientist_cache_charts"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _render(self, content: bytes) -> None:
+        with open(self.chart_path, "wb") as chart_file:
+            chart_file.write(content)
+
+    def test_put__stores_charts_by_content(self):
+        # GIVEN
+        self._render(b"first chart")
+        first_key = self.store.put(self.chart_path)
+
+        # WHEN
+        self._render(b"second chart")
+        second_key = self.store.put(self.chart_path)
+        self._render(b"first chart")
+        third_key = self.store.put(self.chart_path)
+
+        # THEN
+        assert first_key.endswith(".png")
+        assert first_key == third_key != second_key
+        assert len(os.listdir(self.store.directory)) == 2
+        with open(self.store.get(first_key), "rb") as chart_file:
+            assert chart_file.read() == b"first chart"
+
+    def test_put__missing_chart(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert self.store.put(self.chart_path) is None
+        assert self.store.get("missing.png") is None
+
+    def test_remove(self):
+        # GIVEN
+        self._render(b"first chart")
+        first_key = self.store.put(self.chart_path)
+        self._render(b"second")
+        second_key = self.store.put(self.chart_path)
+        size_before = self.store.size_bytes
+
+        # WHEN
+        self.store.remove({first_key, "missing.png"})
+
+        # THEN
+        assert size_before == len(b"first chart") + len(b"second")
+        assert self.store.get(first_key) is None
+        assert self.store.get(second_key) is not None
+        assert self.store.size_bytes == self.store.size_of(second_key) == len(b"second")
+
+    def test_clear(self):
+        # GIVEN
+        self._render(b"chart")
+        key = self.store.put(self.chart_path)
+
+        # WHEN
+        self.store.clear()
+
+        # THEN
+        assert self.store.get(key) is None
+        assert not os.path.exists(self.store.directory)
+
+    def test_find_chart_path(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert find_chart_path("/home/me/exports/charts/temp_chart.png") == "/home/me/exports/charts/temp_chart.png"
+        assert find_chart_path("Alice") is None
+        assert find_chart_path(42) is None
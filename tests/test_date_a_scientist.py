@@ -1,8 +1,15 @@
+import asyncio
+import hashlib
 import os
+import pickle
+import tempfile
+import time
+from types import SimpleNamespace
 from unittest.mock import call
 
 import pandas as pd
 import pytest
+import requests
 
 from date_a_scientist import DateAScientist
 from tests import BaseTestCase
@@ -45,6 +52,7 @@ class TestDateAScientist(BaseTestCase):
         ds = DateAScientist(
             df="http://some.data/here.csv?sep=%3B&encoding=utf-8",
             llm_openai_api_token=self.openai_api_token,
+            download_cache_dir=None,
         )
 
         # THEN
@@ -66,12 +74,39 @@ class TestDateAScientist(BaseTestCase):
         ds = DateAScientist(
             df="http://some.data/here.csv?what=A&sep=%3B&encoding=utf-8",
             llm_openai_api_token=self.openai_api_token,
+            download_cache_dir=None,
         )
 
         # THEN
         assert ds.chat("What is the name of the first person?") == "Alice"
         assert read_csv.call_args_list == [call("http://some.data/here.csv?what=A", encoding="utf-8", sep=";")]
 
+    def test_data_scientist__read_df_from_url__is_lazy(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Alice')")
+        self.mocker.patch.object(Agent, "chat", return_value="Alice")
+        read_csv = self.mocker.patch.object(pd, "read_csv")
+        read_csv.return_value = pd.DataFrame([{"name": "Alice", "age": 25, "city": "New York"}])
+        # the dataset is versioned by its ETag, asked with a HEAD request
+        head_response = SimpleNamespace(ok=True, headers={"ETag": '"1"'})
+        self.mocker.patch.object(requests.Session, "head", return_value=head_response)
+        url = "http://some.data/lazy.csv?usecols=name,age"
+        DateAScientist(df=url, llm_openai_api_token=self.openai_api_token, download_cache_dir=None).clean_cache()
+
+        # WHEN
+        ds = DateAScientist(df=url, llm_openai_api_token=self.openai_api_token, download_cache_dir=None)
+        ds.chat("What is the name of the first person?")
+        cached_ds = DateAScientist(df=url, llm_openai_api_token=self.openai_api_token, download_cache_dir=None)
+        cached_ds.chat("What is the name of the first person?")
+
+        # THEN
+        assert read_csv.call_args_list == [
+            call("http://some.data/lazy.csv", encoding="utf-8", sep=",", usecols=["name", "age"])
+        ]
+        ds.clean_cache()
+
     def test_data_scientist__with_column_descriptions(self):
         # GIVEN
         df = pd.DataFrame(
@@ -236,6 +271,27 @@ class TestDateAScientist(BaseTestCase):
         assert len(agent_get_code.call_args_list) == 1
         assert len(agent_chat.call_args_list) == 1
 
+    def test_data_scientist__adopts_the_pickled_cache_of_older_versions(self):
+        # GIVEN
+        df = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}])
+        legacy_answer = {"result": "Alice", "code": "df.name[0]"}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, ".date_a_scientist_cache")
+            legacy_path = f"{cache_path}_{hashlib.md5(df.to_csv(index=False).encode()).hexdigest()}"
+            other_legacy_path = f"{cache_path}_{'0' * 32}"
+            for path in (legacy_path, other_legacy_path):
+                with open(path, "wb") as cache_file:
+                    pickle.dump({"What is the name of the first person?": legacy_answer}, cache_file)
+
+            # WHEN
+            ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, cache_path=cache_path)
+
+            # THEN
+            assert ds.get_cache() == {"What is the name of the first person?": legacy_answer}
+            assert not os.path.exists(legacy_path)
+            assert os.path.exists(other_legacy_path)
+
     def test_data_scientist__cache_disabled(self):
 
         # GIVEN
@@ -269,6 +325,658 @@ class TestDateAScientist(BaseTestCase):
         assert len(agent_get_code.call_args_list) == 5
         assert len(agent_chat.call_args_list) == 5
 
+    def test_data_scientist__cache_hits_normalized_question(self):
+
+        # GIVEN
+        from date_a_scientist import Agent
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Charlie')")
+        agent_chat = self.mocker.patch.object(Agent, "chat", return_value="Charlie")
+
+        df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Bob", "age": 30, "city": "Los Angeles"},
+                {"name": "Charlie", "age": 35, "city": "Chicago"},
+            ]
+        )
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token)
+        ds.clean_cache()
+
+        # WHEN
+        ds.chat("Who lives in Chicago?")
+        ds.chat("who lives in chicago")
+        ds.chat("Who lives in Chicago?")
+
+        # THEN
+        assert len(agent_chat.call_args_list) == 1
+        assert ds.get_cache(with_stats=True)["stats"] == {
+            "hits_exact": 1,
+            "hits_normalized": 1,
+            "hits_similar": 0,
+            "misses": 1,
+            "code_replays": 0,
+            "failure_hits": 0,
+            "evictions": 0,
+            "hits": 2,
+        }
+
+    def test_data_scientist__large_results_are_returned_as_dataframes(self):
+        # GIVEN
+        from date_a_scientist import Agent
+        from date_a_scientist.cache import ArrowResult
+
+        large_df = pd.DataFrame({"age": range(200_000)})
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="result = df")
+        self.mocker.patch.object(Agent, "chat", return_value=large_df)
+        ds = DateAScientist(df=pd.DataFrame([{"age": 25}]), llm_openai_api_token=self.openai_api_token)
+        ds.clean_cache()
+
+        # WHEN
+        ds.chat("Show all ages")
+        result = ds.chat("Show all ages")
+
+        # THEN
+        pd.testing.assert_frame_equal(result, large_df)
+        assert isinstance(ds.get_cache()["Show all ages"]["result"], ArrowResult)
+        ds.clean_cache()
+
+    def test_data_scientist__charts_are_served_from_cache(self):
+
+        # GIVEN
+        from IPython.display import Image
+
+        from date_a_scientist import Agent
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_path = os.path.join(tmp_dir, "exports", "charts", "temp_chart.png")
+            os.makedirs(os.path.dirname(chart_path))
+
+            def render_chart(q):
+                # pandasai renders every chart to the same file
+                with open(chart_path, "wb") as chart_file:
+                    chart_file.write(q.encode())
+                return chart_path
+
+            self.mocker.patch.object(Agent, "get_code_from_agent", return_value="df.plot()")
+            agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=render_chart)
+
+            ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Alice", "age": 25}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=os.path.join(tmp_dir, ".date_a_scientist_cache"),
+            )
+            ds.chat("Plot the ages")
+            ds.chat("Plot the names")
+
+            # WHEN
+            chart = ds.chat("Plot the ages")
+
+            # THEN
+            assert len(agent_chat.call_args_list) == 2
+            assert isinstance(chart, Image)
+            assert chart.data == b"Plot the ages, do not print the result"
+            assert ds.get_cache(with_stats=True)["stats"]["hits_exact"] == 1
+
+    def test_data_scientist__cache_budget_evicts_caches_of_older_dataframes(self):
+
+        # GIVEN
+        from date_a_scientist import Agent
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print(df.name[0])")
+        agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=lambda q: "x" * 20_000)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, ".date_a_scientist_cache")
+            old_ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Alice"}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=cache_path,
+                cache_max_bytes=60_000,
+            )
+            new_ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Bob"}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=cache_path,
+                cache_max_bytes=60_000,
+            )
+            old_ds.chat("What is the name of the first person?")
+
+            # WHEN
+            new_ds.chat("What is the name of the first person?")
+            new_ds.chat("Who is the first person?")
+
+            # THEN
+            assert old_ds.get_cache() == {}
+            assert len(new_ds.get_cache()) == 2
+            assert new_ds.stats()["counters"]["cache.evicted_caches"] == 1
+            old_ds.chat("What is the name of the first person?")
+            assert len(agent_chat.call_args_list) == 4
+
+    def test_data_scientist__charts_count_towards_the_cache_budget(self):
+
+        # GIVEN
+        from date_a_scientist import Agent
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_path = os.path.join(tmp_dir, "exports", "charts", "temp_chart.png")
+            os.makedirs(os.path.dirname(chart_path))
+
+            def render_chart(q):
+                with open(chart_path, "wb") as chart_file:
+                    chart_file.write((q.encode() * 1000)[:20_000])
+                return chart_path
+
+            self.mocker.patch.object(Agent, "get_code_from_agent", return_value="df.plot()")
+            self.mocker.patch.object(Agent, "chat", side_effect=render_chart)
+            ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Alice", "age": 25}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=os.path.join(tmp_dir, ".date_a_scientist_cache"),
+                cache_max_bytes=70_000,
+            )
+            charts_dir = f"{ds._cache_path}_charts"
+
+            # WHEN
+            for column in ["ages", "names", "ids", "cities"]:
+                ds.chat(f"Plot the {column}")
+
+            # THEN
+            entries = ds.get_cache()
+            assert "Plot the ages" not in entries
+            assert sorted(os.listdir(charts_dir)) == sorted(answer["chart"] for answer in entries.values())
+            assert len(entries) == 3
+            assert ds._chart_store.size_bytes == 60_000
+            ds.clean_cache()
+            assert not os.path.exists(charts_dir)
+
+    def test_data_scientist__charts_of_evicted_answers_are_removed(self):
+
+        # GIVEN
+        from date_a_scientist import Agent
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chart_path = os.path.join(tmp_dir, "exports", "charts", "temp_chart.png")
+            os.makedirs(os.path.dirname(chart_path))
+
+            def render_chart(q):
+                with open(chart_path, "wb") as chart_file:
+                    chart_file.write(q.encode())
+                return chart_path
+
+            self.mocker.patch.object(Agent, "get_code_from_agent", return_value="df.plot()")
+            self.mocker.patch.object(Agent, "chat", side_effect=render_chart)
+            ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Alice", "age": 25}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=os.path.join(tmp_dir, ".date_a_scientist_cache"),
+                cache_max_entries=1,
+            )
+
+            to_dict = self.mocker.spy(ds._cache, "to_dict")
+
+            # WHEN
+            ds.chat("Plot the ages")
+            ds.chat("Plot the names")
+
+            # THEN
+            assert to_dict.call_count == 0
+            assert os.listdir(f"{ds._cache_path}_charts") == [ds.get_cache()["Plot the names"]["chart"]]
+
+    #
+    # ASYNC CHAT
+    #
+    def test_data_scientist__achat_many__runs_questions_concurrently(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        def slow_chat(query):
+            time.sleep(0.5)
+            return query.split(",")[0].upper()
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Alice')")
+        agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=slow_chat)
+
+        df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Bob", "age": 30, "city": "Los Angeles"},
+                {"name": "Charlie", "age": 35, "city": "Chicago"},
+            ]
+        )
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, max_concurrency=4)
+        ds.clean_cache()
+
+        # WHEN
+        start = time.perf_counter()
+        results = asyncio.run(ds.achat_many(["first?", "second?", "third?", "fourth?"]))
+        elapsed = time.perf_counter() - start
+
+        # THEN
+        assert results == ["FIRST?", "SECOND?", "THIRD?", "FOURTH?"]
+        assert len(agent_chat.call_args_list) == 4
+        assert elapsed < 1.5
+        assert asyncio.run(ds.achat("first?")) == "FIRST?"
+        assert len(agent_chat.call_args_list) == 4
+
+    def test_data_scientist__achat__deduplicates_inflight_questions(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        def slow_chat(query):
+            time.sleep(0.3)
+            return "Charlie"
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Charlie')")
+        agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=slow_chat)
+
+        df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Charlie", "age": 35, "city": "Chicago"},
+            ]
+        )
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token)
+        ds.clean_cache()
+
+        # WHEN
+        async def ask():
+            return await asyncio.gather(
+                ds.achat("Who lives in Chicago?"),
+                ds.achat("who lives in chicago"),
+                ds.acode("Who lives in Chicago?", return_as_string=True),
+            )
+
+        results = asyncio.run(ask())
+
+        # THEN
+        assert results == ["Charlie", "Charlie", "print('Charlie')"]
+        assert len(agent_chat.call_args_list) == 1
+
+    def test_data_scientist__achat__timeout(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        def slow_chat(query):
+            time.sleep(0.3)
+            return "Charlie"
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Charlie')")
+        agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=slow_chat)
+
+        df = pd.DataFrame([{"name": "Charlie", "age": 35, "city": "Chicago"}])
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token)
+        ds.clean_cache()
+
+        # WHEN
+        async def ask():
+            with pytest.raises(asyncio.TimeoutError):
+                await ds.achat("Who lives in Chicago?", timeout=0.05)
+
+            # the timed out call keeps running in the background and still fills the cache
+            await asyncio.sleep(0.5)
+
+        asyncio.run(ask())
+
+        # THEN
+        assert ds.chat("Who lives in Chicago?") == "Charlie"
+        assert len(agent_chat.call_args_list) == 1
+
+    #
+    # BATCH CHAT
+    #
+    def test_data_scientist__chat_batch(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        def slow_chat(query):
+            time.sleep(0.3)
+            if query.startswith("broken"):
+                raise RuntimeError("Something went wrong")
+
+            return query.split(",")[0].upper()
+
+        self.mocker.patch.object(Agent, "get_code_from_agent", return_value="print('Alice')")
+        agent_chat = self.mocker.patch.object(Agent, "chat", side_effect=slow_chat)
+
+        df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Bob", "age": 30, "city": "Los Angeles"},
+            ]
+        )
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token)
+        ds.clean_cache()
+        ds.chat("cached?")
+
+        # WHEN
+        start = time.perf_counter()
+        questions = ["first?", "cached?", "broken?", "second?", "First?", "third?"]
+        answers = ds.chat_batch(questions, max_workers=5)
+        elapsed = time.perf_counter() - start
+
+        # THEN
+        assert [answer.question for answer in answers] == questions
+        assert [answer.result for answer in answers] == ["FIRST?", "CACHED?", None, "SECOND?", "FIRST?", "THIRD?"]
+        assert [answer.cached for answer in answers] == [False, True, False, False, False, False]
+        assert [answer.ok for answer in answers] == [True, True, False, True, True, True]
+        assert str(answers[2].error) == "Something went wrong"
+        assert all(answer.elapsed >= 0.3 for answer in answers if not answer.cached)
+        # 1 cached call + 4 unique misses ("first?" and "First?" share a call)
+        assert len(agent_chat.call_args_list) == 5
+        assert elapsed < 1.0
+
+    def test_data_scientist__code_cache_replays_code_on_data_with_the_same_schema(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        generated_code = (
+            "import pandas as pd\n"
+            "df = dfs[0]\n"
+            "total_age = int(df['age'].sum())\n"
+            "result = {'type': 'number', 'value': total_age}"
+        )
+
+        def chat(agent, query):
+            agent.last_code_generated = generated_code
+            return 60
+
+        agent_chat = self.mocker.patch.object(Agent, "chat", autospec=True, side_effect=chat)
+
+        df0 = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 35}])
+        df1 = pd.DataFrame([{"name": "John", "age": 43}, {"name": "Jane", "age": 20}])
+        ds0 = DateAScientist(df=df0, llm_openai_api_token=self.openai_api_token, enable_code_cache=True)
+        ds0.clean_cache()
+        ds1 = DateAScientist(df=df1, llm_openai_api_token=self.openai_api_token, enable_code_cache=True)
+        ds1.clean_cache()
+
+        # WHEN
+        res0 = ds0.chat("What is the total age?")
+        res1 = ds1.chat("What is the total age?")
+
+        # THEN
+        assert res0 == 60
+        assert res1 == 63
+        assert ds1.code("What is the total age?", return_as_string=True) == (
+            "import pandas as pd\ndf = df\ntotal_age = int(df['age'].sum())"
+        )
+        assert len(agent_chat.call_args_list) == 1
+        assert ds1.get_cache(with_stats=True)["stats"]["code_replays"] == 1
+
+    def test_data_scientist__code_cache_falls_back_to_llm_when_replay_fails(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        def chat(agent, query):
+            agent.last_code_generated = (
+                "import pandas as pd\n"
+                "df = dfs[0]\n"
+                "total_age = int(df['age'].sum())\n"
+                "result = {'type': 'number', 'value': total_age}"
+            )
+            return 60
+
+        agent_chat = self.mocker.patch.object(Agent, "chat", autospec=True, side_effect=chat)
+
+        df0 = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 35}])
+        df1 = pd.DataFrame([{"name": "John", "age": "forty three"}, {"name": "Jane", "age": "twenty"}])
+        df1 = df1.astype({"age": df0["age"].dtype}, errors="ignore")
+        ds0 = DateAScientist(df=df0, llm_openai_api_token=self.openai_api_token, enable_code_cache=True)
+        ds0.clean_cache()
+        ds0.chat("What is the total age?")
+        ds1 = DateAScientist(df=df1, llm_openai_api_token=self.openai_api_token, enable_code_cache=True)
+        ds1.clean_cache()
+        ds1._code_cache = ds0._code_cache
+
+        # WHEN
+        ds1.chat("What is the total age?")
+
+        # THEN
+        assert len(agent_chat.call_args_list) == 2
+        assert ds1.get_cache(with_stats=True)["stats"]["code_replays"] == 0
+
+    def test_data_scientist__prompt_uses_profile_built_once_per_data(self):
+        # GIVEN
+        import date_a_scientist
+        from date_a_scientist import Agent
+
+        prompts = []
+
+        def chat(agent, query):
+            prompts.append(agent.context.dfs[0].to_string())
+            return "Chicago"
+
+        self.mocker.patch.object(Agent, "chat", autospec=True, side_effect=chat)
+        build_profile = self.mocker.patch.object(
+            date_a_scientist, "build_profile", wraps=date_a_scientist.build_profile
+        )
+        df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Bob", "age": 30, "city": "Los Angeles"},
+                {"name": "Charlie", "age": 35, "city": "Chicago"},
+            ]
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, ".date_a_scientist_cache")
+            ds = DateAScientist(
+                df=df,
+                column_descriptions={"city": "The city where the person lives"},
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=cache_path,
+            )
+            other_ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, cache_path=cache_path)
+
+            # WHEN
+            ds.chat("Where does Bob live?")
+            other_ds.chat("What is the average age?")
+
+        # THEN
+        assert len(build_profile.call_args_list) == 1
+        assert prompts[0].split("\n")[3] == (
+            "- city: object, unique 3, top New York|Los Angeles|Chicago; The city where the person lives"
+        )
+        assert prompts[1].split("\n")[3].startswith("- age: int64")
+
+    def test_data_scientist__profile_is_stored_with_the_cache_only(self):
+        # GIVEN
+        df = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, ".date_a_scientist_cache")
+            uncached_ds = DateAScientist(
+                df=df, llm_openai_api_token=self.openai_api_token, cache_path=cache_path, enable_cache=False
+            )
+            ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, cache_path=cache_path)
+
+            # WHEN
+            uncached_profile = uncached_ds._profile
+            files_without_cache = os.listdir(tmp_dir)
+            profile = ds._profile
+            files_with_cache = os.listdir(tmp_dir)
+            ds.clean_cache()
+
+            # THEN
+            assert uncached_profile == profile
+            assert not any(filename.endswith("_profile") for filename in files_without_cache)
+            assert any(filename.endswith("_profile") for filename in files_with_cache)
+            assert not os.path.exists(ds._profile_cache_path)
+
+    def test_data_scientist__out_of_core__runs_sql_on_the_file(self):
+        # GIVEN
+        from date_a_scientist import Agent
+
+        prompts = []
+
+        def chat(agent, query):
+            prompts.append(agent.context.dfs[0].to_string())
+            return agent.run_code(
+                "import pandas as pd\n"
+                "df = execute_sql_query("
+                "'SELECT city, avg(age) AS age FROM people GROUP BY city ORDER BY age LIMIT 1')\n"
+                "result = {'type': 'string', 'value': df['city'].iloc[0]}"
+            )
+
+        self.mocker.patch.object(Agent, "chat", autospec=True, side_effect=chat)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "people.parquet")
+            pd.DataFrame(
+                [
+                    {"name": "Alice", "age": 25, "city": "New York"},
+                    {"name": "Bob", "age": 30, "city": "Los Angeles"},
+                    {"name": "Charlie", "age": 35, "city": "Chicago"},
+                ]
+            ).to_parquet(path)
+            read_parquet = self.mocker.patch.object(pd, "read_parquet")
+            ds = DateAScientist(
+                df=path,
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=os.path.join(tmp_dir, ".date_a_scientist_cache"),
+                out_of_core=True,
+            )
+
+            # WHEN
+            result = ds.chat("Where do the youngest people live?")
+            code = ds.code("Where do the youngest people live?", return_as_string=True)
+
+        # THEN
+        assert result == "New York"
+        assert "execute_sql_query" in code
+        assert prompts[0].split("\n")[:2] == ['<table name="people">', "people:3x3"]
+        assert read_parquet.call_count == 0
+
+    def test_data_scientist__out_of_core__needs_a_file(self):
+        # GIVEN
+        df = pd.DataFrame([{"name": "Alice", "age": 25}])
+
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, out_of_core=True)
+
+        # THEN
+        assert str(e.value) == "out_of_core needs a file or URL, a DataFrame is already in memory."
+
+    def test_data_scientist__out_of_core__urls_need_the_download_cache(self):
+        # GIVEN
+        read_csv = self.mocker.patch.object(pd, "read_csv")
+
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            DateAScientist(
+                df="https://example.com/people.csv",
+                llm_openai_api_token=self.openai_api_token,
+                out_of_core=True,
+                prompt_token_budget=500,
+                download_cache_dir=None,
+            )
+
+        # THEN
+        assert str(e.value) == "out_of_core needs a local file or an HTTP(S) URL with the download cache enabled."
+        assert read_csv.call_count == 0
+
+    def test_data_scientist__out_of_core__needs_duckdb(self):
+        # GIVEN
+        import importlib.util
+
+        find_spec = importlib.util.find_spec
+        self.mocker.patch.object(
+            importlib.util, "find_spec", side_effect=lambda name, *args: None if name == "duckdb" else find_spec(name)
+        )
+
+        # WHEN
+        with pytest.raises(ImportError) as e:
+            DateAScientist(
+                df="https://example.com/people.parquet",
+                llm_openai_api_token=self.openai_api_token,
+                out_of_core=True,
+                prompt_token_budget=500,
+            )
+
+        # THEN
+        assert "date-a-scientist[duckdb]" in str(e.value)
+
+    def test_data_scientist__execution_workers__run_code_outside_the_caller(self):
+        # GIVEN
+        from pandasai.pipelines.chat.code_execution import CodeExecution
+
+        from date_a_scientist import Agent
+
+        generated_code = {
+            "What is the total age?": (
+                "total_age = int(dfs[0]['age'].sum())\nresult = {'type': 'number', 'value': total_age}"
+            ),
+            "Run forever": "while True:\n    pass\nresult = {'type': 'number', 'value': 0}",
+        }
+
+        def chat(agent, query):
+            return agent.run_code(generated_code[query.split(",")[0]])
+
+        self.mocker.patch.object(Agent, "chat", autospec=True, side_effect=chat)
+        execute_code_in_process = self.mocker.spy(CodeExecution, "execute_code")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ds = DateAScientist(
+                df=pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 35}]),
+                llm_openai_api_token=self.openai_api_token,
+                cache_path=os.path.join(tmp_dir, ".date_a_scientist_cache"),
+                execution_workers=1,
+                execution_timeout=2,
+            )
+
+            # WHEN
+            result = ds.chat("What is the total age?")
+            with pytest.raises(TimeoutError):
+                ds.chat("Run forever")
+            ds.clean_all_cache()
+
+        # THEN
+        assert result == 60
+        assert execute_code_in_process.call_count == 0
+
+    def test_data_scientist__stats(self):
+        # GIVEN
+        from openai.resources.chat.completions import Completions  # type: ignore[import]
+
+        code = (
+            "```python\n"
+            "import pandas as pd\n"
+            "df = dfs[0]\n"
+            "total_age = int(df['age'].sum())\n"
+            "result = {'type': 'number', 'value': total_age}\n"
+            "```"
+        )
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=code))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120),
+            model="gpt-4o",
+        )
+        self.mocker.patch.object(Completions, "create", return_value=response)
+        events = []
+        df = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 35}])
+        ds = DateAScientist(df=df, llm_openai_api_token=self.openai_api_token, metrics_hooks=[events.append])
+        ds.clean_cache()
+
+        # WHEN
+        ds.chat("What is the total age?")
+        ds.chat("What is the total age?")
+
+        # THEN
+        stats = ds.stats()
+        assert stats["timings"]["chat"]["count"] == 2
+        assert stats["timings"]["cache_lookup"]["count"] == 2
+        assert stats["timings"]["llm"]["count"] == 1
+        for stage in ["data_hash", "agent_build", "pipeline.code_generator", "pipeline.code_execution"]:
+            assert stats["timings"][stage]["p50"] >= 0
+        assert stats["counters"]["llm.prompt_tokens"] == 100
+        assert stats["counters"]["llm.completion_tokens"] == 20
+        assert stats["counters"]["cache.misses"] == 1
+        assert stats["counters"]["cache.hits_exact"] == 1
+        assert stats["gauges"]["cache.bytes"] > 0
+        assert {event.name for event in events} >= {"chat", "llm", "llm.prompt_tokens", "cache.bytes"}
+        ds.clean_cache()
+
     def test_data_scientist__does_not_cache_broken_response(self):
         # GIVEN
         df = pd.DataFrame(
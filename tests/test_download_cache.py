@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+import requests
+
+from date_a_scientist import DateAScientist
+from date_a_scientist.download_cache import DownloadCache
+from date_a_scientist.loader import DatasetLoader
+from tests import BaseTestCase
+
+
+class _DatasetHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        server = self.server
+        server.requests.append(self.path)  # type: ignore[attr-defined]
+
+        body = server.files.get(self.path.split("?")[0])  # type: ignore[attr-defined]
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            server.not_modified += 1  # type: ignore[attr-defined]
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if server.send_validators:  # type: ignore[attr-defined]
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadCache(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "downloads")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _DatasetHandler)
+        self.server.files = {  # type: ignore[attr-defined]
+            "/people.csv": b"name,age,city\nAlice,25,Chicago\nBob,30,Chicago\nCharlie,35,Boston\n",
+            "/columns.json": json.dumps({"name": "The name of the person"}).encode(),
+        }
+        self.server.requests = []  # type: ignore[attr-defined]
+        self.server.not_modified = 0  # type: ignore[attr-defined]
+        self.server.send_validators = True  # type: ignore[attr-defined]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_fetch__revalidates_with_conditional_get(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv"
+
+        # WHEN
+        path = cache.fetch(url)
+        same_path = cache.fetch(url)
+
+        # THEN
+        assert path == same_path
+        assert path.endswith("_people.csv")
+        with open(path, "rb") as body_file:
+            assert body_file.read() == self.server.files["/people.csv"]
+        assert len(self.server.requests) == 2
+        assert self.server.not_modified == 1
+
+    def test_fetch__downloads_changed_body(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv"
+        cache.fetch(url)
+
+        # WHEN
+        self.server.files["/people.csv"] = b"name,age\nDave,40\n"
+        path = cache.fetch(url)
+
+        # THEN
+        with open(path, "rb") as body_file:
+            assert body_file.read() == b"name,age\nDave,40\n"
+        assert self.server.not_modified == 0
+
+    def test_fetch__unreachable_server_uses_downloaded_copy(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv"
+        path = cache.fetch(url)
+        self.mocker.patch.object(requests.Session, "get", side_effect=requests.ConnectionError)
+
+        # WHEN
+        # THEN
+        assert cache.fetch(url) == path
+        with pytest.raises(requests.ConnectionError):
+            cache.fetch(f"{self.base_url}/other.csv")
+
+    def test_fetch__missing_url(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+
+        # WHEN
+        # THEN
+        with pytest.raises(requests.HTTPError):
+            cache.fetch(f"{self.base_url}/missing.csv")
+
+    def test_fingerprint__uses_validators_without_downloading(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv"
+        fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+
+        # WHEN
+        same_fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+        self.server.files["/people.csv"] = b"name,age\nDave,40\n"
+        changed_fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+
+        # THEN
+        assert same_fingerprint == fingerprint
+        assert changed_fingerprint != fingerprint
+        assert not os.path.exists(self.cache_dir)
+
+    def test_fingerprint__changes_with_the_downloaded_content_without_validators(self):
+        # GIVEN
+        self.server.send_validators = False
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv"
+        fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+
+        # WHEN
+        same_fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+        self.server.files["/people.csv"] = b"name,age\nDave,40\n"
+        changed_fingerprint = DatasetLoader(url, download_cache=cache).fingerprint
+
+        # THEN
+        assert fingerprint is not None
+        assert same_fingerprint == fingerprint
+        assert changed_fingerprint != fingerprint
+        assert os.path.exists(self.cache_dir)
+
+    def test_fingerprint__without_download_cache_uses_validators(self):
+        # GIVEN
+        url = f"{self.base_url}/people.csv"
+        fingerprint = DatasetLoader(url).fingerprint
+
+        # WHEN
+        self.server.files["/people.csv"] = b"name,age\nDave,40\n"
+        changed_fingerprint = DatasetLoader(url).fingerprint
+
+        # THEN
+        assert fingerprint is not None
+        assert changed_fingerprint != fingerprint
+        assert DatasetLoader(f"{self.base_url}/missing.csv").fingerprint is None
+
+    def test_load__csv_is_converted_to_parquet_once(self):
+        # GIVEN
+        cache = DownloadCache(self.cache_dir)
+        url = f"{self.base_url}/people.csv?usecols=name,age&downcast=1"
+        read_csv = self.mocker.spy(pd, "read_csv")
+
+        # WHEN
+        df = DatasetLoader(url, download_cache=cache).load()
+        warm_df = DatasetLoader(url, download_cache=cache).load()
+
+        # THEN
+        assert len(read_csv.call_args_list) == 1
+        assert warm_df.equals(df)
+        assert warm_df["age"].dtype == "int8"
+        assert self.server.requests == ["/people.csv", "/people.csv"]
+        assert any(filename.endswith(".parquet") for filename in os.listdir(self.cache_dir))
+
+    def test_date_a_scientist__uses_download_cache(self):
+        # GIVEN
+        ds = DateAScientist(
+            df=f"{self.base_url}/people.csv",
+            column_descriptions=f"{self.base_url}/columns.json",
+            llm_openai_api_token=self.openai_api_token,
+            download_cache_dir=self.cache_dir,
+        )
+
+        # WHEN
+        df = ds._df
+        other_ds = DateAScientist(
+            df=f"{self.base_url}/people.csv",
+            column_descriptions=f"{self.base_url}/columns.json",
+            llm_openai_api_token=self.openai_api_token,
+            download_cache_dir=self.cache_dir,
+        )
+
+        # THEN
+        assert list(df["name"]) == ["Alice", "Bob", "Charlie"]
+        assert other_ds._column_descriptions == {"name": "The name of the person"}
+        assert other_ds._df.equals(df)
+        # fingerprints come from HEAD requests, only the second instance's downloads are revalidated
+        assert self.server.not_modified == 2
+        ds.clean_cache()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from date_a_scientist.duckdb_dataset import DuckDBDataset, table_name_for
+from date_a_scientist.loader import DatasetLoader
+from tests import BaseTestCase
+
+
+class TestDuckDBDataset(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "Chicago"},
+                {"name": "Bob", "age": 30, "city": "Chicago"},
+                {"name": "Charlie", "age": 35, "city": None},
+                {"name": "Dave", "age": 40, "city": "Boston"},
+            ]
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_query__parquet(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.parquet")
+        self.df.to_parquet(path)
+        read_parquet = self.mocker.patch.object(pd, "read_parquet")
+        dataset = DuckDBDataset(DatasetLoader(path))
+
+        # WHEN
+        result = dataset.query("SELECT city, sum(age) AS age FROM people GROUP BY city ORDER BY age")
+
+        # THEN
+        assert result.to_dict("records") == [
+            {"city": None, "age": 35},
+            {"city": "Boston", "age": 40},
+            {"city": "Chicago", "age": 55},
+        ]
+        assert read_parquet.call_count == 0
+
+    def test_query__csv_with_hints(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.to_csv(path, sep=";", index=False)
+        dataset = DuckDBDataset(DatasetLoader(f"{path}?sep=%3B&usecols=name,age"))
+
+        # WHEN
+        result = dataset.query("SELECT * FROM people WHERE age > 30")
+
+        # THEN
+        assert result.to_dict("records") == [{"name": "Charlie", "age": 35}, {"name": "Dave", "age": 40}]
+
+    def test_query__feather(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.feather")
+        self.df.to_feather(path)
+        dataset = DuckDBDataset(DatasetLoader(path))
+
+        # WHEN
+        result = dataset.query("SELECT count(*) AS n FROM people WHERE city = 'Chicago'")
+
+        # THEN
+        assert result["n"].tolist() == [2]
+
+    def test_schema(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.parquet")
+        self.df.to_parquet(path)
+        dataset = DuckDBDataset(DatasetLoader(path))
+
+        # WHEN
+        schema = dataset.schema
+
+        # THEN
+        assert len(schema) == 0
+        assert schema.dtypes.astype(str).to_dict() == {"name": "object", "age": "int64", "city": "object"}
+
+    def test_build_profile(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.parquet")
+        self.df.to_parquet(path)
+        dataset = DuckDBDataset(DatasetLoader(path))
+
+        # WHEN
+        profile = dataset.build_profile(top_k=2)
+
+        # THEN
+        assert profile["rows"] == 4
+        assert profile["columns"][1] == {
+            "name": "age",
+            "type": "BIGINT",
+            "unique": 4,
+            "null_rate": 0.0,
+            "min": "25",
+            "max": "40",
+        }
+        assert profile["columns"][2] == {
+            "name": "city",
+            "type": "VARCHAR",
+            "unique": 2,
+            "null_rate": 0.25,
+            "top": ["Chicago", "Boston"],
+        }
+
+    def test_init__dtype_hints_are_not_supported(self):
+        # GIVEN
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            DuckDBDataset(DatasetLoader("people.csv?dtype=age:int32"))
+
+        # THEN
+        assert str(e.value) == "dtype and downcast hints are not supported out of core, cast in the query instead."
+
+    def test_table_name_for(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert table_name_for("data/Daily Events.parquet") == "daily_events"
+        assert table_name_for("https://some.data/2024.csv?sep=%3B") == "t_2024"
+        assert table_name_for("") == "dataset"
@@ -0,0 +1,169 @@
+import sqlite3
+
+import httpx
+import openai
+import pandas as pd
+
+from date_a_scientist.exceptions import ModelNotFoundError
+from date_a_scientist.failures import (
+    CONFIGURATION,
+    FAILURE_TTL_MAX,
+    QUESTION,
+    TRANSIENT,
+    Failure,
+    classify_exception,
+    failure_ttl,
+)
+from tests import BaseTestCase, FakeOpenAIServer, FakeOpenAITestCase
+
+BROKEN_RESPONSE = """```python
+df = dfs[0]
+total = int(df["salary"].sum())
+
+# Declare result var:
+result = {"type": "number", "value": total}
+```
+"""
+
+
+def _api_error(error_class: type, status_code: int) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://localhost/v1/chat/completions")
+    return error_class("error", response=httpx.Response(status_code, request=request), body=None)
+
+
+class TestClassifyException(BaseTestCase):
+    def test_classify_exception(self):
+        # GIVEN
+        exceptions = [
+            _api_error(openai.RateLimitError, 429),
+            _api_error(openai.InternalServerError, 500),
+            openai.APIConnectionError(request=httpx.Request("POST", "http://localhost")),
+            _api_error(openai.AuthenticationError, 401),
+            ModelNotFoundError("no access"),
+            KeyError("salary"),
+        ]
+
+        # WHEN
+        failures = [classify_exception(exception) for exception in exceptions]
+
+        # THEN
+        assert [failure.kind for failure in failures] == [
+            TRANSIENT,
+            TRANSIENT,
+            TRANSIENT,
+            CONFIGURATION,
+            CONFIGURATION,
+            QUESTION,
+        ]
+        assert failures[-1] == Failure(QUESTION, "KeyError", "'salary'")
+        assert [failure.is_cacheable for failure in failures] == [False] * 5 + [True]
+
+    def test_failure_ttl__doubles_up_to_the_maximum(self):
+        # GIVEN
+        # WHEN
+        ttls = [failure_ttl(failures, 60, max_ttl=300) for failures in range(1, 5)]
+
+        # THEN
+        assert ttls == [60, 120, 240, 300]
+
+
+class TestFailureCache(FakeOpenAITestCase):
+    def setUp(self):
+        super().setUp()
+        self.df = pd.DataFrame([{"name": "Alice"}])
+
+    def _start_server(self) -> FakeOpenAIServer:
+        return FakeOpenAIServer(response=BROKEN_RESPONSE).start()
+
+    def test_chat__failing_question_is_answered_from_the_failure_cache(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        first = ds.chat("What is the total salary?")
+        llm_requests = len(self.server.requests)
+
+        # WHEN
+        second = ds.chat("What is the total salary?")
+        batch = ds.chat_batch(["What is the total salary?"])
+
+        # THEN
+        assert first.startswith("Unfortunately, I was not able to answer your question")
+        assert "salary" in first
+        assert second == first
+        assert batch[0].result == first
+        assert batch[0].cached
+        assert len(self.server.requests) == llm_requests
+        assert ds.get_cache() == {}
+        assert ds.get_cache(with_stats=True)["stats"]["failure_hits"] == 2
+
+    def test_chat__failure_expires_with_growing_ttl(self):
+        # GIVEN
+        now = [1000.0]
+        self.mocker.patch("date_a_scientist.time.time", side_effect=lambda: now[0])
+        ds = self._ds(self.df, failure_cache_ttl=60)
+        ds.chat("What is the total salary?")
+        llm_requests = len(self.server.requests)
+
+        # WHEN
+        now[0] += 61
+        ds.chat("What is the total salary?")
+        requests_after_first_ttl = len(self.server.requests)
+        now[0] += 61
+        ds.chat("What is the total salary?")
+        requests_within_second_ttl = len(self.server.requests)
+
+        # THEN
+        assert requests_after_first_ttl == 2 * llm_requests
+        assert requests_within_second_ttl == requests_after_first_ttl
+        assert ds._failure_cache.get("What is the total salary?")["failures"] == 2
+
+    def test_chat__failures_are_dropped_after_the_longest_backoff(self):
+        # GIVEN
+        now = [1000.0]
+        self.mocker.patch("date_a_scientist.time.time", side_effect=lambda: now[0])
+        ds = self._ds(self.df)
+        ds.chat("What is the total salary?")
+
+        # WHEN
+        now[0] += FAILURE_TTL_MAX + 1
+        ds.chat("What is the total age?")
+
+        # THEN
+        assert "What is the total salary?" not in ds._failure_cache
+        assert "What is the total age?" in ds._failure_cache
+
+    def test_chat__failures_count_towards_the_cache_budget(self):
+        # GIVEN
+        ds = self._ds(self.df, cache_max_bytes=10 * 1024**2)
+
+        # WHEN
+        ds.chat("What is the total salary?")
+
+        # THEN
+        with sqlite3.connect(ds._cache_registry.path) as connection:
+            sizes = dict(connection.execute("SELECT path, size_bytes FROM caches").fetchall())
+        connection.close()
+        assert sizes[ds._failure_cache.path] == ds._failure_cache.size_bytes > 0
+
+    def test_chat__changed_data_asks_again(self):
+        # GIVEN
+        self._ds(self.df).chat("What is the total salary?")
+        llm_requests = len(self.server.requests)
+
+        # WHEN
+        result = self._ds(pd.DataFrame([{"name": "Alice", "salary": 10}])).chat("What is the total salary?")
+
+        # THEN
+        assert result == 10
+        assert len(self.server.requests) == llm_requests + 1
+
+    def test_chat__failure_cache_disabled(self):
+        # GIVEN
+        ds = self._ds(self.df, failure_cache_ttl=None)
+        ds.chat("What is the total salary?")
+        llm_requests = len(self.server.requests)
+
+        # WHEN
+        ds.chat("What is the total salary?")
+
+        # THEN
+        assert len(self.server.requests) == 2 * llm_requests
@@ -0,0 +1,132 @@
+import pandas as pd
+import pytest
+
+from date_a_scientist.fingerprint import chunked_fingerprint, generate_data_hash, generate_schema_hash
+from tests import BaseTestCase
+
+
+class TestGenerateDataHash(BaseTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "New York"},
+                {"name": "Bob", "age": 30, "city": "Los Angeles"},
+                {"name": "Charlie", "age": 35, "city": "Chicago"},
+            ]
+        )
+
+    def test_generate_data_hash__is_deterministic(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert generate_data_hash(self.df) == generate_data_hash(self.df.copy())
+        assert len(generate_data_hash(self.df)) == 32
+
+    def test_generate_data_hash__none(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert generate_data_hash(None) == ""
+
+    def test_generate_data_hash__does_not_depend_on_chunk_size(self):
+        # GIVEN
+        df = pd.DataFrame({"a": range(1_000), "b": [str(i) for i in range(1_000)]})
+
+        # WHEN
+        # THEN
+        assert generate_data_hash(df, mode="full", chunk_size=7) == generate_data_hash(
+            df, mode="full", chunk_size=1_000
+        )
+
+    def test_generate_data_hash__detects_changes_outside_the_sample(self):
+        # GIVEN
+        df = pd.DataFrame({"a": range(50_000)})
+        changed_df = df.copy()
+        sampled_rows = set(df.sample(n=10_000, random_state=42).index)
+        unsampled_row = next(i for i in range(len(df)) if i not in sampled_rows)
+        changed_df.loc[unsampled_row, "a"] = -1
+
+        # WHEN
+        # THEN
+        assert generate_data_hash(df, mode="sample") == generate_data_hash(changed_df, mode="sample")
+        assert generate_data_hash(df, mode="full") != generate_data_hash(changed_df, mode="full")
+
+    def test_generate_data_hash__includes_schema(self):
+        # GIVEN
+        renamed_df = self.df.rename(columns={"city": "town"})
+        retyped_df = self.df.astype({"age": "float64"})
+
+        # WHEN
+        # THEN
+        assert generate_data_hash(self.df) != generate_data_hash(renamed_df)
+        assert generate_data_hash(self.df) != generate_data_hash(retyped_df)
+
+    def test_generate_data_hash__unhashable_cells(self):
+        # GIVEN
+        df = pd.DataFrame({"tags": [["a", "b"], ["c"]], "meta": [{"x": 1}, {"x": 2}]})
+        changed_df = pd.DataFrame({"tags": [["a", "b"], ["d"]], "meta": [{"x": 1}, {"x": 2}]})
+
+        # WHEN
+        # THEN
+        assert generate_data_hash(df) != generate_data_hash(changed_df)
+
+    def test_generate_data_hash__invalid_mode(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        with pytest.raises(ValueError) as e:
+            generate_data_hash(self.df, mode="whatever")
+
+        assert str(e.value) == "Invalid fingerprint mode: whatever. Allowed modes: ['full', 'sample', 'chunked']"
+
+    def test_generate_schema_hash__ignores_values(self):
+        # GIVEN
+        other_df = pd.DataFrame([{"name": "John", "age": 43, "city": "Chicago"}])
+
+        # WHEN
+        # THEN
+        assert generate_schema_hash(self.df) == generate_schema_hash(other_df)
+        assert generate_schema_hash(self.df) != generate_schema_hash(self.df.astype({"age": "float64"}))
+
+
+class TestChunkedFingerprint(BaseTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"a": range(1_000), "b": [str(i) for i in range(1_000)]})
+
+    def test_extend__same_as_fingerprinting_the_whole_frame(self):
+        # GIVEN
+        fingerprint = chunked_fingerprint(self.df.iloc[:650], block_size=100)
+
+        # WHEN
+        extended = fingerprint.extend(self.df)
+
+        # THEN
+        assert extended == chunked_fingerprint(self.df, block_size=100)
+        assert extended.root != fingerprint.root
+        assert len(extended.blocks) == 10
+
+    def test_is_appended_by(self):
+        # GIVEN
+        fingerprint = chunked_fingerprint(self.df.iloc[:650], block_size=100)
+        last_block_edited = self.df.copy()
+        last_block_edited.loc[649, "a"] = -1
+        first_block_edited = self.df.copy()
+        first_block_edited.loc[0, "a"] = -1
+
+        # WHEN
+        # THEN
+        assert fingerprint.is_appended_by(self.df)
+        assert fingerprint.is_appended_by(self.df.iloc[:650])
+        assert not fingerprint.is_appended_by(self.df.iloc[:600])
+        assert not fingerprint.is_appended_by(last_block_edited)
+        assert not fingerprint.is_appended_by(self.df.astype({"a": float}))
+        # only the last block is compared unless asked for all of them
+        assert fingerprint.is_appended_by(first_block_edited)
+        assert not fingerprint.is_appended_by(first_block_edited, verify_all=True)
+
+    def test_generate_data_hash__chunked(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert generate_data_hash(self.df, mode="chunked") == chunked_fingerprint(self.df).root
+        assert generate_data_hash(self.df, mode="chunked") != generate_data_hash(self.df.iloc[:-1], mode="chunked")
@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+from tests import BaseTestCase
+
+HEAVY_MODULES = ["pandasai", "openai", "pygments", "requests", "validators"]
+
+
+class TestImports(BaseTestCase):
+    def _imported_heavy_modules(self, script: str) -> list[str]:
+        # a fresh interpreter, since this one has imported everything already
+        script = textwrap.dedent(script) + textwrap.dedent(
+            f"""
+            import json, sys
+            print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))
+            """
+        )
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_import__does_not_import_heavy_dependencies(self):
+        # GIVEN
+        # WHEN
+        modules = self._imported_heavy_modules("import date_a_scientist")
+
+        # THEN
+        assert modules == []
+
+    def test_cached_chat__does_not_import_heavy_dependencies(self):
+        # GIVEN
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            script = f"""
+                import pandas as pd
+                from date_a_scientist import DateAScientist
+
+                df = pd.DataFrame([{{"name": "Alice", "age": 25}}])
+                ds = DateAScientist(df=df, cache_path="{tmp_dir}/.date_a_scientist_cache")
+                ds._cache.set("What is the name of the first person?", {{"result": "Alice", "code": "df.name[0]"}})
+                assert ds.chat("What is the name of the first person?") == "Alice"
+                assert ds.code("What is the name of the first person?", return_as_string=True) == "df.name[0]"
+            """
+
+            # WHEN
+            modules = self._imported_heavy_modules(script)
+
+        # THEN
+        assert modules == []
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from date_a_scientist.llm import CustomOpenAI, clear_openai_clients, get_openai_client
+from tests import FakeOpenAITestCase
+
+
+class TestOpenAIClients(FakeOpenAITestCase):
+
+    def test_get_openai_client__one_client_per_token_and_base_url(self):
+        # GIVEN
+        # WHEN
+        client = get_openai_client("sk-a", self.server.base_url)
+
+        # THEN
+        assert get_openai_client("sk-a", self.server.base_url) is client
+        assert get_openai_client("sk-b", self.server.base_url) is not client
+        assert get_openai_client("sk-b", self.server.base_url)._client is client._client
+
+    def test_custom_openai__uses_shared_client(self):
+        # GIVEN
+        # WHEN
+        gpt_4o = CustomOpenAI(api_token="sk-a", model="gpt-4o", api_base=self.server.base_url)
+        gpt_35 = CustomOpenAI(api_token="sk-a", model="gpt-3.5-turbo", api_base=self.server.base_url)
+
+        # THEN
+        assert gpt_4o.client is gpt_35.client
+        assert gpt_4o.client is get_openai_client("sk-a", self.server.base_url).chat.completions
+
+    def test_clear_openai_clients(self):
+        # GIVEN
+        client = get_openai_client("sk-a", self.server.base_url)
+
+        # WHEN
+        clear_openai_clients()
+
+        # THEN
+        assert get_openai_client("sk-a", self.server.base_url) is not client
+
+    def test_instances_reuse_one_connection(self):
+        # GIVEN
+        instances = [self._ds(pd.DataFrame([{"name": name}])) for name in ["Alice", "Bob", "Charlie"]]
+
+        # WHEN
+        results = [ds.chat("What is the name of the first person?") for ds in instances]
+
+        # THEN
+        assert results == ["Alice", "Bob", "Charlie"]
+        assert len(self.server.requests) == 3
+        assert len(set(self.server.client_ports)) == 1
@@ -0,0 +1,182 @@
+import os
+import tempfile
+from unittest.mock import call
+
+import pandas as pd
+import pytest
+
+from date_a_scientist.loader import DatasetLoader, concat_chunks, downcast_df, is_local_dataset
+from tests import BaseTestCase
+
+
+class TestDatasetLoader(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "Chicago"},
+                {"name": "Bob", "age": 30, "city": "Chicago"},
+                {"name": "Charlie", "age": 35, "city": "Boston"},
+                {"name": "Dave", "age": 40, "city": "Boston"},
+            ]
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_init__strips_loader_params_from_url(self):
+        # GIVEN
+        # WHEN
+        loader = DatasetLoader(
+            "http://some.data/here.csv?what=A&sep=%3B&usecols=name,age&dtype=age:int32&chunksize=100&downcast=1"
+        )
+
+        # THEN
+        assert loader.url == "http://some.data/here.csv?what=A"
+        assert loader.sep == ";"
+        assert loader.encoding == "utf-8"
+        assert loader.usecols == ["name", "age"]
+        assert loader.dtype == {"age": "int32"}
+        assert loader.chunksize == 100
+        assert loader.downcast is True
+        assert not loader.is_local
+
+    def test_init__invalid_dtype_hint(self):
+        # GIVEN
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            DatasetLoader("http://some.data/here.csv?dtype=int32")
+
+        # THEN
+        assert str(e.value) == "Invalid dtype hint: int32. Expected <column>:<dtype>."
+
+    def test_init__chunksize_with_pyarrow_engine(self):
+        # GIVEN
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            DatasetLoader("http://some.data/here.csv?chunksize=100&engine=pyarrow")
+
+        # THEN
+        assert str(e.value) == "The chunksize hint can't be combined with engine=pyarrow, please use one of them."
+        assert DatasetLoader("http://some.data/here.csv?chunksize=100&engine=c").engine == "c"
+
+    def test_load__passes_only_given_hints_to_read_csv(self):
+        # GIVEN
+        read_csv = self.mocker.patch.object(pd, "read_csv", return_value=self.df)
+        loader = DatasetLoader("http://some.data/here.csv?usecols=name,age&dtype=age:int32")
+
+        # WHEN
+        loader.load()
+
+        # THEN
+        assert read_csv.call_args_list == [
+            call(
+                "http://some.data/here.csv",
+                encoding="utf-8",
+                sep=",",
+                usecols=["name", "age"],
+                dtype={"age": "int32"},
+            )
+        ]
+
+    def test_load__chunked_csv_is_downcast(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.to_csv(path, index=False)
+        loader = DatasetLoader(f"file://{path}?chunksize=2&downcast=true")
+
+        # WHEN
+        df = loader.load()
+
+        # THEN
+        assert df["age"].dtype == "int8"
+        assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+        assert list(df["city"]) == ["Chicago", "Chicago", "Boston", "Boston"]
+        assert list(df["name"]) == ["Alice", "Bob", "Charlie", "Dave"]
+
+    def test_load__parquet_and_feather_columns(self):
+        # GIVEN
+        parquet_path = os.path.join(self.tmp_dir.name, "people.parquet")
+        feather_path = os.path.join(self.tmp_dir.name, "people.feather")
+        self.df.to_parquet(parquet_path)
+        self.df.to_feather(feather_path)
+
+        # WHEN
+        parquet_df = DatasetLoader(f"{parquet_path}?usecols=name,age").load()
+        feather_df = DatasetLoader(f"file://{feather_path}?usecols=name").load()
+
+        # THEN
+        assert parquet_df.equals(self.df[["name", "age"]])
+        assert feather_df.equals(self.df[["name"]])
+
+    def test_fingerprint__changes_with_file_and_options_without_reading(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.to_csv(path, index=False)
+        read_csv = self.mocker.patch.object(pd, "read_csv")
+        fingerprint = DatasetLoader(path).fingerprint
+
+        # WHEN
+        self.df.head(2).to_csv(path, index=False)
+
+        # THEN
+        assert DatasetLoader(path).fingerprint != fingerprint
+        assert DatasetLoader(path).fingerprint == DatasetLoader(path).fingerprint
+        assert DatasetLoader(f"{path}?usecols=name").fingerprint != DatasetLoader(path).fingerprint
+        assert read_csv.call_args_list == []
+
+    def test_content_fingerprint__hashes_the_file_without_parsing_it(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.to_csv(path, index=False)
+        read_csv = self.mocker.patch.object(pd, "read_csv")
+        fingerprint = DatasetLoader(path).content_fingerprint()
+
+        # WHEN
+        self.df.head(2).to_csv(path, index=False)
+
+        # THEN
+        assert DatasetLoader(path).content_fingerprint() != fingerprint
+        assert read_csv.call_count == 0
+
+    def test_is_local_dataset(self):
+        # GIVEN
+        path = os.path.join(self.tmp_dir.name, "people.parquet")
+        self.df.to_parquet(path)
+
+        # WHEN
+        # THEN
+        assert is_local_dataset(path)
+        assert is_local_dataset(f"file://{path}")
+        assert not is_local_dataset(os.path.join(self.tmp_dir.name, "missing.parquet"))
+        assert not is_local_dataset("http://some.data/here.csv")
+        assert not is_local_dataset("not a dataset")
+
+
+class TestDowncast(BaseTestCase):
+    def test_downcast_df(self):
+        # GIVEN
+        df = pd.DataFrame({"id": [1, 2, 3, 4], "status": ["a", "a", "b", "a"], "name": ["w", "x", "y", "z"]})
+
+        # WHEN
+        downcast = downcast_df(df)
+
+        # THEN
+        assert downcast["id"].dtype == "int8"
+        assert isinstance(downcast["status"].dtype, pd.CategoricalDtype)
+        assert downcast["name"].dtype == object
+        assert df["id"].dtype == "int64"
+
+    def test_concat_chunks__unions_categories(self):
+        # GIVEN
+        chunks = [
+            pd.DataFrame({"city": pd.Categorical(["Chicago", "Chicago"])}),
+            pd.DataFrame({"city": pd.Categorical(["Boston"])}),
+        ]
+
+        # WHEN
+        df = concat_chunks(chunks)
+
+        # THEN
+        assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+        assert list(df["city"]) == ["Chicago", "Chicago", "Boston"]
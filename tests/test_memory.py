@@ -0,0 +1,126 @@
+import pytest
+
+from date_a_scientist.memory import SUMMARY_HEADER, TokenBudgetMemory
+from date_a_scientist.metrics import InMemoryCollector, Metrics
+from tests import BaseTestCase, FakeOpenAITestCase
+
+
+def _conversation_size(request: dict) -> int:
+    # everything but the prompt, which is the last message
+    return sum(len(message["content"]) for message in request["messages"][:-1])
+
+
+class TestTokenBudgetMemory(BaseTestCase):
+    def _memory(self, token_budget: int, turns: int, metrics: Metrics | None = None) -> TokenBudgetMemory:
+        memory = TokenBudgetMemory(token_budget, agent_info="dataframe of people", metrics=metrics)
+        for i in range(turns):
+            memory.add(f"What is the name of person {i}?", is_user=True)
+            memory.add(f"person {i} " + "x" * 100, is_user=False)
+        memory.add("How old is the first person?", is_user=True)
+
+        return memory
+
+    def test_to_openai_messages__within_the_budget(self):
+        # GIVEN
+        memory = self._memory(token_budget=500, turns=2)
+
+        # WHEN
+        messages = memory.to_openai_messages()
+
+        # THEN
+        assert [message["role"] for message in messages] == ["system", "user", "assistant", "user", "assistant", "user"]
+        assert messages[-1]["content"] == "How old is the first person?"
+        assert memory.count() == 5
+
+    def test_to_openai_messages__compacts_older_turns(self):
+        # GIVEN
+        collector = InMemoryCollector()
+        memory = self._memory(token_budget=100, turns=10, metrics=Metrics([collector]))
+
+        # WHEN
+        messages = memory.to_openai_messages()
+
+        # THEN
+        assert sum(len(message["content"]) for message in messages[1:]) <= 100 * 4
+        summary = messages[1]["content"].splitlines()
+        assert summary[0] == SUMMARY_HEADER
+        assert summary[-1] == "- Q: What is the name of person 8? A: person 8 " + "x" * 51 + "..."
+        assert messages[2:] == [
+            {"role": "user", "content": "What is the name of person 9?"},
+            {"role": "assistant", "content": "person 9 " + "x" * 100},
+            {"role": "user", "content": "How old is the first person?"},
+        ]
+        # the turns left out of the summary are dropped for good
+        assert memory.count() == 2 * (len(summary) - 1) + 3
+        gauges = collector.summary()["gauges"]
+        assert gauges["llm.memory_compacted_turns"] == len(summary) - 1
+        assert gauges["llm.memory_tokens"] <= 100 + len("dataframe of people") // 4
+        assert collector.summary()["counters"]["llm.memory_dropped_turns"] == 10 - 1 - (len(summary) - 1)
+
+    def test_to_openai_messages__keeps_a_long_question(self):
+        # GIVEN
+        memory = self._memory(token_budget=10, turns=3)
+        memory.add("?" * 1000, is_user=True)
+
+        # WHEN
+        messages = memory.to_openai_messages()
+
+        # THEN
+        assert messages[1:] == [{"role": "user", "content": "?" * 1000}]
+
+    def test_init__invalid_budget(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        with pytest.raises(ValueError):
+            TokenBudgetMemory(0)
+
+
+class TestConversationMemory(FakeOpenAITestCase):
+
+    def test_chat__conversation_stays_within_the_budget(self):
+        # GIVEN
+        ds = self._ds(memory_token_budget=200)
+
+        # WHEN
+        for i in range(20):
+            ds.chat(f"What is the name of the first person? #{i}")
+
+        # THEN
+        sizes = [_conversation_size(request) for request in self.server.requests]
+        assert sizes[0] < sizes[5]
+        # the first request only sends the question
+        assert max(sizes) <= sizes[0] + 200 * 4
+        assert ds.stats()["counters"]["llm.memory_dropped_turns"] > 0
+
+    def test_chat__unbounded_without_a_budget(self):
+        # GIVEN
+        ds = self._ds(memory_token_budget=None)
+
+        # WHEN
+        for i in range(20):
+            ds.chat(f"What is the name of the first person? #{i}")
+
+        # THEN
+        sizes = [_conversation_size(request) for request in self.server.requests]
+        assert sizes[19] > 2 * sizes[9]
+
+    def test_chat__stateless_questions_send_no_conversation(self):
+        # GIVEN
+        ds = self._ds(stateless=True)
+
+        # WHEN
+        for i in range(3):
+            ds.chat(f"What is the name of the first person? #{i}")
+
+        # THEN
+        conversations = [[m["role"] for m in request["messages"]] for request in self.server.requests]
+        assert conversations == [["user", "user"]] * 3
+        assert "first_name" not in self.server.requests[-1]["messages"][-1]["content"]
+
+    def test_init__invalid_memory_budget(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        with pytest.raises(ValueError):
+            self._ds(memory_token_budget=0)
@@ -0,0 +1,76 @@
+from date_a_scientist.metrics import COUNTER, GAUGE, TIMING, InMemoryCollector, MetricEvent, Metrics, stage_name
+from tests import BaseTestCase
+
+
+class TestMetrics(BaseTestCase):
+    def test_collector__summary(self):
+        # GIVEN
+        collector = InMemoryCollector()
+        metrics = Metrics([collector])
+
+        # WHEN
+        for i in range(1, 101):
+            metrics.timing("llm", i / 100)
+        metrics.increment("cache.misses")
+        metrics.increment("llm.prompt_tokens", 120)
+        metrics.increment("llm.prompt_tokens", 80)
+        metrics.gauge("cache.bytes", 1024)
+        metrics.gauge("cache.bytes", 2048)
+
+        # THEN
+        summary = collector.summary()
+        assert summary["timings"]["llm"]["count"] == 100
+        assert summary["timings"]["llm"]["p50"] == 0.505
+        assert round(summary["timings"]["llm"]["p99"], 4) == 0.9901
+        assert summary["timings"]["llm"]["max"] == 1.0
+        assert summary["counters"] == {"cache.misses": 1, "llm.prompt_tokens": 200}
+        assert summary["gauges"] == {"cache.bytes": 2048}
+
+    def test_collector__keeps_last_samples(self):
+        # GIVEN
+        collector = InMemoryCollector(max_samples=10)
+
+        # WHEN
+        for i in range(100):
+            collector(MetricEvent(TIMING, "chat", i))
+
+        # THEN
+        assert collector.summary()["timings"]["chat"]["count"] == 100
+        assert collector.summary()["timings"]["chat"]["mean"] == 94.5
+
+    def test_collector__reset(self):
+        # GIVEN
+        collector = InMemoryCollector()
+        collector(MetricEvent(COUNTER, "cache.misses", 1))
+        collector(MetricEvent(GAUGE, "cache.bytes", 1))
+
+        # WHEN
+        collector.reset()
+
+        # THEN
+        assert collector.summary() == {"timings": {}, "counters": {}, "gauges": {}}
+
+    def test_metrics__timer_and_failing_hook(self):
+        # GIVEN
+        events = []
+
+        def failing_hook(event):
+            raise RuntimeError("exporter is down")
+
+        metrics = Metrics([failing_hook])
+        metrics.add_hook(events.append)
+
+        # WHEN
+        with metrics.timer("cache_lookup"):
+            pass
+
+        # THEN
+        assert [(event.kind, event.name) for event in events] == [(TIMING, "cache_lookup")]
+        assert events[0].value >= 0
+
+    def test_stage_name(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert stage_name("CodeExecution") == "code_execution"
+        assert stage_name("ValidatePipelineInput") == "validate_pipeline_input"
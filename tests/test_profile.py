@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from date_a_scientist.connector import ProfiledPandasConnector
+from date_a_scientist.profile import CHARS_PER_TOKEN, add_descriptions, build_profile, rank_columns, render_profile
+from tests import BaseTestCase
+
+
+class TestProfile(BaseTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            [
+                {"name": "Alice", "age": 25, "city": "Chicago", "salary": 1000.5},
+                {"name": "Bob", "age": 30, "city": "Chicago", "salary": None},
+                {"name": "Charlie", "age": 35, "city": "Boston", "salary": 3000.0},
+                {"name": "Dave", "age": 40, "city": "Chicago", "salary": 4000.0},
+            ]
+        )
+
+    def test_build_profile(self):
+        # GIVEN
+        # WHEN
+        profile = build_profile(self.df)
+
+        # THEN
+        assert profile["rows"] == 4
+        assert profile["columns"] == [
+            {
+                "name": "name",
+                "type": "object",
+                "unique": 4,
+                "null_rate": 0.0,
+                "top": ["Alice", "Bob", "Charlie", "Dave"],
+            },
+            {
+                "name": "age",
+                "type": "int64",
+                "unique": 4,
+                "null_rate": 0.0,
+                "min": "25",
+                "max": "40",
+                "top": ["25", "30", "35", "40"],
+            },
+            {"name": "city", "type": "object", "unique": 2, "null_rate": 0.0, "top": ["Chicago", "Boston"]},
+            {
+                "name": "salary",
+                "type": "float64",
+                "unique": 3,
+                "null_rate": 0.25,
+                "min": "1000.5",
+                "max": "4000.0",
+                "top": ["1000.5", "3000.0", "4000.0"],
+            },
+        ]
+
+    def test_build_profile__unhashable_and_empty(self):
+        # GIVEN
+        df = pd.DataFrame({"tags": [["a"], ["a"], ["b"]]})
+
+        # WHEN
+        # THEN
+        assert build_profile(df)["columns"][0]["unique"] == 2
+        assert build_profile(df.head(0))["columns"][0]["unique"] == 0
+
+    def test_add_descriptions(self):
+        # GIVEN
+        profile = build_profile(self.df)
+
+        # WHEN
+        described = add_descriptions(profile, {"city": "The city where the person lives"})
+
+        # THEN
+        assert described["columns"][2]["description"] == "The city where the person lives"
+        assert "description" not in profile["columns"][2]
+        assert add_descriptions(profile, None) is profile
+
+    def test_rank_columns__relevant_columns_first(self):
+        # GIVEN
+        profile = add_descriptions(build_profile(self.df), {"salary": "Yearly income in dollars"})
+
+        # WHEN
+        columns = rank_columns(profile["columns"], "What is the average income per city?")
+
+        # THEN
+        assert [column["name"] for column in columns] == ["city", "salary", "name", "age"]
+
+    def test_render_profile(self):
+        # GIVEN
+        profile = add_descriptions(build_profile(self.df), {"city": "The city where the person lives"})
+
+        # WHEN
+        text = render_profile(profile, question="Who lives in Chicago?")
+
+        # THEN
+        assert text == (
+            "<dataframe>\n"
+            "dfs[0]:4x4\n"
+            "columns:\n"
+            "- city: object, unique 2, top Chicago|Boston; The city where the person lives\n"
+            "- name: object, unique 4, top Alice|Bob|Charlie|Dave\n"
+            "- age: int64, unique 4, range 25..40, top 25|30|35|40\n"
+            "- salary: float64, unique 3, nulls 25.0%, range 1000.5..4000.0, top 1000.5|3000.0|4000.0\n"
+            "</dataframe>\n"
+        )
+
+    def test_render_profile__respects_token_budget(self):
+        # GIVEN
+        df = pd.DataFrame({f"column_{i}": np.arange(10) * i for i in range(500)})
+        df["revenue"] = np.arange(10)
+        profile = build_profile(df)
+
+        # WHEN
+        text = render_profile(profile, question="What is the total revenue?", token_budget=200)
+
+        # THEN
+        assert len(text) <= 200 * CHARS_PER_TOKEN + len("</dataframe>\n")
+        assert text.split("\n")[3].startswith("- revenue: int64")
+        assert "\nother columns: column_" in text
+        assert text.endswith("more\n</dataframe>\n")
+
+    def test_connector__renders_profile_for_question(self):
+        # GIVEN
+        connector = ProfiledPandasConnector({"original_df": self.df}, profile=build_profile(self.df), token_budget=50)
+
+        # WHEN
+        connector.question = "How old is everyone?"
+        text = connector.to_string(index=1)
+
+        # THEN
+        assert text.startswith("<dataframe>\ndfs[1]:4x4\ncolumns:\n- name: object")
+        assert "salary" in text
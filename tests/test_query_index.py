@@ -0,0 +1,71 @@
+from date_a_scientist.query_index import TfidfIndex, normalize_question
+from tests import BaseTestCase
+
+
+class TestQueryIndex(BaseTestCase):
+    def test_normalize_question(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert normalize_question("Who lives in Chicago?") == "who lives in chicago"
+        assert normalize_question("  who   LIVES in chicago ") == "who lives in chicago"
+        assert normalize_question("Jakie imię jest ostatnie?!") == "jakie imię jest ostatnie"
+        assert normalize_question('Who is "Bob", the oldest one.') == "who is bob the oldest one"
+
+    def test_normalize_question__keeps_operators_and_signs(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        assert normalize_question("How many have age > 30?") != normalize_question("How many have age < 30?")
+        assert normalize_question("Rows with balance below -5") != normalize_question("Rows with balance below 5")
+        assert normalize_question("Rows with balance below -5.") == "rows with balance below -5"
+        assert normalize_question("Who earns over 2.5k?") == "who earns over 2.5k"
+
+    def test_tfidf_index__most_similar(self):
+        # GIVEN
+        index = TfidfIndex()
+        index.add("q0", "Who lives in Chicago?")
+        index.add("q1", "What is the average age of people?")
+        index.add("q2", "Plot the age distribution")
+
+        # WHEN
+        key, score = index.most_similar("Which people live in Chicago")
+
+        # THEN
+        assert key == "q0"
+        assert 0 < score < 1
+
+    def test_tfidf_index__identical_text_scores_one(self):
+        # GIVEN
+        index = TfidfIndex()
+        index.add("q0", "Who lives in Chicago?")
+        index.add("q1", "What is the average age?")
+
+        # WHEN
+        key, score = index.most_similar("who lives in chicago")
+
+        # THEN
+        assert key == "q0"
+        assert round(score, 6) == 1.0
+
+    def test_tfidf_index__no_shared_terms(self):
+        # GIVEN
+        index = TfidfIndex()
+        index.add("q0", "Who lives in Chicago?")
+
+        # WHEN
+        # THEN
+        assert index.most_similar("average salary") == (None, 0.0)
+
+    def test_tfidf_index__remove(self):
+        # GIVEN
+        index = TfidfIndex()
+        index.add("q0", "Who lives in Chicago?")
+        index.add("q1", "Who lives in Boston?")
+
+        # WHEN
+        index.remove("q0")
+
+        # THEN
+        assert len(index) == 1
+        assert index.most_similar("Who lives in Chicago")[0] == "q1"
@@ -0,0 +1,126 @@
+import pytest
+
+from date_a_scientist.ratelimit import RateLimiter, clear_rate_limiters, parse_duration
+from tests import BaseTestCase, FakeOpenAIServer, FakeOpenAITestCase
+
+
+class TestRateLimiter(BaseTestCase):
+    def test_parse_duration(self):
+        # GIVEN
+        values = ["1s", "6m0s", "20ms", "1h2m3.5s", "2.5", "", "x"]
+
+        # WHEN
+        durations = [parse_duration(value) for value in values]
+
+        # THEN
+        assert durations == [1.0, 360.0, pytest.approx(0.02), 3723.5, 2.5, None, None]
+
+    def test_acquire__queues_calls_over_the_limit(self):
+        # GIVEN
+        sleep = self.mocker.patch("date_a_scientist.ratelimit.time.sleep")
+        limiter = RateLimiter(requests_per_minute=120)
+
+        # WHEN
+        waits = [limiter.acquire(tokens=10) for _ in range(122)]
+
+        # THEN
+        assert waits[:120] == [0] * 120
+        assert waits[120] == pytest.approx(0.5, abs=0.01)
+        assert waits[121] == pytest.approx(1.0, abs=0.01)
+        assert sleep.call_count == 2
+        assert limiter.queue_depth == 0
+
+    def test_acquire__tokens_per_minute(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.ratelimit.time.sleep")
+        limiter = RateLimiter(tokens_per_minute=6000)
+
+        # WHEN
+        first = limiter.acquire(tokens=5000)
+        second = limiter.acquire(tokens=2000)
+
+        # THEN
+        assert first == 0
+        assert second == pytest.approx(10, abs=0.1)
+
+    def test_update__limits_are_learned_from_headers(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.ratelimit.time.sleep")
+        limiter = RateLimiter()
+        assert limiter.acquire(tokens=10) == 0
+
+        # WHEN
+        limiter.update(
+            {
+                "x-ratelimit-limit-requests": "10",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "1s",
+            }
+        )
+        wait = limiter.acquire(tokens=10)
+
+        # THEN
+        assert wait == pytest.approx(1 / 9, abs=0.01)
+        assert limiter.tokens.limit is None
+
+    def test_update__configured_limit_caps_the_headers(self):
+        # GIVEN
+        limiter = RateLimiter(requests_per_minute=60)
+
+        # WHEN
+        limiter.update({"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "99"})
+
+        # THEN
+        assert limiter.requests.limit == 60
+        assert limiter.requests.available == pytest.approx(60, abs=0.1)
+
+    def test_back_off__pauses_all_callers(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.ratelimit.time.sleep")
+        limiter = RateLimiter()
+
+        # WHEN
+        limiter.back_off(attempt=0, headers={"retry-after-ms": "1500"})
+        waits = [limiter.acquire(tokens=10) for _ in range(2)]
+
+        # THEN
+        assert waits == [pytest.approx(1.5, abs=0.01)] * 2
+
+    def test_back_off__jittered_exponential_without_headers(self):
+        # GIVEN
+        self.mocker.patch("date_a_scientist.ratelimit.time.sleep")
+        limiter = RateLimiter()
+
+        # WHEN
+        limiter.back_off(attempt=3)
+        wait = limiter.acquire(tokens=10)
+
+        # THEN
+        assert 0 <= wait <= 4
+
+
+class TestRateLimitedRequests(FakeOpenAITestCase):
+    def setUp(self):
+        clear_rate_limiters()
+        super().setUp()
+
+    def _start_server(self) -> FakeOpenAIServer:
+        return FakeOpenAIServer(requests_limit=4, limit_window=1.0).start()
+
+    def test_chat_batch__requests_queue_at_the_server_limit(self):
+        # GIVEN
+        ds = self._ds()
+        questions = [f"What is the name of the first person? #{i}" for i in range(12)]
+
+        # WHEN
+        answers = ds.chat_batch(questions, max_workers=6)
+
+        # THEN
+        assert [answer.result for answer in answers] == ["Alice"] * 12
+        # only the first requests, sent before the limit was known, are rejected
+        assert self.server.rate_limited <= 2
+        assert len(self.server.requests) == 12 + self.server.rate_limited
+        stats = ds.stats()
+        assert stats["counters"].get("llm.rate_limited", 0) == self.server.rate_limited
+        assert stats["timings"]["llm.rate_limit_wait"]["max"] > 0
+        assert "llm.queue_depth" in stats["gauges"]
@@ -0,0 +1,96 @@
+import pandas as pd
+
+from date_a_scientist.agent import Agent
+from date_a_scientist.streaming import CodeStream
+from tests import RESPONSE, BaseTestCase, FakeOpenAITestCase
+
+
+class TestCodeStream(BaseTestCase):
+    def test_feed__cleans_code_like_clean_code(self):
+        # GIVEN
+        response = RESPONSE.replace(
+            'first_name = df["name"].iloc[0]\n',
+            'dfs = [pd.DataFrame({\n    "name": ["Alice"],\n})]\nplt.savefig("temp_chart.png")\n'
+            + 'first_name = dfs[0]["name"].iloc[0]\n',
+        )
+        code_stream = CodeStream()
+
+        # WHEN
+        chunks = [code_stream.feed(char) for char in response] + [code_stream.close()]
+
+        # THEN
+        expected = Agent.clean_code(
+            None,
+            'import pandas as pd\n\ndf = df\n\nplt.savefig("temp_chart.png")\nplt.close() # HACK\n'
+            'first_name = df["name"].iloc[0]\n\n'
+            '# Declare result var:\nresult = {"type": "string", "value": first_name}',
+        )
+        assert "".join(chunks).rstrip() == expected
+        assert [chunk for chunk in chunks if chunk] == [
+            "import pandas as pd\n\ndf = df\n\n",
+            'plt.savefig("temp_chart.png")\n',
+            "plt.close() # HACK\n",
+            'first_name = df["name"].iloc[0]\n\n',
+        ]
+
+    def test_close__response_without_code_fence(self):
+        # GIVEN
+        code_stream = CodeStream()
+
+        # WHEN
+        code = code_stream.feed("n = len(dfs[0])\nresult = {'type': 'number', 'value': n}\n")
+        code += code_stream.close()
+
+        # THEN
+        assert code == "n = len(df)\n"
+
+
+class TestChatStream(FakeOpenAITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ds = self._ds(pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}]))
+
+    def test_chat_stream__yields_code_before_the_response_is_complete(self):
+        # GIVEN
+        chunks = []
+
+        # WHEN
+        for chunk in self.ds.chat_stream("What is the name of the first person?"):
+            chunks.append(chunk)
+            self.server.first_code_shown.set()
+
+        # THEN
+        assert self.server.streamed_before_end
+        assert self.server.requests[0]["stream"] is True
+        assert chunks[0].code == "import pandas as pd\n\n"
+        assert chunks[-1].final
+        assert chunks[-1].result == "Alice"
+        assert "".join(chunk.code for chunk in chunks[:-1]).rstrip() == chunks[-1].code
+        assert self.ds.stats()["counters"]["llm.completion_tokens"] == 40
+
+    def test_code_stream__cached_answer(self):
+        # GIVEN
+        self.server.first_code_shown.set()
+        list(self.ds.chat_stream("What is the name of the first person?"))
+
+        # WHEN
+        code = list(self.ds.code_stream("What is the name of the first person?"))
+
+        # THEN
+        assert len(self.server.requests) == 1
+        assert code == ['import pandas as pd\n\ndf = df\nfirst_name = df["name"].iloc[0]']
+
+    def test_code_stream__code_cache_replay(self):
+        # GIVEN
+        self.server.first_code_shown.set()
+        df = pd.DataFrame([{"name": "Carol", "age": 41}])
+        first = self._ds(df, enable_code_cache=True)
+        list(first.code_stream("What is the name of the first person?"))
+        second = self._ds(df.assign(age=42), enable_code_cache=True)
+
+        # WHEN
+        code = list(second.code_stream("What is the name of the first person?"))
+
+        # THEN
+        assert len(self.server.requests) == 1
+        assert code == ['import pandas as pd\n\ndf = df\nfirst_name = df["name"].iloc[0]']
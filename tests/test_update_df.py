@@ -0,0 +1,148 @@
+import pandas as pd
+import pytest
+
+import date_a_scientist
+from date_a_scientist import DateAScientist
+from tests import FakeOpenAITestCase
+
+QUESTION = "What is the name of the first person?"
+
+
+class TestUpdateDf(FakeOpenAITestCase):
+    def setUp(self):
+        super().setUp()
+        self.df = pd.DataFrame([{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}])
+
+    def _ds(self, df: pd.DataFrame, **kwargs) -> DateAScientist:
+        return super()._ds(df, fingerprint_mode="chunked", **kwargs)
+
+    def test_update_df__appended_rows_carry_over_answers(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        assert ds.chat(QUESTION) == "Alice"
+        agent = ds._agent
+        appended = pd.concat([self.df, pd.DataFrame([{"name": "Charlie", "age": 35}])], ignore_index=True)
+
+        # WHEN
+        ds.update_df(appended)
+        results = [ds.chat(QUESTION), ds.chat(QUESTION)]
+
+        # THEN
+        assert results == ["Alice", "Alice"]
+        assert len(self.server.requests) == 1
+        assert ds._agent is agent
+        assert len(agent.context.dfs[0].pandas_df) == 3
+        assert ds._profile["rows"] == 3
+        stats = ds.stats()
+        assert stats["counters"]["cache.carried_over"] == 1
+        assert stats["counters"]["cache.hits_exact"] == 1
+        assert stats["counters"]["update_df.rows"] == 1
+        # the same cache as a new instance on the appended data
+        assert ds._cache_path == self._ds(appended)._cache_path
+
+    def test_update_df__new_answers_come_from_the_new_data(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        ds.chat("Warm up the agent")
+
+        # WHEN
+        ds.update_df(self.df.iloc[::-1].reset_index(drop=True))
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert result == "Bob"
+
+    def test_update_df__other_columns_drop_the_answers(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        ds.chat(QUESTION)
+
+        # WHEN
+        ds.update_df(self.df.assign(city="Chicago"))
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert result == "Alice"
+        assert len(self.server.requests) == 2
+        assert "cache.carried_over" not in ds.stats()["counters"]
+
+    def test_update_df__appended_rows_are_profiled(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        assert ds._profile["columns"][1]["max"] == "30"
+
+        # WHEN
+        ds.update_df(pd.concat([self.df, pd.DataFrame([{"name": "Zoe", "age": 99}])], ignore_index=True))
+
+        # THEN
+        assert ds._profile["rows"] == 3
+        assert ds._profile["columns"][1]["max"] == "99"
+        assert "Zoe" in ds._profile["columns"][0]["top"]
+
+    def test_update_df__profile_is_built_when_a_prompt_needs_it(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        ds.chat("Warm up the agent")
+        build_profile = self.mocker.spy(date_a_scientist, "build_profile")
+
+        # WHEN
+        ds.update_df(pd.concat([self.df, pd.DataFrame([{"name": "Zoe", "age": 99}])], ignore_index=True))
+        calls_after_update = build_profile.call_count
+        ds.chat("How old is the oldest person?")
+
+        # THEN
+        assert calls_after_update == 0
+        assert build_profile.call_count == 1
+
+    def test_update_df__edit_the_fingerprint_misses_still_reaches_the_agent(self):
+        # GIVEN
+        df = pd.DataFrame({"name": ["Alice"] * 20_000, "age": range(20_000)})
+        ds = self._ds(df)
+        ds.chat("Warm up the agent")
+        edited = pd.concat([df, pd.DataFrame([{"name": "Zoe", "age": 1}])], ignore_index=True)
+        edited.loc[0, "name"] = "Bob"
+
+        # WHEN
+        # only the block the rows are appended to is hashed again
+        ds.update_df(edited)
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert ds._agent.context.dfs[0].pandas_df is edited
+        assert result == "Bob"
+
+    def test_update_df__edit_of_as_many_rows_drops_the_answers(self):
+        # GIVEN
+        df = pd.DataFrame({"name": ["Alice"] * 20_000, "age": range(20_000)})
+        ds = self._ds(df)
+        assert ds.chat(QUESTION) == "Alice"
+        edited = df.copy()
+        edited.loc[0, "name"] = "Bob"
+
+        # WHEN
+        ds.update_df(edited)
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert result == "Bob"
+        assert ds._data_hash == self._ds(edited)._data_hash
+
+    def test_update_df__same_data(self):
+        # GIVEN
+        ds = self._ds(self.df)
+        cache_path = ds._cache_path
+
+        # WHEN
+        ds.update_df(self.df.copy())
+
+        # THEN
+        assert ds._cache_path == cache_path
+
+    def test_update_df__not_a_dataframe(self):
+        # GIVEN
+        ds = self._ds(self.df)
+
+        # WHEN
+        # THEN
+        with pytest.raises(ValueError):
+            ds.update_df("people.csv")
@@ -0,0 +1,118 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from date_a_scientist import DateAScientist
+from date_a_scientist.warmup import Warmup
+from tests import BaseTestCase, FakeOpenAITestCase
+
+QUESTION = "What is the name of the first person?"
+
+
+class TestWarmup(BaseTestCase):
+    def test_run__failures_stay_in_the_background(self):
+        # GIVEN
+        def answer(q: str) -> dict:
+            if q == "broken":
+                raise KeyError("salary")
+            return {"result": q.upper()}
+
+        def prepare() -> None:
+            raise RuntimeError("no agent")
+
+        warmup = Warmup(prepare, answer, ["broken", "fine"], max_workers=2)
+
+        # WHEN
+        warmup.start()
+        finished = warmup.wait(timeout=5)
+
+        # THEN
+        assert finished
+        assert warmup.take_answer("broken") is None
+        assert warmup.take_answer("Fine?") == {"result": "FINE"}
+        assert warmup.take_answer("not expected") is None
+
+    def test_take_answer__queued_questions_are_left_to_the_caller(self):
+        # GIVEN
+        release = threading.Event()
+        answered = []
+
+        def answer(q: str) -> dict:
+            release.wait(timeout=5)
+            answered.append(q)
+            return {"result": q}
+
+        warmup = Warmup(lambda: None, answer, ["first", "second"], max_workers=1).start()
+
+        # WHEN
+        taken = warmup.take_answer("second")
+        release.set()
+        warmup.wait(timeout=5)
+
+        # THEN
+        assert taken is None
+        assert answered == ["first"]
+        assert warmup.take_answer("first") == {"result": "first"}
+
+    def test_cancel__skips_questions_not_started(self):
+        # GIVEN
+        release = threading.Event()
+        answered = []
+
+        def answer(q: str) -> dict:
+            release.wait(timeout=5)
+            answered.append(q)
+            return {"result": q}
+
+        warmup = Warmup(lambda: None, answer, ["first", "second", "third"], max_workers=1).start()
+
+        # WHEN
+        warmup.cancel()
+        release.set()
+        finished = warmup.wait(timeout=5)
+
+        # THEN
+        assert finished
+        assert len(answered) <= 1
+
+
+class TestDateAScientistWarmup(FakeOpenAITestCase):
+
+    def test_chat__expected_questions_are_served_from_cache(self):
+        # GIVEN
+        ds = self._ds(warmup=True, warmup_questions=[QUESTION, f"{QUESTION} #2"])
+        assert ds.wait_for_warmup(timeout=30)
+        assert "_agent" in ds.__dict__
+
+        # WHEN
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert result == "Alice"
+        assert len(self.server.requests) == 2
+        stats = ds.stats()
+        assert stats["counters"]["warmup.precomputed"] == 2
+        assert stats["counters"]["cache.hits_exact"] == 1
+
+    def test_chat__warmup_errors_do_not_reach_the_caller(self):
+        # GIVEN
+        self.mocker.patch.object(DateAScientist, "_get_answer_from_pooled_llm", side_effect=ConnectionError())
+        ds = self._ds(warmup=True, warmup_questions=[QUESTION])
+        assert ds.wait_for_warmup(timeout=30)
+
+        # WHEN
+        result = ds.chat(QUESTION)
+
+        # THEN
+        assert result == "Alice"
+        assert ds.stats()["counters"]["warmup.errors"] == 1
+
+    def test_init__warmup_needs_an_api_token(self):
+        # GIVEN
+        # WHEN
+        # THEN
+        with pytest.raises(ValueError):
+            DateAScientist(df=pd.DataFrame([{"name": "Alice"}]), warmup=True)
+        with pytest.raises(ValueError):
+            self._ds(warmup_questions=[QUESTION])
@@ -0,0 +1,117 @@
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from date_a_scientist.workers import WorkerError, WorkerPool
+from tests import BaseTestCase
+
+
+class TestWorkerPool(BaseTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp_dir.name, "workers")
+        self.df = pd.DataFrame({"name": ["Alice", "Bob", "Charlie"], "age": [25, 30, 35]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run__maps_the_data_once_and_isolates_calls(self):
+        # GIVEN
+        pool = WorkerPool(self.df, self.data_dir, size=1)
+
+        # WHEN
+        changed = pool.run("df.loc[0, 'age'] = 100\ndf['senior'] = df['age'] > 30\nresult = int(df['age'].sum())")
+        result = pool.run("result = {'type': 'number', 'value': int(dfs[0]['age'].sum()), 'columns': len(df.columns)}")
+        data_files = os.listdir(self.data_dir)
+        pool.close()
+
+        # THEN
+        assert len(data_files) == 1
+        assert os.listdir(self.data_dir) == []
+        assert changed == 165
+        assert result == {"type": "number", "value": 90, "columns": 2}
+
+    def test_run__every_pool_maps_its_own_data(self):
+        # GIVEN
+        old_pool = WorkerPool(self.df, self.data_dir, size=1)
+        new_pool = WorkerPool(self.df.assign(age=self.df["age"] + 1), self.data_dir, size=1)
+
+        # WHEN
+        old_result = old_pool.run("result = int(df['age'].sum())")
+        new_result = new_pool.run("result = int(df['age'].sum())")
+        old_pool.close()
+        new_pool.close()
+
+        # THEN
+        assert (old_result, new_result) == (90, 93)
+
+    def test_run__without_arrow_the_data_is_pickled_once(self):
+        # GIVEN
+        df = pd.DataFrame({"mixed": [1, "two", 3.0]})
+        pool = WorkerPool(df, self.data_dir, size=1)
+
+        # WHEN
+        result = pool.run("result = df['mixed'].tolist()")
+        pool.close()
+
+        # THEN
+        assert not os.path.exists(self.data_dir)
+        assert result == [1, "two", 3.0]
+
+    def test_run__error_in_code(self):
+        # GIVEN
+        pool = WorkerPool(self.df, self.data_dir, size=1)
+
+        # WHEN
+        with pytest.raises(WorkerError) as e:
+            pool.run("result = df['salary'].sum()")
+        result = pool.run("result = len(df)")
+        pool.close()
+
+        # THEN
+        assert "KeyError: 'salary'" in str(e.value)
+        assert result == 3
+
+    def test_run__limits(self):
+        # GIVEN
+        pool = WorkerPool(
+            self.df, self.data_dir, size=1, cpu_time_limit=1, memory_limit=256 * 1024**2, timeout=10
+        )
+
+        # WHEN
+        with pytest.raises(WorkerError) as cpu_error:
+            pool.run("while True:\n    pass")
+        with pytest.raises(WorkerError) as memory_error:
+            pool.run("result = len(np.ones(10**9))")
+        result = pool.run("result = len(np.ones(10**6))")
+        pool.close()
+
+        # THEN
+        assert "CPUTimeLimitExceeded" in str(cpu_error.value)
+        assert "Unable to allocate" in str(memory_error.value)
+        assert result == 10**6
+
+    def test_run__timeout_replaces_the_worker(self):
+        # GIVEN
+        pool = WorkerPool(self.df, self.data_dir, size=1, timeout=1)
+        dependencies = [{"module": "time", "name": "", "alias": "time"}]
+
+        # WHEN
+        with pytest.raises(TimeoutError):
+            pool.run("while True:\n    time.sleep(0.1)", additional_dependencies=dependencies)
+        result = pool.run("result = len(df)")
+        pool.close()
+
+        # THEN
+        assert result == 3
+
+    def test_init__invalid_size(self):
+        # GIVEN
+        # WHEN
+        with pytest.raises(ValueError) as e:
+            WorkerPool(self.df, self.data_dir, size=0)
+
+        # THEN
+        assert str(e.value) == "Invalid number of workers: 0. Expected at least 1."